@@ -1,9 +1,11 @@
 from __future__ import annotations
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Sequence
 import numpy as np
 import pandas as pd
 from fastapi import APIRouter, HTTPException, Query
 
+from backend.services.metrics import span
+
 # If you mount this into your existing app in main.py, do:
 #   from backend.anomalies_api import router as anomalies_router
 #   app.include_router(anomalies_router)
@@ -33,11 +35,10 @@ except Exception:  # fallback for standalone
     STORE = _TmpStore()
 
 # Optional model-based anomalies
-try:
-    from sklearn.ensemble import IsolationForest
-    SKLEARN = True
-except Exception:
-    SKLEARN = False
+from backend.anomaly_engine import SKLEARN, IForestConfig
+from backend.detectors import DETECTORS, DetectionContext
+from backend.column_stats import build_stats, column_stats
+from backend.parallel import map_columns
 
 
 def _get_df(dataset_id: Optional[str]) -> pd.DataFrame:
@@ -60,22 +61,33 @@ def _safe_numeric(df: pd.DataFrame) -> pd.DataFrame:
     return num.fillna(num.median(numeric_only=True))
 
 
-def _iqr_per_col(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
-    out: Dict[str, Dict[str, float]] = {}
+def _iqr_col(c, col: pd.Series) -> Optional[Dict[str, float]]:
+    s = col.dropna()
+    if s.empty:
+        return None
+    q1, q3 = s.quantile(0.25), s.quantile(0.75)
+    iqr = q3 - q1
+    if iqr == 0:
+        return {"lower": float(q1), "upper": float(q3), "count": 0}
+    lo, hi = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    cnt = int(((col < lo) | (col > hi)).sum())
+    return {"lower": float(lo), "upper": float(hi), "count": cnt}
+
+
+def _dtype_class(dtype: Any) -> str:
+    """``numeric``/``text`` for any width or storage ``optimize_dtypes`` picks; other dtypes by name."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return str(dtype)
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype):
+        return "text"
+    return str(dtype)
+
+
+def _iqr_per_col(df: pd.DataFrame, workers: Optional[int] = None) -> Dict[str, Dict[str, float]]:
     num = df.select_dtypes(include=[np.number])
-    for c in num.columns:
-        s = num[c].dropna()
-        if s.empty:
-            continue
-        q1, q3 = s.quantile(0.25), s.quantile(0.75)
-        iqr = q3 - q1
-        if iqr == 0:
-            out[c] = {"lower": float(q1), "upper": float(q3), "count": 0}
-            continue
-        lo, hi = q1 - 1.5 * iqr, q3 + 1.5 * iqr
-        cnt = int(((num[c] < lo) | (num[c] > hi)).sum())
-        out[c] = {"lower": float(lo), "upper": float(hi), "count": cnt}
-    return out
+    return {c: b for c, b in zip(num.columns, map_columns(_iqr_col, num, workers=workers)) if b is not None}
 
 
 def _dup_count(df: pd.DataFrame) -> int:
@@ -86,3 +98,117 @@ def _missing_col(df: pd.DataFrame) -> Dict[str, float]:
     return {c: float(df[c].isna().mean()) for c in df.columns}
 
 
+def summarize_anomalies(df: pd.DataFrame, n_jobs: int = -1,
+                        config: Optional[IForestConfig] = None,
+                        methods: Sequence[str] = (), dataset_id: Optional[str] = None) -> Dict[str, Any]:
+    """Missingness, duplicates, IQR and IsolationForest summary for ``df``.
+
+    Shared by ``/api/anomalies/summary`` and the batch CLI; ``n_jobs`` is
+    passed to IsolationForest (use 1 when already running in a worker pool)
+    unless a full ``config`` is given. Extra ``methods`` from
+    ``backend.detectors`` are reported under ``"detectors"``; ``dataset_id``
+    lets them reuse the dataset version's cached rolling features.
+    """
+    config = config or IForestConfig(n_jobs=n_jobs)
+    workers = config.n_jobs     # the scheduler grant also bounds the column pool
+    ctx = DetectionContext(df, dataset_id=dataset_id)
+    # catalog versions reuse their cached statistics table
+    stats = column_stats(dataset_id, workers=workers) if dataset_id else build_stats(df, workers=workers)
+
+    # Missingness
+    miss_by_col = stats.missing_by_column()
+    total_cells = stats.cells
+    total_missing = stats.total_nulls
+    miss_pct = (total_missing / total_cells * 100.0) if total_cells else 0.0
+
+    # Duplicates
+    dup_rows = stats.duplicate_rows
+    dup_pct = (dup_rows / len(df) * 100.0) if len(df) else 0.0
+
+    # IQR Outliers
+    iqr = _iqr_per_col(df, workers=workers)
+    iqr_row_mask = pd.Series(False, index=df.index)
+    for c, b in iqr.items():
+        if "lower" in b and "upper" in b:
+            iqr_row_mask |= (df[c] < b["lower"]) | (df[c] > b["upper"]) if c in df else False
+    iqr_rows = int(iqr_row_mask.sum())
+
+    # Isolation Forest (optional), now also calculate per-column anomaly hit counts
+    if_rows = 0
+    if_pct = 0.0
+    if_note = None
+    if_info: Dict[str, Any] = {}
+    iforest_per_column = []
+    if SKLEARN and not df.select_dtypes(include=[np.number]).empty and len(df) >= 10:
+        try:
+            X = ctx.filled
+            with span("fit", rows=len(X)):
+                res = DETECTORS["iforest"](ctx, {"config": config})
+            if_mask = res.mask
+            if_info = {
+                "config": ctx.cache().get("iforest_info"),
+                "score_max": float(res.scores.max()) if len(res.scores) else None,
+            }
+            if_rows = int(if_mask.sum())
+            if_pct = float(if_rows / len(X) * 100.0)
+            # For each column in X, count non-null and (optionally) extreme/flagged values among anomalies
+            flagged_idx = X.index[if_mask]
+            for col in X.columns:
+                flagged_nonnull = X.loc[flagged_idx, col].notnull().sum()
+                total_nonnull = X[col].notnull().sum()
+                iforest_per_column.append({
+                    "column": col,
+                    "count_in_flagged": int(flagged_nonnull),
+                    "total_nonnull": int(total_nonnull)
+                })
+        except Exception as e:
+            if_note = f"IsolationForest error: {e}"
+    else:
+        if_note = "IsolationForest unavailable (no sklearn or insufficient numeric data)."
+        iforest_per_column = []
+
+    # Additional detectors sharing the same context
+    detectors: Dict[str, Any] = {}
+    for name in methods:
+        if name in ("iqr", "iforest"):
+            continue
+        try:
+            with span(name, rows=len(df)):
+                detectors[name] = DETECTORS[name](ctx, {"n_jobs": config.n_jobs}).summary(len(df))
+        except Exception as e:
+            detectors[name] = {"n_rows_flagged": 0, "pct_rows_flagged": 0.0, "per_column": [],
+                               "note": f"{name} error: {e}"}
+
+    # Column dtypes & flags
+    constants = stats.constants()
+
+    return {
+        "shape": {"rows": int(df.shape[0]), "cols": int(df.shape[1])},
+        "missing": {
+            "total_missing": total_missing,
+            "pct_missing": round(miss_pct, 2),
+            "by_column": miss_by_col,
+        },
+        "duplicates": {"row_duplicates": dup_rows, "row_duplicates_pct": round(dup_pct, 2)},
+        "outliers": {
+            "method": "iqr",
+            "per_column": [
+                {"column": c, "count": v["count"], "lower": v.get("lower", None), "upper": v.get("upper", None)}
+                for c, v in iqr.items()
+            ],
+            "n_rows_flagged": iqr_rows,
+        },
+        "iforest": {
+            "available": SKLEARN and if_note is None,
+            "n_rows_flagged": if_rows,
+            "pct_rows_flagged": round(if_pct, 2),
+            "note": if_note,
+            "per_column": iforest_per_column,
+            **if_info,
+        },
+        "detectors": detectors,
+        "columns": {
+            "dtypes": {c: _dtype_class(t) for c, t in df.dtypes.items()},
+            "constants": constants,
+        },
+    }
@@ -0,0 +1,123 @@
+"""IsolationForest engine shared by the anomaly endpoints, jobs and CLI.
+
+Large frames are handled by fitting on a random subsample (``fit_sample_size``)
+and scoring every row in chunks on a thread pool; sklearn's tree traversal
+releases the GIL, so chunks score in parallel. Besides the usual -1/1 style
+flag the engine returns a continuous anomaly score (higher = more anomalous)
+so rows can be ranked.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import IsolationForest
+
+# scikit-learn costs most of the import time, so only check that it is
+# installed here; it is imported on first use or by ``preload()``.
+SKLEARN = importlib.util.find_spec("sklearn") is not None
+
+
+def preload() -> None:
+    """Import the scikit-learn estimators ahead of the first anomaly request."""
+    if SKLEARN:
+        import sklearn.ensemble  # noqa: F401
+        import sklearn.neighbors  # noqa: F401
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    raw = os.environ.get(name)
+    if raw is None or raw == "":
+        return default
+    return int(raw) if int(raw) > 0 else None
+
+
+@dataclass
+class IForestConfig:
+    n_estimators: int = 200
+    contamination: Union[float, str] = 0.02
+    max_samples: Union[int, float, str] = "auto"
+    # Fit on at most this many randomly chosen rows (None = all rows)
+    fit_sample_size: Optional[int] = _env_int("DQ_IFOREST_FIT_SAMPLE", 200_000)
+    # Rows per decision_function call when scoring
+    chunk_size: int = _env_int("DQ_IFOREST_CHUNK", 100_000) or 100_000
+    n_jobs: int = -1
+    random_state: int = 42
+
+    def updated(self, **overrides: Any) -> "IForestConfig":
+        """Copy with the non-None ``overrides`` applied (e.g. from query params)."""
+        values = asdict(self)
+        for k, v in overrides.items():
+            if v is None or k not in values:
+                continue
+            if k == "max_samples" and isinstance(v, str) and v != "auto":
+                v = float(v) if "." in v else int(v)
+            values[k] = v
+        return IForestConfig(**values)
+
+    def workers(self) -> int:
+        if self.n_jobs is None or self.n_jobs < 1:
+            return os.cpu_count() or 1
+        return self.n_jobs
+
+
+@dataclass
+class IForestResult:
+    mask: np.ndarray           # True for rows flagged as anomalies
+    scores: np.ndarray         # -decision_function: > 0 means anomalous, higher = more
+    n_fit: int                 # rows the forest was fitted on
+    config: IForestConfig
+
+    def summary(self) -> Dict[str, Any]:
+        return {"n_fit": self.n_fit, **asdict(self.config)}
+
+
+def fit_model(X: np.ndarray, config: IForestConfig) -> "IsolationForest":
+    from sklearn.ensemble import IsolationForest
+    n = X.shape[0]
+    fit_X = X
+    if config.fit_sample_size and n > config.fit_sample_size:
+        rng = np.random.default_rng(config.random_state)
+        fit_X = X[rng.choice(n, size=config.fit_sample_size, replace=False)]
+    model = IsolationForest(
+        n_estimators=config.n_estimators,
+        contamination=config.contamination,
+        max_samples=config.max_samples,
+        random_state=config.random_state,
+        n_jobs=config.n_jobs,
+    )
+    model.fit(fit_X)
+    model._dq_n_fit = fit_X.shape[0]  # type: ignore[attr-defined]
+    return model
+
+
+def score_chunked(model: "IsolationForest", X: np.ndarray, chunk_size: int, workers: int) -> np.ndarray:
+    """``decision_function`` over ``X`` in row chunks, scored concurrently."""
+    n = X.shape[0]
+    if n <= chunk_size or workers <= 1:
+        return model.decision_function(X)
+    bounds = [(s, min(s + chunk_size, n)) for s in range(0, n, chunk_size)]
+    out = np.empty(n, dtype=np.float64)
+
+    def run(span):
+        s, e = span
+        out[s:e] = model.decision_function(X[s:e])
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(bounds))) as pool:
+        list(pool.map(run, bounds))
+    return out
+
+
+def fit_score(X: Union[pd.DataFrame, np.ndarray], config: Optional[IForestConfig] = None) -> IForestResult:
+    """Fit (possibly on a subsample) and score every row of ``X``."""
+    config = config or IForestConfig()
+    values = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+    model = fit_model(values, config)
+    decision = score_chunked(model, values, config.chunk_size, config.workers())
+    return IForestResult(mask=decision < 0, scores=-decision, n_fit=model._dq_n_fit, config=config)
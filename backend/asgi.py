@@ -0,0 +1,132 @@
+"""ASGI shell that answers before the application is imported.
+
+Importing ``backend.main`` pulls in pandas, numpy and FastAPI, which takes
+seconds inside the packaged executable. ``LazyApp`` is what the launcher
+hands to uvicorn instead: the socket is bound straight away, the public
+pages (landing, login, favicon, ``/static``) are served by the asset layer
+(``backend.services.assets``, same ETags and compression as later), and the
+real app is imported on a background thread. Every other request waits for
+the import and is then forwarded unchanged. Once the app is up, the
+``preload`` hooks warm the optional heavy modules (scikit-learn, pyarrow)
+so the first analysis request does not pay for them either.
+
+This module and the asset layer only use the standard library so they import
+in milliseconds.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import asyncio
+import importlib
+import logging
+import threading
+import time
+
+from backend.services.assets import ASSETS, PAGE_CACHE, STATIC_CACHE
+
+log = logging.getLogger("drilling-dq")
+
+# Public pages the shell can serve on its own: path -> file in frontend/
+SHELL_PAGES: Dict[str, str] = {
+    "/": "landing.html",
+    "/login": "login.html",
+    "/favicon.ico": "favicon.ico",
+}
+
+
+def _resolve(target: str) -> Any:
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+class LazyApp:
+    def __init__(self, target: str = "backend.main:app", preload: Iterable[str] = ()) -> None:
+        self.target = target
+        self.preload = tuple(preload)
+        self.ready = threading.Event()      # set once the app is imported (or failed to)
+        self.warm = threading.Event()       # set once the preload hooks ran
+        self.error: Optional[BaseException] = None
+        self.timings: Dict[str, float] = {}
+        self._app: Optional[Callable] = None
+        self._t0 = time.perf_counter()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- loading ---
+    def start_loading(self) -> "LazyApp":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="dq-app-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def _mark(self, name: str) -> None:
+        self.timings[name] = round(time.perf_counter() - self._t0, 4)
+
+    def _load(self) -> None:
+        try:
+            self._app = _resolve(self.target)
+            self._mark("app_imported")
+        except BaseException as e:  # reported to every waiting request
+            self.error = e
+            log.exception("Failed to import %s", self.target)
+        finally:
+            self.ready.set()
+        for hook in self.preload:
+            try:
+                _resolve(hook)()
+            except Exception:
+                log.warning("Preload %s failed", hook, exc_info=True)
+        self._mark("preloaded")
+        self.warm.set()
+
+    # --- ASGI ---
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if self._app is not None:
+            return await self._app(scope, receive, send)
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            found = self._shell_file(scope)
+            if found is not None:
+                return await self._send_file(send, *found)
+        if not self.ready.is_set():
+            await asyncio.get_running_loop().run_in_executor(None, self.ready.wait)
+        if self._app is None:
+            return await self._send(send, 503, b"Application failed to start: " + str(self.error).encode(),
+                                    "text/plain; charset=utf-8", scope)
+        return await self._app(scope, receive, send)
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        # The wrapped app is not loaded yet; it registers no startup/shutdown hooks.
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _shell_file(self, scope: Dict[str, Any]) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        path = scope["path"]
+        if path in SHELL_PAGES:
+            name = SHELL_PAGES[path]
+            cache = STATIC_CACHE if name == "favicon.ico" else PAGE_CACHE
+        elif path.startswith("/static/"):
+            name, cache = path[len("/static/"):], STATIC_CACHE
+        else:
+            return None
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        return ASSETS.negotiate(name, headers.get("if-none-match"), headers.get("accept-encoding", ""),
+                                cache, head=scope["method"] == "HEAD")
+
+    async def _send_file(self, send: Callable, status: int, headers: Dict[str, str], body: bytes) -> None:
+        if "first_page" not in self.timings:
+            self._mark("first_page")
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send(self, send: Callable, status: int, body: bytes, ctype: str, scope: Dict[str, Any]) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", ctype.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
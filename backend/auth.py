@@ -1,12 +1,36 @@
-from datetime import datetime, timedelta
+"""Login sessions: hashed credentials and stateless signed cookies.
+
+* Passwords are stored as salted PBKDF2-SHA256 hashes
+  (``pbkdf2_sha256$<iterations>$<salt>$<hash>``). New hashes use
+  ``DQ_KDF_ITERATIONS``; stored hashes keep the count they were made with.
+  Checking a password is deliberately slow, so ``verify_credentials_async``
+  runs it in a worker thread instead of on the event loop.
+* The session cookie is ``email|issued_at`` signed with ``SECRET_KEY``
+  (itsdangerous ``TimestampSigner``). Any worker process sharing
+  ``DQ_SECRET_KEY`` can validate it; nothing is stored server-side.
+* Validated cookies are kept in a small per-process LRU until they expire,
+  so page hits after the first skip the HMAC check and parsing.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
 from itsdangerous import TimestampSigner, BadSignature, SignatureExpired
 from fastapi import Request
 
 
-# Use a strong, unique key in production (e.g., from env)
-SECRET_KEY = "change-me-please-very-secret"
+# Use a strong, unique key in production; every worker must share it
+SECRET_KEY = os.environ.get("DQ_SECRET_KEY", "change-me-please-very-secret")
 COOKIE_NAME = "session"
 COOKIE_MAX_AGE = 60 * 60 * 8 # 8 hours
+KDF_ITERATIONS = int(os.environ.get("DQ_KDF_ITERATIONS", "260000"))
+SESSION_CACHE_SIZE = int(os.environ.get("DQ_SESSION_CACHE", "1024"))
 
 
 signer = TimestampSigner(SECRET_KEY)
@@ -14,16 +38,53 @@ signer = TimestampSigner(SECRET_KEY)
 
 # --- Demo user store ---
 USERS = {
-# email: password (PLAINTEXT for demo only!)
-"admin@example.com": "admin123",
+# email: password hash (hash_password("admin123") - demo only!)
+"admin@example.com": "pbkdf2_sha256$260000$Qrv5lY0j+ID5qxNXNkPElw$4+vWBbCu8l1llw90jShaUrmoVJLECNDJ3Iiu0CoZg6Y",
 }
 
 
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode().rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def hash_password(password: str, iterations: Optional[int] = None, salt: Optional[bytes] = None) -> str:
+    iterations = iterations or KDF_ITERATIONS
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def check_password(password: str, stored: str) -> bool:
+    try:
+        algo, iterations, salt, digest = stored.split("$")
+        if algo != "pbkdf2_sha256":
+            return False
+        actual = hashlib.pbkdf2_hmac("sha256", password.encode(), _unb64(salt), int(iterations))
+        return hmac.compare_digest(actual, _unb64(digest))
+    except (ValueError, TypeError):
+        return False
+
+
+# Unknown emails are checked against this so they take as long as known ones
+_DUMMY_HASH = f"pbkdf2_sha256${KDF_ITERATIONS}${_b64(bytes(16))}${_b64(bytes(32))}"
+
+
 def verify_credentials(email: str | None, password: str | None) -> bool:
     if not email or not password:
         return False
-    real = USERS.get(email)
-    return real is not None and real == password
+    stored = USERS.get(email)
+    if stored is None:
+        check_password(password, _DUMMY_HASH)
+        return False
+    return check_password(password, stored)
+
+
+async def verify_credentials_async(email: str | None, password: str | None) -> bool:
+    return await asyncio.to_thread(verify_credentials, email, password)
 
 
 def create_cookie_value(email: str) -> str:
@@ -31,16 +92,69 @@ def create_cookie_value(email: str) -> str:
     return signer.sign(raw.encode()).decode()
 
 
+class SessionCache:
+    """LRU of validated cookies -> (email, expiry epoch seconds)."""
+
+    def __init__(self, size: int = SESSION_CACHE_SIZE) -> None:
+        self.size = size
+        self._items: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[str]:
+        with self._lock:
+            hit = self._items.get(token)
+            if hit is None:
+                self.misses += 1
+                return None
+            email, expires = hit
+            if time.time() >= expires:
+                del self._items[token]
+                self.misses += 1
+                return None
+            self._items.move_to_end(token)
+            self.hits += 1
+            return email
+
+    def put(self, token: str, email: str, expires: float) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._items[token] = (email, expires)
+            self._items.move_to_end(token)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        with self._lock:
+            self._items.pop(token, None)
+
+
+SESSIONS = SessionCache()
+
+
 def read_cookie_value(value: str) -> str | None:
-    try:
-        unsigned = signer.unsign(value, max_age=COOKIE_MAX_AGE).decode()
-        email, _issued_at = unsigned.split("|", 1)
+    email = SESSIONS.get(value)
+    if email is not None:
         return email
+    try:
+        unsigned, signed_at = signer.unsign(value, max_age=COOKIE_MAX_AGE, return_timestamp=True)
+        email, _issued_at = unsigned.decode().split("|", 1)
     except (BadSignature, SignatureExpired, ValueError):
         return None
+    SESSIONS.put(value, email, signed_at.timestamp() + COOKIE_MAX_AGE)
+    return email
+
+
+def forget_cookie_value(value: str | None) -> None:
+    """Drop a cookie from this process's cache (on logout)."""
+    if value:
+        SESSIONS.discard(value)
+
 
 def current_user_email(request: Request) -> str | None:
     token = request.cookies.get(COOKIE_NAME)
     if not token:
         return None
-    return read_cookie_value(token)
\ No newline at end of file
+    return read_cookie_value(token)
@@ -1,43 +1,47 @@
 import pandas as pd
 from typing import List, Dict, Any
 
+# Alias and unit tables are compiled from backend/rules/standardization.json
+from backend.standardization import RULES, standardize  # noqa: F401
+# Spelling variants of categorical values (W-101 / w101 / WELL 101)
+from backend.value_normalization import normalize_values  # noqa: F401
+# Rows that differ only by sensor noise or a shifted timestamp
+from backend.near_duplicates import near_deduplicate  # noqa: F401
+# Per-column imputation runs on the column pool
+from backend.parallel import map_columns
+
+ALIASES = RULES.aliases
+UNIT_MAP = RULES.unit_map
+
 def deduplicate(df: pd.DataFrame, subset: List[str] | None = None) -> Dict[str, Any]:
     before = len(df)
     deduped = df.drop_duplicates(subset=subset, keep="first")
     after = len(deduped)
     return {"rows_before": before, "rows_after": after, "removed": before-after, "df": deduped}
 
-UNIT_MAP = {"pressure_bar": ("pressure_psi", 0.0689476, 0.0)}
-ALIASES = {"well_id": ["well","WELL_ID"], "depth_m": ["depth","DEPTH_M"]}
-
-def standardize(df: pd.DataFrame) -> Dict[str, Any]:
-    df2 = df.copy()
-    for std, alist in ALIASES.items():
-        if std not in df2.columns:
-            for a in alist:
-                if a in df2.columns:
-                    df2[std] = df2[a]
-                    break
-    for new_col, (from_col, mul, add) in UNIT_MAP.items():
-        if from_col in df2.columns and new_col not in df2.columns:
-            df2[new_col] = df2[from_col].astype(float) * mul + add
-    return {"applied_aliases": list(ALIASES.keys()), "applied_units": list(UNIT_MAP.keys()), "df": df2}
+def _impute_column(col, s: pd.Series):
+    """Filled copy of ``s`` and its report entry, or None when nothing is missing."""
+    n = int(s.isna().sum())
+    if not n:
+        return None
+    if pd.api.types.is_numeric_dtype(s):
+        val = s.median()
+        method = "median"
+    else:
+        mode = s.mode(dropna=True)
+        val = mode.iloc[0] if not mode.empty else ""
+        method = "mode"
+    if isinstance(s.dtype, pd.CategoricalDtype) and val not in s.cat.categories:
+        s = s.cat.add_categories([val])
+    return s.fillna(val), {"column": col, "filled": n, "method": method}
 
-def impute_simple(df: pd.DataFrame) -> Dict[str, Any]:
+def impute_simple(df: pd.DataFrame, workers: int | None = None) -> Dict[str, Any]:
     df2 = df.copy()
     report = []
-    for col in df2.columns:
-        if df2[col].isna().any():
-            if pd.api.types.is_numeric_dtype(df2[col]):
-                val = df2[col].median()
-                method = "median"
-            else:
-                mode = df2[col].mode(dropna=True)
-                val = mode.iloc[0] if not mode.empty else ""
-                method = "mode"
-            n = int(df2[col].isna().sum())
-            df2[col] = df2[col].fillna(val)
-            report.append({"column": col, "filled": n, "method": method})
+    for col, filled in zip(df2.columns, map_columns(_impute_column, df2, workers=workers)):
+        if filled is not None:
+            df2[col] = filled[0]
+            report.append(filled[1])
     return {"imputations": report, "df": df2}
 
 def kpis(before_df: pd.DataFrame, after_df: pd.DataFrame) -> Dict[str, Any]:
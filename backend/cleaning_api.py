@@ -2,32 +2,39 @@
 # Plug this into your server (e.g., mount on your existing FastAPI app or run standalone).
 # It uses your existing `cleaning.py` helpers.
 
-from fastapi import FastAPI, Body, Query
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import APIRouter, Body, Query, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import pandas as pd
 import numpy as np
-import uuid
 import math
 
-app = FastAPI(title="Drill DQ - Cleaning API")
-
-# If you serve UI from a different origin during dev
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# In-memory dataset store (replace with your persistence, e.g., DB or filesystem)
-DATASETS: Dict[str, pd.DataFrame] = {}
+from backend.services.storage import STORE, snapshot
+from backend.column_stats import column_stats
+
+router = APIRouter()
+
+def create_app():
+    """Standalone app for these endpoints; only built when run on its own."""
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    app = FastAPI(title="Drill DQ - Cleaning API")
+    # If you serve UI from a different origin during dev
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+    return app
 
 def df_records_safe(df: pd.DataFrame):
     df2 = df.replace([np.inf, -np.inf], np.nan)
     def safe_value(x):
+        if x is pd.NA:  # missing value in string/nullable columns
+            return None
         if isinstance(x, float) and (math.isnan(x) or str(x).lower() == "nan"):
             return 0.0
         return x
@@ -60,24 +67,19 @@ def dict_numbers_safe(d: dict):
             out[k] = v
     return out
 
-def _sample_df() -> pd.DataFrame:
-    # tiny fallback dataset when no dataset_id is provided/found
-    return pd.DataFrame({
-        "well_id": [1, 1, 2, 3, 4],
-        "pressure_psi": [100, 100, 120, np.nan, 90],
-        "depth": [10.0, 10.0, 11.5, 12.0, np.nan],
-    })
-
 def _get_df(dataset_id: Optional[str]) -> pd.DataFrame:
-    if dataset_id and dataset_id in DATASETS:
-        return DATASETS[dataset_id].copy()
-    # TODO: Load from your storage if needed
-    return _sample_df()
+    # Same catalog as upload/anomalies/export; falls back to latest when omitted
+    try:
+        return snapshot(STORE.get_clean(STORE.resolve(dataset_id)))
+    except KeyError:
+        if dataset_id:
+            raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+        raise HTTPException(status_code=404, detail="No datasets in memory. Upload first.")
 
-def _put_df(df: pd.DataFrame) -> str:
-    new_id = uuid.uuid4().hex[:8]
-    DATASETS[new_id] = df.copy()
-    return new_id
+def _put_df(df: pd.DataFrame, parent_id: Optional[str] = None, label: str = "cleaned",
+            content_key: Optional[str] = None) -> str:
+    """Register a cleaned frame as a new version of ``parent_id`` (or of the latest dataset)."""
+    return STORE.add_version(STORE.resolve(parent_id), df, label=label, content_key=content_key)
 
 def _missing_by_column(df: pd.DataFrame) -> Dict[str, float]:
     return {c: float(df[c].isna().mean()) for c in df.columns}
@@ -90,7 +92,9 @@ def _completeness_pct(df: pd.DataFrame) -> float:
 
 class Actions(BaseModel):
     deduplicate: Optional[Dict[str, Any]] = None  # {"subset": ["id"]}
+    near_duplicates: Optional[Dict[str, Any]] = None  # {"tolerances": {"depth_m": 0.1}, "time_tolerance": 1}
     standardize: Optional[Dict[str, Any]] = None  # {}
+    normalize_values: Optional[Dict[str, Any]] = None  # {"columns": ["well_id"]} (default: categorical columns)
     impute: Optional[Dict[str, Any]] = None       # {}
 
 class ApplyRequest(BaseModel):
@@ -98,17 +102,18 @@ class ApplyRequest(BaseModel):
     actions: Actions
     dry_run: bool = True
 
-@app.get("/api/cleansing/preview")
+@router.get("/api/cleansing/preview")
 def preview(dataset_id: Optional[str] = Query(default=None)):
-    df = _get_df(dataset_id)
-    cols = list(df.columns)
+    _get_df(dataset_id)  # 404s for unknown ids
+    stats = column_stats(STORE.resolve(dataset_id))
+    cols = [c.name for c in stats.columns]
 
-    # Stats
-    dups = _duplicates_count(df)
-    miss = _missing_by_column(df)
+    # Stats (cached per dataset version)
+    dups = stats.duplicate_rows
+    miss = stats.missing_by_column()
     # Calculate overall missing percentage (same as general/anomalies)
-    total_cells = int(df.shape[0] * df.shape[1])
-    total_missing = int(df.isna().sum().sum())
+    total_cells = stats.cells
+    total_missing = stats.total_nulls
     miss_pct = (total_missing / total_cells * 100.0) if total_cells else 0.0
     cols_with_missing = 1.0#sum(1 for v in miss.values() if v > 0)
 
@@ -134,11 +139,11 @@ def preview(dataset_id: Optional[str] = Query(default=None)):
         "columns": cols,
         "missing_by_column": miss,
         "stats": {
-            "rows": int(len(df)),
+            "rows": stats.rows,
             "duplicates": dups,
             "missing_pct": round(miss_pct, 2),
             "columns_with_missing": int(cols_with_missing),
-            "completeness_pct": round(_completeness_pct(df), 2),
+            "completeness_pct": round(stats.completeness_pct(), 2),
         },
         "suggestions": suggestions,
         "standardization_targets": std_targets,
@@ -148,4 +153,4 @@ def preview(dataset_id: Optional[str] = Query(default=None)):
 # If you want to run this module standalone:
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001, reload=False)
+    uvicorn.run(create_app(), host="0.0.0.0", port=8001, reload=False)
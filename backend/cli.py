@@ -0,0 +1,271 @@
+"""Headless batch runner: profile -> clean -> anomalies -> export for many files.
+
+Usage:
+    python -m backend.cli data/rigs/ --out reports/
+    python -m backend.cli "archive/2024-*/*.csv" --out reports/ --workers 8
+
+Each input gets ``<name>.report.json`` and ``<name>_clean.csv`` in the output
+directory. ``manifest.json`` stores a SHA-256 per input so unchanged files are
+skipped on the next run (use ``--force`` to reprocess everything). Inputs may
+be CSV, Parquet, xlsx or LAS (``backend.ingest.detect_format``).
+
+``--out-of-core`` streams each file in row chunks instead of loading it
+(``backend.out_of_core``): the report holds the profile, missingness,
+duplicates and IQR outliers, and the clean CSV is deduplicated, imputed and
+standardized chunk by chunk. Anomaly models, which need the whole frame in
+memory, are skipped. Only CSV inputs can be streamed; other formats are
+loaded whole.
+
+``--match-headers`` only reads each file's header row and writes
+``header_matches.json``: files grouped by header signature, with every
+column's canonical field and confidence resolved once per signature.
+"""
+from __future__ import annotations
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def expand_inputs(patterns: List[str]) -> List[Path]:
+    """Directories expand to their files with a supported extension; anything else is treated as a glob."""
+    from backend.ingest import EXTENSIONS
+    found: Dict[str, Path] = {}
+    for pat in patterns:
+        p = Path(pat)
+        if p.is_dir():
+            matches = sorted(m for m in p.iterdir() if m.suffix.lower() in EXTENSIONS)
+        else:
+            matches = sorted(Path(m) for m in glob.glob(pat, recursive=True))
+        for m in matches:
+            if m.is_file():
+                found.setdefault(str(m.resolve()), m.resolve())
+    return list(found.values())
+
+
+def _report_names(paths: List[Path]) -> Dict[Path, str]:
+    """Output base name per input; stems that collide get a short path hash."""
+    stems: Dict[str, int] = {}
+    for p in paths:
+        stems[p.stem] = stems.get(p.stem, 0) + 1
+    names = {}
+    for p in paths:
+        if stems[p.stem] > 1:
+            names[p] = f"{p.stem}-{hashlib.sha1(str(p).encode()).hexdigest()[:8]}"
+        else:
+            names[p] = p.stem
+    return names
+
+
+def process_file(path: str, out_dir: str, name: str, previous_hash: Optional[str],
+                 options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the full pipeline on one input file. Executed inside a worker process."""
+    from backend.profiling import profile_dataframe
+    from backend.cleaning import deduplicate, standardize, impute_simple, kpis
+    from backend.anomalies_api import summarize_anomalies
+    from backend.memory import optimize_dtypes
+    from backend.ingest import SCHEMAS, detect_format, read_header, read_table
+
+    started = time.perf_counter()
+    src = Path(path)
+    out = Path(out_dir)
+    digest = file_sha256(src)
+    report_path = out / f"{name}.report.json"
+    if previous_hash == digest and report_path.exists() and not options.get("force"):
+        return {"input": path, "sha256": digest, "status": "skipped", "report": str(report_path)}
+
+    fmt = detect_format(src)
+    if options.get("out_of_core") and fmt == "csv":
+        return _process_file_chunked(src, out, name, digest, options, started)
+
+    header = read_header(src) if fmt == "csv" else None
+    df_raw, memory = optimize_dtypes(read_table(src, fmt, dtypes=SCHEMAS.get(header) if header else None))
+    if header:
+        SCHEMAS.remember(header, df_raw)
+    profile = profile_dataframe(df_raw)
+
+    df = df_raw
+    cleaning: Dict[str, Any] = {}
+    if not options.get("no_dedup"):
+        res = deduplicate(df, subset=options.get("dedup_subset"))
+        df = res.pop("df")
+        cleaning["deduplicate"] = res
+    if not options.get("no_standardize"):
+        res = standardize(df)
+        df = res.pop("df")
+        cleaning["standardize"] = res
+    if not options.get("no_impute"):
+        res = impute_simple(df)
+        df = res.pop("df")
+        cleaning["impute"] = res
+
+    anomalies = summarize_anomalies(df, n_jobs=1)
+
+    clean_path = out / f"{name}_clean.csv"
+    df.to_csv(clean_path, index=False)
+
+    report = {
+        "input": path,
+        "sha256": digest,
+        "format": fmt,
+        "rows": int(len(df_raw)),
+        "columns": [str(c) for c in df_raw.columns],
+        "memory": memory,
+        "profile": profile,
+        "cleaning": cleaning,
+        "kpis": kpis(df_raw, df),
+        "anomalies": anomalies,
+        "clean_csv": str(clean_path),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+    with open(report_path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, default=str)
+    return {"input": path, "sha256": digest, "status": "processed", "report": str(report_path),
+            "elapsed_s": report["elapsed_s"]}
+
+
+def _process_file_chunked(src: Path, out: Path, name: str, digest: str, options: Dict[str, Any],
+                          started: float) -> Dict[str, Any]:
+    """``process_file`` for inputs larger than memory: chunked passes over the CSV."""
+    from backend import out_of_core
+    spill = out / ".spill"
+    report = out_of_core.profile_file(src, spill_dir=spill)
+    clean_path = out / f"{name}_clean.csv"
+    report["cleaning"] = out_of_core.export_file(
+        src, clean_path, dedup=not options.get("no_dedup"), impute=not options.get("no_impute"),
+        standardize=not options.get("no_standardize"), spill_dir=spill, dedup_subset=options.get("dedup_subset"))
+    report.update({"input": str(src), "sha256": digest, "out_of_core": True, "clean_csv": str(clean_path),
+                   "elapsed_s": round(time.perf_counter() - started, 3)})
+    report_path = out / f"{name}.report.json"
+    with open(report_path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, default=str)
+    return {"input": str(src), "sha256": digest, "status": "processed", "report": str(report_path),
+            "elapsed_s": report["elapsed_s"]}
+
+
+def match_headers(inputs: List[str], out_dir: str) -> Dict[str, Any]:
+    """Resolve the header rows of many CSVs, once per distinct header signature."""
+    import csv
+    from backend.standardization import RULES
+    index = RULES.index
+    groups: Dict[str, Dict[str, Any]] = {}
+    for p in expand_inputs(inputs):
+        with open(p, newline="", encoding="utf-8-sig") as fh:
+            headers = next(csv.reader(fh), [])
+        sig = index.signature(headers)
+        group = groups.get(sig)
+        if group is None:
+            group = groups[sig] = {"files": [], "matches": [
+                {**m.to_dict(), "accepted": index.accept(m)} for m in index.match_headers(headers)]}
+        group["files"].append(str(p))
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    result = {"min_confidence": index.min_confidence, "files": sum(len(g["files"]) for g in groups.values()),
+              "signatures": groups}
+    with open(out / "header_matches.json", "w", encoding="utf-8") as fh:
+        json.dump(result, fh, indent=2)
+    return result
+
+
+def _load_manifest(out_dir: Path) -> Dict[str, Any]:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+
+
+def run(inputs: List[str], out_dir: str, workers: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    options = options or {}
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = expand_inputs(inputs)
+    names = _report_names(paths)
+    manifest = _load_manifest(out)
+    results: List[Dict[str, Any]] = []
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {
+            pool.submit(process_file, str(p), str(out), names[p],
+                        manifest.get(str(p), {}).get("sha256"), options): p
+            for p in paths
+        }
+        for fut in as_completed(futures):
+            p = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {"input": str(p), "status": "failed", "error": str(e)}
+            results.append(res)
+            if res["status"] != "failed":
+                manifest[str(p)] = {"sha256": res["sha256"], "report": res["report"]}
+            print(f"[{res['status'].upper():9}] {p}" + (f" ({res['error']})" if "error" in res else ""))
+
+    with open(out / MANIFEST_NAME, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.cli",
+                                     description="Batch data-quality pipeline for drilling CSV files.")
+    parser.add_argument("inputs", nargs="+", help="CSV, Parquet, xlsx or LAS files, directories or glob patterns")
+    parser.add_argument("--out", "-o", default="reports", help="Output directory (default: reports)")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Reprocess files even if unchanged")
+    parser.add_argument("--dedup-subset", default=None, help="Comma-separated key columns for deduplication")
+    parser.add_argument("--no-dedup", action="store_true")
+    parser.add_argument("--no-standardize", action="store_true")
+    parser.add_argument("--no-impute", action="store_true")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="Stream CSV inputs in row chunks instead of loading them (files larger than RAM)")
+    parser.add_argument("--match-headers", action="store_true",
+                        help="Only map each file's header row to canonical fields (header_matches.json)")
+    args = parser.parse_args(argv)
+
+    if args.match_headers:
+        started = time.perf_counter()
+        res = match_headers(args.inputs, args.out)
+        print(f"Matched {res['files']} files ({len(res['signatures'])} distinct headers) "
+              f"in {time.perf_counter() - started:.1f}s -> {Path(args.out) / 'header_matches.json'}")
+        return 0
+
+    options = {
+        "force": args.force,
+        "dedup_subset": args.dedup_subset.split(",") if args.dedup_subset else None,
+        "no_dedup": args.no_dedup,
+        "no_standardize": args.no_standardize,
+        "no_impute": args.no_impute,
+        "out_of_core": args.out_of_core,
+    }
+    started = time.perf_counter()
+    results = run(args.inputs, args.out, workers=args.workers, options=options)
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(f"Done in {time.perf_counter() - started:.1f}s: " +
+          ", ".join(f"{k}={v}" for k, v in sorted(counts.items())) if counts else "No input files found")
+    return 1 if counts.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Per-version column statistics shared by the summary endpoints.
+
+``/api/general``, ``/api/profile``, the cleansing preview and the anomalies
+summary all need the same facts: nulls per column, distinct counts, min/max,
+which rows are duplicates. They used to rescan the frame on every request
+(``isna().sum()`` twice, ``drop_duplicates()`` plus ``duplicated()``).
+
+``build_stats`` makes one pass per column (spread over the column pool of
+``backend.parallel``) plus one row-hash pass for duplicates and keeps the
+result in a small table:
+
+* per column - type class (Integer/Numeric/Date/Boolean/Text), null count,
+  distinct count (exact for categoricals, KMV estimate from
+  ``backend.drift`` otherwise), min/max and |z| > 3 outlier count for
+  numeric columns
+* per row - the duplicate mask packed into a bitmap (1 bit per row)
+
+``column_stats(ds_id)`` memoizes the table in the catalog, so it is built once
+per dataset version (at upload, or on first use after a cleaning step) and
+the endpoints above answer in O(columns). It is also kept in the on-disk
+result cache, so a re-upload of the same bytes reuses it.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from backend.drift import KMV_K, _kmv, kmv_cardinality
+from backend.parallel import map_columns
+from backend.services.storage import STORE
+
+log = logging.getLogger("drilling-dq")
+
+OUTLIER_Z = 3.0
+
+
+def type_class(dtype: Any) -> str:
+    """Coarse type shown on the General page."""
+    name = str(dtype)
+    if "int" in name:
+        return "Integer"
+    if "float" in name:
+        return "Numeric"
+    if "datetime" in name or "date" in name:
+        return "Date"
+    if "bool" in name:
+        return "Boolean"
+    return "Text"
+
+
+@dataclass
+class ColumnStat:
+    name: str
+    dtype: str
+    type_class: str
+    count: int
+    nulls: int
+    distinct: int
+    distinct_exact: bool = True
+    min: Optional[float] = None
+    max: Optional[float] = None
+    outliers: Optional[int] = None
+
+    @property
+    def null_fraction(self) -> float:
+        return self.nulls / self.count if self.count else 0.0
+
+    def profile_row(self) -> Dict[str, Any]:
+        """Row of ``/api/profile``."""
+        return {
+            "column": self.name,
+            "null_pct": round(self.null_fraction * 100.0, 2),
+            "unique_pct": round(self.distinct / max(self.count, 1) * 100.0, 2),
+            "min": self.min,
+            "max": self.max,
+            "outliers": self.outliers,
+        }
+
+
+@dataclass
+class StatsTable:
+    rows: int
+    columns: List[ColumnStat]
+    duplicate_bitmap: np.ndarray = field(repr=False)   # np.packbits of df.duplicated()
+    duplicate_rows: int = 0
+
+    @property
+    def cells(self) -> int:
+        return self.rows * len(self.columns)
+
+    @property
+    def total_nulls(self) -> int:
+        return sum(c.nulls for c in self.columns)
+
+    @property
+    def unique_rows(self) -> int:
+        return self.rows - self.duplicate_rows
+
+    def completeness_pct(self) -> float:
+        return (1.0 - self.total_nulls / self.cells) * 100.0 if self.cells else 0.0
+
+    def missing_by_column(self) -> Dict[str, float]:
+        return {c.name: c.null_fraction for c in self.columns}
+
+    def duplicated(self, limit: Optional[int] = None) -> np.ndarray:
+        """Boolean duplicate mask for the first ``limit`` rows (all rows by default)."""
+        n = self.rows if limit is None else min(limit, self.rows)
+        return np.unpackbits(self.duplicate_bitmap, count=n).astype(bool)
+
+    def constants(self) -> List[str]:
+        """Columns with at most one distinct value, missing counted as a value."""
+        return [c.name for c in self.columns if c.distinct_exact and c.distinct + (c.nulls > 0) <= 1]
+
+    def profile(self) -> List[Dict[str, Any]]:
+        return [c.profile_row() for c in self.columns]
+
+
+def _distinct(s: pd.Series) -> Tuple[int, bool]:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        return int(np.count_nonzero(np.bincount(codes[codes >= 0], minlength=1))), True
+    values = s.dropna().to_numpy()
+    if values.size == 0:
+        return 0, True
+    sketch = _kmv(pd.util.hash_array(values))
+    return kmv_cardinality(sketch), len(sketch) < KMV_K
+
+
+def column_stat(name: Any, s: pd.Series) -> ColumnStat:
+    name = str(name)
+    nulls = int(s.isna().sum())
+    distinct, exact = _distinct(s)
+    stat = ColumnStat(name=name, dtype=str(s.dtype), type_class=type_class(s.dtype), count=int(len(s)),
+                      nulls=nulls, distinct=distinct, distinct_exact=exact)
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        try:
+            vals = s.to_numpy(dtype=np.float64, na_value=np.nan)
+            vals = vals[~np.isnan(vals)]
+            if vals.size:
+                lo, hi = float(vals.min()), float(vals.max())
+                stat.min = None if np.isinf(lo) else lo
+                stat.max = None if np.isinf(hi) else hi
+            finite = vals[np.isfinite(vals)]
+            stat.outliers = 0
+            if finite.size:
+                std = finite.std(ddof=1) if finite.size > 1 else np.nan
+                scale = std if std and np.isfinite(std) else 1.0
+                stat.outliers = int(np.count_nonzero(np.abs((finite - finite.mean()) / scale) > OUTLIER_Z))
+        except (TypeError, ValueError) as e:
+            log.warning("Error with numeric stats for column %s: %s", name, e)
+    return stat
+
+
+def duplicated_rows(df: pd.DataFrame) -> np.ndarray:
+    """Same mask as ``df.duplicated()`` via 64-bit row hashes.
+
+    Rows whose hash was seen before are compared column by column with the
+    first row of that hash; if any turns out to be a collision the exact
+    (much slower) ``duplicated()`` is used instead.
+    """
+    n = len(df)
+    if not n or not len(df.columns):
+        return np.zeros(n, dtype=bool)
+    codes, uniques = pd.factorize(pd.util.hash_pandas_object(df, index=False).to_numpy())
+    first = np.empty(len(uniques), dtype=np.int64)
+    first[codes[::-1]] = np.arange(n - 1, -1, -1)
+    mask = first[codes] != np.arange(n)
+    cand = np.flatnonzero(mask)
+    if cand.size:
+        ref = first[codes[cand]]
+        for col in df.columns:
+            a = df[col].iloc[cand].reset_index(drop=True)
+            b = df[col].iloc[ref].reset_index(drop=True)
+            same = a.eq(b).fillna(False).to_numpy(dtype=bool) | (a.isna() & b.isna()).to_numpy()
+            if not same.all():
+                log.debug("Row hash collision in column %s; using exact duplicated()", col)
+                return df.duplicated().to_numpy()
+    return mask
+
+
+def build_stats(df: pd.DataFrame, on_column: Optional[Callable[[int, int, ColumnStat], None]] = None,
+                workers: Optional[int] = None) -> StatsTable:
+    """One pass per column plus one row hash; ``on_column(done, total, stat)`` reports progress."""
+    columns: List[ColumnStat] = map_columns(column_stat, df, workers=workers, on_result=on_column)
+    mask = duplicated_rows(df)
+    return StatsTable(rows=len(df), columns=columns, duplicate_bitmap=np.packbits(mask),
+                      duplicate_rows=int(np.count_nonzero(mask)))
+
+
+def column_stats(ds_id: str, on_column: Optional[Callable[[int, int, ColumnStat], None]] = None,
+                 workers: Optional[int] = None) -> StatsTable:
+    """Statistics table of the current frame of ``ds_id``, built once per version.
+
+    ``workers`` is the column-pool share for building it (a scheduler grant).
+    """
+    return STORE.memo(ds_id, ("column_stats", KMV_K), lambda df: build_stats(df, on_column, workers),
+                      persist=True)
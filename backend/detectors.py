@@ -0,0 +1,380 @@
+"""Pluggable anomaly detectors for ``/api/anomalies/*``.
+
+Every detector takes a ``DetectionContext`` (the frame plus lazily computed,
+shared intermediates such as the numeric matrix, quartiles, medians/MADs and
+the per-well time ordering) and a dict of parameters, and returns a
+``DetectionResult``. Register new ones with ``@register_detector("name")``.
+
+All detectors are vectorized and run in O(n log n) or better: sorting and
+quantiles dominate; LOF uses a KD-tree neighbour index fitted on at most
+``max_rows`` rows.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from backend.anomaly_engine import SKLEARN, IForestConfig, fit_score
+from backend.rolling import cached_rolling_features, rolling_features, sort_positions
+
+GROUP_COL = "well_id"
+TIME_COL = "timestamp"
+MAD_SCALE = 0.6744897501960817  # makes MAD consistent with sigma for normal data
+
+
+@dataclass
+class DetectionResult:
+    name: str
+    mask: np.ndarray                                   # rows flagged by this detector
+    scores: Optional[np.ndarray] = None                # higher = more anomalous
+    column_masks: Dict[str, np.ndarray] = field(default_factory=dict)
+    per_column: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    note: Optional[str] = None
+
+    @property
+    def n_flagged(self) -> int:
+        return int(self.mask.sum())
+
+    def summary(self, n_rows: int) -> Dict[str, Any]:
+        return {
+            "n_rows_flagged": self.n_flagged,
+            "pct_rows_flagged": round(self.n_flagged / n_rows * 100.0, 2) if n_rows else 0.0,
+            "per_column": [{"column": c, **v} for c, v in self.per_column.items()],
+            "note": self.note,
+        }
+
+
+class DetectionContext:
+    """Frame plus intermediates shared between detectors (computed on first use).
+
+    Pass ``dataset_id`` when ``df`` is the current version of a catalog
+    dataset so rolling features are memoized on the dataset version.
+    """
+
+    def __init__(self, df: pd.DataFrame, group_col: str = GROUP_COL, time_col: str = TIME_COL,
+                 dataset_id: Optional[str] = None) -> None:
+        self.df = df
+        self.n = len(df)
+        self.dataset_id = dataset_id
+        self.group_col = group_col if group_col in df.columns else None
+        self.time_col = time_col if time_col in df.columns else None
+
+    @cached_property
+    def numeric(self) -> pd.DataFrame:
+        """Numeric columns with +/-inf turned into NaN."""
+        return self.df.select_dtypes(include=[np.number]).replace([np.inf, -np.inf], np.nan)
+
+    @cached_property
+    def infinite(self) -> np.ndarray:
+        """Where the numeric columns held +/-inf before it became NaN."""
+        raw = self.df.select_dtypes(include=[np.number]).to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.isinf(raw)
+
+    @cached_property
+    def values(self) -> np.ndarray:
+        return self.numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    @cached_property
+    def filled(self) -> pd.DataFrame:
+        """Numeric matrix with NaNs replaced by column medians (model input)."""
+        num = self.numeric
+        return num if num.empty else num.fillna(self.medians)
+
+    @cached_property
+    def quantiles(self) -> pd.DataFrame:
+        return self.numeric.quantile([0.25, 0.5, 0.75])
+
+    @cached_property
+    def medians(self) -> pd.Series:
+        return self.quantiles.loc[0.5]
+
+    @cached_property
+    def mads(self) -> pd.Series:
+        return (self.numeric - self.medians).abs().median()
+
+    @cached_property
+    def times(self) -> Optional[np.ndarray]:
+        """Timestamps as int64 nanoseconds (NaT -> smallest value), or None."""
+        if self.time_col is None:
+            return None
+        ts = pd.to_datetime(self.df[self.time_col], errors="coerce")
+        out = ts.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        return out
+
+    @cached_property
+    def positions(self):
+        return sort_positions(self.df, self.group_col, self.time_col)
+
+    @property
+    def order(self) -> np.ndarray:
+        """Row positions sorted by (well, timestamp); original order within ties."""
+        return self.positions[0]
+
+    @property
+    def group_start(self) -> np.ndarray:
+        """For each position in ``order``: position where its well's run starts."""
+        return self.positions[1]
+
+    def rolling(self, window: int, features: Iterable[str], closed: str = "right",
+                min_periods: int = 1) -> pd.DataFrame:
+        """Rolling features of the numeric columns (see ``backend.rolling``)."""
+        features = tuple(features)
+        key = ("rolling", int(window), features, closed, int(min_periods))
+        memo = self.cache()
+        if key not in memo:
+            if self.dataset_id is not None:
+                memo[key] = cached_rolling_features(self.dataset_id, window=window, features=features,
+                                                    closed=closed, min_periods=min_periods)
+            else:
+                memo[key] = rolling_features(self.df, window=window, features=features, closed=closed,
+                                             min_periods=min_periods, positions=self.positions)
+        return memo[key]
+
+    def cache(self) -> Dict[str, Any]:
+        """Free-form memo for detector-specific intermediates."""
+        if not hasattr(self, "_memo"):
+            self._memo: Dict[str, Any] = {}
+        return self._memo
+
+
+DetectorFn = Callable[[DetectionContext, Dict[str, Any]], DetectionResult]
+DETECTORS: Dict[str, DetectorFn] = {}
+
+
+def register_detector(name: str) -> Callable[[DetectorFn], DetectorFn]:
+    def deco(fn: DetectorFn) -> DetectorFn:
+        DETECTORS[name] = fn
+        return fn
+    return deco
+
+
+def _empty(name: str, ctx: DetectionContext, note: Optional[str] = None) -> DetectionResult:
+    return DetectionResult(name=name, mask=np.zeros(ctx.n, dtype=bool), note=note)
+
+
+def _from_column_masks(name: str, ctx: DetectionContext, col_masks: Dict[str, np.ndarray],
+                       per_column: Dict[str, Dict[str, Any]], scores: Optional[np.ndarray] = None) -> DetectionResult:
+    mask = np.zeros(ctx.n, dtype=bool)
+    for m in col_masks.values():
+        mask |= m
+    return DetectionResult(name=name, mask=mask, scores=scores, column_masks=col_masks, per_column=per_column)
+
+
+def _unsort(ctx: DetectionContext, sorted_values: np.ndarray) -> np.ndarray:
+    out = np.empty_like(sorted_values)
+    out[ctx.order] = sorted_values
+    return out
+
+
+# --- detectors ---
+
+@register_detector("iqr")
+def detect_iqr(ctx: DetectionContext, params: Dict[str, Any]) -> DetectionResult:
+    k = float(params.get("k", 1.5))
+    q = ctx.quantiles
+    masks, per_col = {}, {}
+    for i, c in enumerate(ctx.numeric.columns):
+        q1, q3 = q.at[0.25, c], q.at[0.75, c]
+        if pd.isna(q1):
+            continue
+        iqr = q3 - q1
+        # zero spread: anything off the constant value is flagged
+        lo, hi = (q1, q3) if iqr == 0 else (q1 - k * iqr, q3 + k * iqr)
+        col = ctx.values[:, i]
+        # +/-inf is outside any fence, as in ``_iqr_per_col`` of the summary
+        m = (col < lo) | (col > hi) | ctx.infinite[:, i]
+        masks[c] = m
+        per_col[c] = {"count": int(m.sum()), "lower": float(lo), "upper": float(hi)}
+    return _from_column_masks("iqr", ctx, masks, per_col)
+
+
+@register_detector("zscore")
+def detect_zscore(ctx: DetectionContext, params: Dict[str, Any]) -> DetectionResult:
+    thr = float(params.get("threshold", 3.0))
+    X = ctx.values
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(X, axis=0) if X.size else np.array([])
+        std = np.nanstd(X, axis=0, ddof=1) if X.size else np.array([])
+        std = np.where((std == 0) | np.isnan(std), 1.0, std)
+        Z = np.abs((X - mean) / std)
+    masks, per_col = {}, {}
+    for i, c in enumerate(ctx.numeric.columns):
+        m = np.nan_to_num(Z[:, i], nan=0.0) > thr
+        masks[c] = m
+        per_col[c] = {"count": int(m.sum()), "mean": float(np.nan_to_num(mean[i])), "std": float(std[i])}
+    scores = np.nanmax(np.nan_to_num(Z, nan=0.0), axis=1) if Z.size else np.zeros(ctx.n)
+    return _from_column_masks("zscore", ctx, masks, per_col, scores)
+
+
+@register_detector("mad")
+def detect_mad(ctx: DetectionContext, params: Dict[str, Any]) -> DetectionResult:
+    """Robust z-score: 0.6745 * |x - median| / MAD > threshold (Iglewicz-Hoaglin)."""
+    thr = float(params.get("threshold", 3.5))
+    X = ctx.values
+    med = ctx.medians.to_numpy(dtype=np.float64)
+    mad = ctx.mads.to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        Z = np.abs(MAD_SCALE * (X - med) / np.where(mad == 0, np.nan, mad))
+    Z = np.nan_to_num(Z, nan=0.0)
+    masks, per_col = {}, {}
+    for i, c in enumerate(ctx.numeric.columns):
+        m = Z[:, i] > thr
+        masks[c] = m
+        per_col[c] = {"count": int(m.sum()), "median": float(np.nan_to_num(med[i])), "mad": float(np.nan_to_num(mad[i]))}
+    scores = Z.max(axis=1) if Z.size else np.zeros(ctx.n)
+    return _from_column_masks("mad", ctx, masks, per_col, scores)
+
+
+@register_detector("rolling")
+def detect_rolling(ctx: DetectionContext, params: Dict[str, Any]) -> DetectionResult:
+    """Deviation from the mean/std of the previous ``window`` rows per well along the timestamp."""
+    window = int(params.get("window", 12))
+    thr = float(params.get("threshold", 3.0))
+    min_periods = int(params.get("min_periods", max(3, window // 2)))
+    if ctx.n == 0 or ctx.numeric.empty:
+        return _empty("rolling", ctx, "No numeric data")
+    feats = ctx.rolling(window, ("mean", "std"), closed="left", min_periods=min_periods)
+    masks, per_col = {}, {}
+    best = np.zeros(ctx.n)
+    for i, c in enumerate(ctx.numeric.columns):
+        mean = feats[f"{c}__mean"].to_numpy()
+        std = feats[f"{c}__std"].to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = np.abs(ctx.values[:, i] - mean) / np.where(std == 0, np.nan, std)
+        z = np.nan_to_num(z, nan=0.0, posinf=0.0)
+        m = z > thr
+        masks[c] = m
+        best = np.maximum(best, z)
+        per_col[c] = {"count": int(m.sum()), "window": window}
+    res = _from_column_masks("rolling", ctx, masks, per_col, best)
+    if ctx.time_col is None:
+        res.note = f"No '{TIME_COL}' column; rows taken in file order."
+    return res
+
+
+@register_detector("roc")
+def detect_rate_of_change(ctx: DetectionContext, params: Dict[str, Any]) -> DetectionResult:
+    """Spikes in the per-well first difference (per second when timestamps exist), robust-z scored."""
+    thr = float(params.get("threshold", 5.0))
+    if ctx.n < 2 or ctx.numeric.empty:
+        return _empty("roc", ctx, "Not enough numeric data")
+    same_group = np.zeros(ctx.n, dtype=bool)
+    same_group[1:] = ctx.group_start[1:] != np.arange(1, ctx.n)
+    dt = None
+    if ctx.times is not None:
+        t = ctx.times[ctx.order].astype(np.float64) / 1e9
+        dt = np.full(ctx.n, np.nan)
+        dt[1:] = t[1:] - t[:-1]
+        dt[dt <= 0] = np.nan
+    masks, per_col = {}, {}
+    best = np.zeros(ctx.n)
+    for i, c in enumerate(ctx.numeric.columns):
+        col = ctx.values[ctx.order, i]
+        rate = np.full(ctx.n, np.nan)
+        rate[1:] = col[1:] - col[:-1]
+        if dt is not None:
+            rate = rate / dt
+        rate[~same_group] = np.nan
+        finite = rate[np.isfinite(rate)]
+        if finite.size < 3:
+            continue
+        med = np.median(finite)
+        mad = np.median(np.abs(finite - med))
+        if mad == 0:
+            continue
+        with np.errstate(invalid="ignore"):
+            z = np.nan_to_num(MAD_SCALE * np.abs(rate - med) / mad, nan=0.0, posinf=0.0)
+        z = _unsort(ctx, z)
+        m = z > thr
+        masks[c] = m
+        best = np.maximum(best, z)
+        per_col[c] = {"count": int(m.sum()), "median_rate": float(med), "mad_rate": float(mad)}
+    return _from_column_masks("roc", ctx, masks, per_col, best)
+
+
+@register_detector("lof")
+def detect_lof(ctx: DetectionContext, params: Dict[str, Any]) -> DetectionResult:
+    """Local outlier factor on robust-scaled numeric columns using a KD-tree index."""
+    if not SKLEARN:
+        return _empty("lof", ctx, "scikit-learn not available")
+    from sklearn.neighbors import LocalOutlierFactor
+    n_neighbors = int(params.get("n_neighbors", 20))
+    contamination = params.get("contamination", 0.02)
+    max_rows = int(params.get("max_rows", 200_000))
+    X = ctx.filled
+    if X.empty or ctx.n <= n_neighbors:
+        return _empty("lof", ctx, "Not enough numeric data")
+    scale = ctx.mads.replace(0, np.nan).fillna(X.std()).replace(0, 1.0).fillna(1.0)
+    Z = ((X - ctx.medians) / scale).to_numpy(dtype=np.float64)
+    if ctx.n > max_rows:
+        rng = np.random.default_rng(int(params.get("random_state", 42)))
+        fit_rows = Z[rng.choice(ctx.n, size=max_rows, replace=False)]
+        model = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=contamination,
+                                   algorithm="kd_tree", novelty=True, n_jobs=params.get("n_jobs", -1))
+        model.fit(fit_rows)
+        decision = model.decision_function(Z)
+    else:
+        model = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=contamination,
+                                   algorithm="kd_tree", n_jobs=params.get("n_jobs", -1))
+        model.fit(Z)
+        decision = model.negative_outlier_factor_ - model.offset_
+    return DetectionResult(name="lof", mask=decision < 0, scores=-decision)
+
+
+@register_detector("iforest")
+def detect_iforest(ctx: DetectionContext, params: Dict[str, Any]) -> DetectionResult:
+    if not SKLEARN:
+        return _empty("iforest", ctx, "scikit-learn not available")
+    if ctx.numeric.empty or ctx.n < 10:
+        return _empty("iforest", ctx, "Insufficient numeric data")
+    config = params.get("config") or IForestConfig()
+    res = fit_score(ctx.filled, config)
+    # Per-column flags are a heuristic: values of flagged rows outside a loose
+    # 30/70 percentile band (IsolationForest itself has no per-column bounds).
+    q = ctx.filled.quantile([0.30, 0.70])
+    masks, per_col = {}, {}
+    for i, c in enumerate(ctx.filled.columns):
+        q1, q3 = q.at[0.30, c], q.at[0.70, c]
+        lo, hi = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        col = ctx.values[:, i]
+        masks[c] = res.mask & ((col < lo) | (col > hi))
+        per_col[c] = {"count_in_flagged": int(res.mask.sum()), "total_nonnull": int(ctx.filled[c].notnull().sum()),
+                      "lower": float(lo), "upper": float(hi)}
+    out = DetectionResult(name="iforest", mask=res.mask, scores=res.scores, column_masks=masks, per_column=per_col)
+    ctx.cache()["iforest_info"] = res.summary()
+    return out
+
+
+def parse_methods(text: Optional[str], default: Iterable[str]) -> List[str]:
+    """Comma-separated detector names -> validated list (ValueError on unknown names)."""
+    if not text:
+        return list(default)
+    names = [m.strip().lower() for m in text.split(",") if m.strip()]
+    unknown = [m for m in names if m not in DETECTORS]
+    if unknown:
+        raise ValueError(f"Unknown detector(s): {', '.join(unknown)}. Available: {', '.join(sorted(DETECTORS))}")
+    return names
+
+
+def run_detectors(ctx: DetectionContext, names: Iterable[str],
+                  params: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, DetectionResult]:
+    params = params or {}
+    return {name: DETECTORS[name](ctx, params.get(name, {})) for name in names}
+
+
+def combined_rank(results: Iterable[DetectionResult]) -> Optional[np.ndarray]:
+    """Per row, the highest percentile rank (0-1) of its score across detectors.
+
+    Detector scores live on different scales (robust z, IQR distance,
+    IsolationForest decision values), so each is ranked within its own
+    detector before the maximum is taken. ``None`` when no detector scores.
+    """
+    ranks = []
+    for res in results:
+        if res.scores is None:
+            continue
+        s = pd.Series(np.asarray(res.scores, dtype="float64"))
+        ranks.append(s.rank(pct=True, method="average").fillna(0.0).to_numpy())
+    return np.max(np.vstack(ranks), axis=0) if ranks else None
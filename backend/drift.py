@@ -0,0 +1,295 @@
+"""Multi-dataset comparison: schema diff, per-column drift and row overlap.
+
+Each dataset version is reduced once to small sketches, memoized in the
+catalog, and comparisons only ever touch the sketches:
+
+* numeric / datetime columns - values at a fixed grid of quantiles, which
+  gives an approximate CDF for the KS statistic and decile bins for PSI
+* other columns - top-k value counts plus an "other" bucket for PSI
+* rows - KMV (k minimum values) sketch of row hashes, estimating distinct
+  rows, Jaccard similarity and shared rows between datasets. Cells are
+  hashed by value, not storage dtype: numbers as float64, dates as
+  nanoseconds, everything else as text, so an upload narrowed to ``uint8``
+  matches the same rows stored as ``float32``
+
+Building the sketches is one pass per column; comparing two sketched
+datasets is independent of their row counts.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from backend.services.storage import STORE
+
+QUANTILE_POINTS = 1001
+TOP_K = int(os.environ.get("DQ_DRIFT_TOP_K", "50"))
+KMV_K = int(os.environ.get("DQ_DRIFT_KMV_K", "4096"))
+PSI_EPS = 1e-4
+ROW_NULL = "\x00null"   # text stand-in for missing cells in row hashes
+PSI_MODERATE, PSI_MAJOR = 0.1, 0.25
+_HASH_SPACE = float(2 ** 64)
+
+
+@dataclass
+class ColumnSketch:
+    name: str
+    dtype: str
+    kind: str                                   # "numeric" or "categorical"
+    count: int
+    nulls: int
+    quantiles: Optional[np.ndarray] = None      # values at np.linspace(0, 1, QUANTILE_POINTS)
+    top: Dict[str, int] = field(default_factory=dict)
+    other: int = 0
+    distinct: Optional[int] = None
+
+    def cdf(self, x: np.ndarray) -> np.ndarray:
+        """Approximate P(value <= x) from the quantile grid."""
+        q = self.quantiles
+        probs = np.linspace(0.0, 1.0, len(q))
+        uq = np.unique(q)
+        # for tied quantiles keep the largest probability (right-continuous CDF)
+        p = probs[np.searchsorted(q, uq, side="right") - 1]
+        return np.interp(x, uq, p, left=0.0, right=1.0)
+
+
+@dataclass
+class DatasetSketch:
+    rows: int
+    columns: Dict[str, ColumnSketch]
+
+
+@dataclass
+class RowSketch:
+    rows: int
+    hashes: np.ndarray                          # sorted, at most KMV_K smallest distinct row hashes
+
+    @property
+    def exact(self) -> bool:
+        return len(self.hashes) < KMV_K
+
+    def distinct(self) -> int:
+        return kmv_cardinality(self.hashes)
+
+
+def kmv_cardinality(hashes: np.ndarray) -> int:
+    if len(hashes) < KMV_K:
+        return int(len(hashes))
+    return int(round((KMV_K - 1) / (float(hashes[KMV_K - 1]) / _HASH_SPACE)))
+
+
+def _kmv(hashes: np.ndarray, k: int = KMV_K) -> np.ndarray:
+    if len(hashes) > 4 * k:
+        small = np.unique(np.partition(hashes, 4 * k)[:4 * k])
+        if len(small) >= k:
+            return small[:k]
+    return np.unique(hashes)[:k]
+
+
+def logical_type(dtype: Any) -> str:
+    """Storage-independent type (int8 and int64, category and string compare equal)."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "integer"
+    if pd.api.types.is_float_dtype(dtype):
+        return "float"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    return "text"
+
+
+def _as_datetime(s: pd.Series) -> Optional[pd.Series]:
+    """Parse text columns whose leading values all look like dates (e.g. CSV timestamps)."""
+    head = s.dropna().head(100)
+    if head.empty or not all(isinstance(v, str) for v in head):
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # "could not infer format" on odd strings
+        try:
+            if pd.to_datetime(head, errors="coerce").isna().any():
+                return None
+        except (ValueError, TypeError):
+            return None
+        return pd.to_datetime(s, errors="coerce")
+
+
+def sketch_column(name: str, s: pd.Series) -> ColumnSketch:
+    nulls = int(s.isna().sum())
+    base = dict(name=name, dtype=logical_type(s.dtype), count=int(len(s)), nulls=nulls)
+    if pd.api.types.is_bool_dtype(s.dtype):
+        s = s.astype("object")
+    elif s.dtype == object or isinstance(s.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+        parsed = _as_datetime(s)
+        if parsed is not None:
+            s = parsed
+    if pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_datetime64_any_dtype(s.dtype):
+        vals = s.dropna()
+        if pd.api.types.is_datetime64_any_dtype(s.dtype):
+            vals = vals.astype("int64")
+        arr = vals.to_numpy(dtype=np.float64)
+        arr = arr[np.isfinite(arr)]
+        q = np.quantile(arr, np.linspace(0.0, 1.0, QUANTILE_POINTS)) if arr.size else None
+        return ColumnSketch(kind="numeric", quantiles=q, **base)
+    counts = s.dropna().astype(str).value_counts()
+    top = counts.head(TOP_K)
+    return ColumnSketch(kind="categorical", top={str(k): int(v) for k, v in top.items()},
+                        other=int(counts.iloc[TOP_K:].sum()), distinct=int(len(counts)), **base)
+
+
+def sketch_frame(df: pd.DataFrame) -> DatasetSketch:
+    return DatasetSketch(rows=len(df), columns={str(c): sketch_column(str(c), df[c]) for c in df.columns})
+
+
+def _row_values(s: pd.Series) -> pd.Series:
+    """``s`` in a dtype-independent form for row hashing."""
+    if s.dtype == object or isinstance(s.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+        parsed = _as_datetime(s)
+        if parsed is not None:
+            s = parsed
+    missing = s.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        if getattr(s.dt, "tz", None) is not None:
+            s = s.dt.tz_convert(None)
+        vals = s.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        return pd.Series(np.where(missing, np.iinfo(np.int64).min, vals))
+    if pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype):
+        vals = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        return pd.Series(np.where(missing, np.nan, vals))  # one NaN bit pattern
+    vals = s.astype(object).to_numpy()
+    return pd.Series(np.where(missing, ROW_NULL, vals.astype(str)), dtype=object)
+
+
+def sketch_rows(df: pd.DataFrame, columns: Sequence[str]) -> RowSketch:
+    """KMV sketch of per-row hashes over ``columns`` (name order, so column order is irrelevant)."""
+    cols = sorted(columns)
+    if not cols or df.empty:
+        return RowSketch(rows=len(df), hashes=np.empty(0, dtype=np.uint64))
+    values = pd.DataFrame({i: _row_values(df[c]) for i, c in enumerate(cols)})
+    h = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return RowSketch(rows=len(df), hashes=_kmv(h))
+
+
+def dataset_sketch(ds_id: str) -> DatasetSketch:
+    return STORE.memo(ds_id, ("drift_sketch", QUANTILE_POINTS, TOP_K), sketch_frame, persist=True)
+
+
+def row_sketch(ds_id: str, columns: Sequence[str]) -> RowSketch:
+    cols = tuple(sorted(columns))
+    return STORE.memo(ds_id, ("row_sketch", KMV_K, cols), lambda df: sketch_rows(df, cols), persist=True)
+
+
+# --- statistics ---
+
+def _psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    e = np.clip(expected / max(expected.sum(), 1e-12), PSI_EPS, None)
+    a = np.clip(actual / max(actual.sum(), 1e-12), PSI_EPS, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def numeric_drift(ref: ColumnSketch, cur: ColumnSketch) -> Tuple[Optional[float], Optional[float]]:
+    """(PSI over the reference deciles, KS statistic) from two quantile sketches."""
+    if ref.quantiles is None or cur.quantiles is None:
+        return None, None
+    grid = np.union1d(ref.quantiles, cur.quantiles)
+    ks = float(np.max(np.abs(ref.cdf(grid) - cur.cdf(grid))))
+    edges = np.unique(np.quantile(ref.quantiles, np.linspace(0.1, 0.9, 9)))
+    cuts = np.concatenate(([0.0], ref.cdf(edges), [1.0]))
+    cuts_cur = np.concatenate(([0.0], cur.cdf(edges), [1.0]))
+    return _psi(np.diff(cuts), np.diff(cuts_cur)), ks
+
+
+def categorical_drift(ref: ColumnSketch, cur: ColumnSketch) -> Optional[float]:
+    keys = sorted(set(ref.top) | set(cur.top))
+    if not keys:
+        return None
+    # values outside a side's top-k are only known in aggregate; spread its "other" count evenly
+    def dist(sk: ColumnSketch) -> np.ndarray:
+        missing = [k for k in keys if k not in sk.top]
+        share = sk.other / (len(missing) + 1) if missing else sk.other
+        vals = [sk.top.get(k, share) for k in keys]
+        return np.array(vals + [share], dtype=np.float64)
+    return _psi(dist(ref), dist(cur))
+
+
+def _drift_level(psi: Optional[float]) -> Optional[str]:
+    if psi is None:
+        return None
+    if psi >= PSI_MAJOR:
+        return "major"
+    return "moderate" if psi >= PSI_MODERATE else "none"
+
+
+def _null_pct(sk: ColumnSketch) -> float:
+    return round(sk.nulls / sk.count * 100.0, 2) if sk.count else 0.0
+
+
+def compare_sketches(ref: DatasetSketch, cur: DatasetSketch) -> Dict[str, Any]:
+    added = [c for c in cur.columns if c not in ref.columns]
+    removed = [c for c in ref.columns if c not in cur.columns]
+    changed, columns = [], []
+    for name, r in ref.columns.items():
+        c = cur.columns.get(name)
+        if c is None:
+            continue
+        if r.dtype != c.dtype:
+            changed.append({"column": name, "from": r.dtype, "to": c.dtype})
+        entry: Dict[str, Any] = {"column": name, "kind": r.kind, "psi": None, "ks": None,
+                                 "null_pct_ref": _null_pct(r), "null_pct": _null_pct(c)}
+        if r.kind == c.kind == "numeric":
+            entry["psi"], entry["ks"] = numeric_drift(r, c)
+        elif r.kind == c.kind == "categorical":
+            entry["psi"] = categorical_drift(r, c)
+        else:
+            entry["note"] = f"type changed ({r.kind} -> {c.kind})"
+        entry["drift"] = _drift_level(entry["psi"])
+        columns.append(entry)
+    columns.sort(key=lambda e: -(e["psi"] or 0.0))
+    return {"schema": {"added": added, "removed": removed, "type_changed": changed}, "columns": columns}
+
+
+def compare_rows(ref: RowSketch, cur: RowSketch) -> Dict[str, Any]:
+    """Jaccard / shared-row estimates from two KMV sketches."""
+    union = np.union1d(ref.hashes, cur.hashes)[:KMV_K]
+    if len(union) == 0:
+        return {"jaccard": 0.0, "shared_rows_est": 0, "exact": True}
+    both = np.isin(union, ref.hashes, assume_unique=True) & np.isin(union, cur.hashes, assume_unique=True)
+    jaccard = float(both.sum() / len(union))
+    shared = int(round(jaccard * kmv_cardinality(union)))
+    ref_n, cur_n = ref.distinct(), cur.distinct()
+    return {
+        "jaccard": round(jaccard, 4),
+        "shared_rows_est": shared,
+        "distinct_rows_ref": ref_n,
+        "distinct_rows": cur_n,
+        "containment_ref": round(min(shared / ref_n, 1.0), 4) if ref_n else 0.0,
+        "containment": round(min(shared / cur_n, 1.0), 4) if cur_n else 0.0,
+        "exact": ref.exact and cur.exact,
+    }
+
+
+def compare_datasets(dataset_ids: Sequence[str]) -> Dict[str, Any]:
+    """Compare every dataset against the first one (the reference)."""
+    if len(dataset_ids) < 2:
+        raise ValueError("At least two dataset ids are required")
+    sketches = [dataset_sketch(d) for d in dataset_ids]
+    ref_id, ref = dataset_ids[0], sketches[0]
+    comparisons: List[Dict[str, Any]] = []
+    for ds_id, sk in zip(dataset_ids[1:], sketches[1:]):
+        out = compare_sketches(ref, sk)
+        common = [c for c in ref.columns if c in sk.columns]
+        out["fingerprints"] = {"columns": len(common),
+                               **compare_rows(row_sketch(ref_id, common), row_sketch(ds_id, common))}
+        out["dataset_id"] = ds_id
+        out["drifted_columns"] = sum(1 for c in out["columns"] if c["drift"] in ("moderate", "major"))
+        comparisons.append(out)
+    return {
+        "reference": ref_id,
+        "datasets": [{"dataset_id": d, "rows": s.rows, "columns": len(s.columns)}
+                     for d, s in zip(dataset_ids, sketches)],
+        "comparisons": comparisons,
+    }
@@ -0,0 +1,233 @@
+"""Fuzzy header matching against the standardization rules.
+
+Exact lookups in ``backend.standardization`` only resolve headers whose
+normalized form is a known mnemonic (optionally with a unit suffix). This
+index resolves the rest - ``Stand Pipe Press``, ``HookLoad_avg``,
+``Hole Dpth (ft)`` - to a canonical column with a confidence score:
+
+1. exact normalized key                                     -> 1.0
+2. the same key with separators removed (``hook_load``/``hookload``) -> 0.97
+3. a trailing unit (``..._ft``, ``... (kPa)``) is split off, then
+   candidates sharing character trigrams with the rest are ranked by the
+   better of ``0.5 * trigram Dice + 0.5 * (1 - edit distance / length)``
+   and ``0.9 *`` the share of word tokens that match (equal, abbreviated as
+   a prefix - ``press``/``pressure`` - or one edit apart); the unit must
+   belong to the candidate's dimension
+
+Results are cached per header and per header signature (a hash of the
+file's column names in order), so files from a vendor already seen resolve
+with one dict lookup.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple
+import hashlib
+import os
+import threading
+
+if TYPE_CHECKING:
+    from backend.standardization import StandardizationRules
+
+MIN_CONFIDENCE = float(os.environ.get("DQ_HEADER_MATCH_MIN", "0.85"))
+SIGNATURE_CACHE_SIZE = int(os.environ.get("DQ_HEADER_CACHE", "4096"))
+HEADER_CACHE_SIZE = 16 * SIGNATURE_CACHE_SIZE
+MAX_CANDIDATES = 12
+COMPACT_SCORE = 0.97
+TOKEN_WEIGHT = 0.9
+
+
+@dataclass(frozen=True)
+class HeaderMatch:
+    header: str
+    canonical: Optional[str]
+    unit: Optional[str]
+    confidence: float
+    method: str                  # "exact", "compact", "fuzzy" or "none"
+    matched: Optional[str] = None  # alias the header was matched to
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"#{text}#"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)} if text else set()
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """Levenshtein distance (row-by-row DP; headers are short)."""
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if limit is not None and min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def _token_match(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    short, long_ = (a, b) if len(a) <= len(b) else (b, a)
+    if len(short) >= 3 and long_.startswith(short):
+        return True
+    return len(short) >= 4 and edit_distance(a, b, limit=1) <= 1
+
+
+def token_score(a: Sequence[str], b: Sequence[str]) -> float:
+    """Share of tokens matched in order between two token lists."""
+    if not a or not b:
+        return 0.0
+    matched, j = 0, 0
+    for tok in a:
+        for k in range(j, len(b)):
+            if _token_match(tok, b[k]):
+                matched += 1
+                j = k + 1
+                break
+    return matched / max(len(a), len(b))
+
+
+class HeaderIndex:
+    def __init__(self, rules: "StandardizationRules", min_confidence: float = MIN_CONFIDENCE) -> None:
+        from backend.standardization import normalize_name
+        self._normalize = normalize_name
+        self.rules = rules
+        self.min_confidence = min_confidence
+        self.derived = {normalize_name(t) for t in rules.derived}  # outputs, never inputs
+        self.units: Dict[str, str] = {}        # normalized unit spelling -> unit
+        for name, spellings in rules.unit_spellings.items():
+            for s in spellings:
+                self.units[normalize_name(s)] = name
+        # bare aliases (no unit suffix) in their compact form
+        self.aliases: Dict[str, Tuple[str, str]] = {}   # compact alias -> (canonical, alias key)
+        self.tokens: Dict[str, List[List[str]]] = {}     # compact alias -> token lists of its spellings
+        self.grams: Dict[str, Set[str]] = {}
+        self.postings: Dict[str, List[str]] = {}
+        for canonical in rules.columns:
+            for alias in [canonical, *rules.aliases[canonical]]:
+                key = normalize_name(alias)
+                compact = key.replace("_", "")
+                if not compact:
+                    continue
+                if compact in self.aliases:
+                    if self.aliases[compact][0] == canonical:
+                        self.tokens[compact].append(key.split("_"))
+                    continue
+                self.tokens[compact] = [key.split("_")]
+                self.aliases[compact] = (canonical, key)
+                g = trigrams(compact)
+                self.grams[compact] = g
+                for gram in g:
+                    self.postings.setdefault(gram, []).append(compact)
+        self._headers: Dict[str, HeaderMatch] = {}
+        self._signatures: "OrderedDict[str, List[HeaderMatch]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # --- single header ---
+    def _split_unit(self, key: str) -> Tuple[str, Optional[str]]:
+        tokens = key.split("_")
+        for n in (3, 2, 1):
+            if len(tokens) > n:
+                unit = self.units.get("_".join(tokens[-n:]))
+                if unit is not None:
+                    return "_".join(tokens[:-n]), unit
+        return key, None
+
+    def _unit_fits(self, canonical: str, unit: Optional[str]) -> bool:
+        if unit is None:
+            return True
+        own = self.rules.columns.get(canonical)
+        return own is not None and self.rules.units[own].dimension == self.rules.units[unit].dimension
+
+    def _resolve(self, header: str) -> HeaderMatch:
+        key = self._normalize(header)
+        exact = self.rules.lookup.get(key)
+        if exact is not None:
+            return HeaderMatch(header, exact[0], exact[1], 1.0, "exact", key)
+        if key in self.derived:
+            return HeaderMatch(header, None, None, 0.0, "none")
+        base, unit = self._split_unit(key)
+        found = self._search(header, base, unit)
+        if unit is not None and (found is None or found.confidence < self.min_confidence):
+            whole = self._search(header, key, None)  # the "unit" may be part of the name (e.g. "Well Nm")
+            if whole is not None and (found is None or whole.confidence > found.confidence):
+                found = whole
+        return found or HeaderMatch(header, None, None, 0.0, "none")
+
+    def _search(self, header: str, base: str, unit: Optional[str]) -> Optional[HeaderMatch]:
+        compact = base.replace("_", "")
+        if not compact:
+            return None
+        hit = self.aliases.get(compact)
+        if hit is not None and self._unit_fits(hit[0], unit):
+            return HeaderMatch(header, hit[0], unit or self.rules.columns[hit[0]], COMPACT_SCORE, "compact", hit[1])
+
+        grams = trigrams(compact)
+        tokens = base.split("_")
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for cand in self.postings.get(gram, ()):
+                shared[cand] = shared.get(cand, 0) + 1
+        best: Optional[Tuple[float, str]] = None
+        for cand, n in sorted(shared.items(), key=lambda kv: -kv[1])[:MAX_CANDIDATES]:
+            canonical, alias_key = self.aliases[cand]
+            if not self._unit_fits(canonical, unit):
+                continue
+            dice = 2.0 * n / (len(grams) + len(self.grams[cand]))
+            longest = max(len(compact), len(cand))
+            ratio = 1.0 - edit_distance(compact, cand, limit=longest) / longest
+            score = round(max(0.5 * dice + 0.5 * ratio,
+                              TOKEN_WEIGHT * max(token_score(tokens, t) for t in self.tokens[cand])), 4)
+            if best is None or score > best[0]:
+                best = (score, cand)
+        if best is None:
+            return None
+        score, cand = best
+        canonical, alias_key = self.aliases[cand]
+        return HeaderMatch(header, canonical, unit or self.rules.columns[canonical], score, "fuzzy", alias_key)
+
+    def match(self, header: Any) -> HeaderMatch:
+        header = str(header)
+        cached = self._headers.get(header)
+        if cached is None:
+            cached = self._resolve(header)
+            if len(self._headers) >= HEADER_CACHE_SIZE:
+                self._headers.clear()
+            self._headers[header] = cached
+        return cached
+
+    def accept(self, m: HeaderMatch) -> bool:
+        return m.canonical is not None and m.confidence >= self.min_confidence
+
+    # --- whole files ---
+    @staticmethod
+    def signature(headers: Sequence[Any]) -> str:
+        return hashlib.sha1("\x1f".join(str(h) for h in headers).encode("utf-8")).hexdigest()
+
+    def match_headers(self, headers: Sequence[Any]) -> List[HeaderMatch]:
+        sig = self.signature(headers)
+        with self._lock:
+            hit = self._signatures.get(sig)
+            if hit is not None:
+                self._signatures.move_to_end(sig)
+                self.hits += 1
+                return hit
+            self.misses += 1
+        result = [self.match(h) for h in headers]
+        with self._lock:
+            self._signatures[sig] = result
+            while len(self._signatures) > SIGNATURE_CACHE_SIZE:
+                self._signatures.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"headers": len(self._headers), "signatures": len(self._signatures),
+                "hits": self.hits, "misses": self.misses}
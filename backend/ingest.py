@@ -0,0 +1,346 @@
+"""Ingest engine for uploads and the batch CLI: CSV, Parquet, xlsx and LAS.
+
+``read_csv(path)`` parses with pyarrow's multithreaded CSV reader when
+pyarrow is installed (``DQ_CSV_ENGINE=auto``, the default, or ``pyarrow``)
+and with pandas' C engine otherwise (``DQ_CSV_ENGINE=c``):
+
+* the file is cut into ``DQ_CSV_BLOCK_MB`` blocks (default 16) that are
+  tokenized and converted on pyarrow's thread pool
+* text stays in Arrow memory (``string[pyarrow]``) instead of one Python
+  object per cell; ``optimize_dtypes`` then makes repeating text categorical
+* ISO-8601 date columns are parsed natively into ``datetime64[ns]``
+* ``usecols`` - only these columns are converted (file order is kept)
+* ``dtypes`` - column kinds (``int64``, ``float64``, ``bool``, ``string``,
+  ``category``, ``timestamp``) used instead of inference
+
+Missing-value spellings are pandas' (``""``, ``NA``, ``NaN``, ``null``, ...) on
+both engines. Files pyarrow rejects (ragged rows, duplicate or blank header
+names, which pandas renames) are parsed by the C engine, so errors and
+column names stay what they were.
+
+``SCHEMAS`` remembers the column kinds of every header signature after
+``optimize_dtypes`` (``DQ_SCHEMA_FILE``, default ``data/schemas.json``).
+Kinds seen for the same column in different files are widened (``int64``
+and ``float64`` to ``float64``, anything else to ``string``), never replaced
+by the latest file. Only the timestamp columns are handed back as hints
+(``parse_dates``): numbers and text are always inferred from the file
+itself, so a hint cannot turn one file's integers into floats or its text
+into numbers. If a hinted column no longer parses as dates, the file is
+parsed again with inference.
+
+``detect_format`` tells the formats apart by their leading bytes (``PAR1``,
+a zip container, a ``~V`` section), falling back to the file extension, and
+``read_table`` dispatches to the reader:
+
+* Parquet - ``pyarrow.parquet`` with memory mapping; numeric columns without
+  nulls are handed to pandas without a copy and text stays Arrow-backed
+* xlsx - the first sheet through pandas' openpyxl reader, which opens the
+  workbook in read-only (streaming) mode; needs ``openpyxl``
+* LAS 1.2/2.0 well logs - one float column per ``~C`` curve, the ``~W``
+  NULL value as NaN and the WELL name as ``well_id``
+
+Every reader produces the same frame types as the CSV path (NumPy numbers,
+``datetime64[ns]``, Arrow-backed or categorical text), so ``optimize_dtypes``
+and everything after it treat the formats alike.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import csv
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from backend.header_matching import HeaderIndex
+from backend.memory import has_pyarrow
+from backend.services.storage import DATA_DIR
+
+log = logging.getLogger("drilling-dq")
+
+ENGINE = os.environ.get("DQ_CSV_ENGINE", "auto").strip().lower()
+BLOCK_MB = int(os.environ.get("DQ_CSV_BLOCK_MB", "16"))
+SCHEMA_FILE = Path(os.environ.get("DQ_SCHEMA_FILE", str(DATA_DIR / "schemas.json")))
+
+# pandas' default missing-value strings
+NA_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+             "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+KINDS = ("int64", "float64", "bool", "string", "category", "timestamp")
+FORMATS = ("csv", "parquet", "xlsx", "las")
+EXTENSIONS = {".csv": "csv", ".txt": "csv", ".parquet": "parquet", ".pq": "parquet",
+              ".xlsx": "xlsx", ".xlsm": "xlsx", ".las": "las"}
+LAS_NULL = -999.25
+
+PathLike = Union[str, Path]
+
+
+def read_header(path: PathLike) -> List[str]:
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        return next(csv.reader(fh), [])
+
+
+def column_kind(s: pd.Series) -> Optional[str]:
+    """Kind of a parsed column for a dtype map; None when there is nothing to go by."""
+    dtype = s.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "category"
+    if pd.api.types.is_bool_dtype(dtype):
+        return "bool"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "int64"
+    if pd.api.types.is_float_dtype(dtype):
+        return "float64"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "timestamp"
+    if (dtype == object or isinstance(dtype, pd.StringDtype)) and s.notna().any():
+        return "string"
+    return None
+
+
+def _arrow_frame(table: Any) -> pd.DataFrame:
+    """Arrow table -> pandas: strings stay Arrow-backed, timestamps in ns."""
+    import pyarrow as pa
+    strings = pd.StringDtype("pyarrow")
+    return table.to_pandas(types_mapper={pa.string(): strings, pa.large_string(): strings}.get,
+                           coerce_temporal_nanoseconds=True, split_blocks=True)
+
+
+def _check_columns(usecols: Optional[Sequence[str]], available: Sequence[str]) -> Optional[List[str]]:
+    """``usecols`` in file order; ValueError for names the file does not have."""
+    if not usecols:
+        return None
+    wanted = set(usecols)
+    missing = wanted.difference(available)
+    if missing:
+        raise ValueError(f"Columns not in file: {', '.join(sorted(missing))}")
+    return [c for c in available if c in wanted]
+
+
+def _read_arrow(path: PathLike, usecols: Optional[List[str]], dtypes: Dict[str, str]) -> pd.DataFrame:
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    arrow_types = {"int64": pa.int64(), "float64": pa.float64(), "bool": pa.bool_(), "string": pa.string(),
+                   "category": pa.dictionary(pa.int32(), pa.string()), "timestamp": pa.timestamp("ns")}
+    table = pcsv.read_csv(
+        str(path),
+        read_options=pcsv.ReadOptions(use_threads=True, block_size=BLOCK_MB << 20),
+        convert_options=pcsv.ConvertOptions(
+            include_columns=usecols or [],
+            column_types={c: arrow_types[k] for c, k in dtypes.items()},
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+    return _arrow_frame(table)
+
+
+def _read_c(path: PathLike, usecols: Optional[List[str]], dtypes: Dict[str, str]) -> pd.DataFrame:
+    text = "string[pyarrow]" if has_pyarrow() else object
+    names = {"int64": "int64", "float64": "float64", "bool": "bool", "string": text, "category": "category"}
+    dtype = {c: names[k] for c, k in dtypes.items() if k in names}
+    dates = [c for c, k in dtypes.items() if k == "timestamp"]
+    return pd.read_csv(path, usecols=usecols, dtype=dtype or None, parse_dates=dates or None)
+
+
+def csv_engine(engine: Optional[str] = None) -> str:
+    """The CSV reader ``engine`` (default ``DQ_CSV_ENGINE``) resolves to: ``pyarrow`` or ``c``."""
+    engine = (engine or ENGINE).lower()
+    return "pyarrow" if engine == "pyarrow" or (engine == "auto" and has_pyarrow()) else "c"
+
+
+def read_csv(path: PathLike, usecols: Optional[Sequence[str]] = None, dtypes: Optional[Dict[str, str]] = None,
+             engine: Optional[str] = None) -> pd.DataFrame:
+    """Parse the CSV at ``path``; see the module docstring for the engines and options."""
+    header = read_header(path)
+    cols = _check_columns(usecols, header)
+    known = set(cols or header)
+    dtypes = {c: k for c, k in (dtypes or {}).items() if c in known and k in KINDS}
+
+    use_arrow = csv_engine(engine) == "pyarrow"
+    if use_arrow and (len(set(header)) != len(header) or "" in header):
+        use_arrow = False  # pandas renames these (a.1, Unnamed: 0)
+    readers = [_read_arrow, _read_c] if use_arrow else [_read_c]
+    for reader in readers:
+        if dtypes:
+            try:
+                return reader(path, cols, dtypes)
+            except Exception as e:
+                log.info("Stored dtypes do not fit %s (%s); inferring", Path(path).name, e)
+        try:
+            return reader(path, cols, {})
+        except Exception as e:
+            if reader is readers[-1]:
+                raise
+            log.info("pyarrow could not parse %s (%s); using the C engine", Path(path).name, e)
+    raise AssertionError("unreachable")
+
+
+def read_parquet(path: PathLike, usecols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+    cols = _check_columns(usecols, pq.read_schema(str(path)).names)
+    df = _arrow_frame(pq.read_table(str(path), columns=cols, memory_map=True))
+    if not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1):
+        # an index saved by pandas: keep it as columns when it has a name
+        df = df.reset_index(drop=all(n is None for n in df.index.names))
+    return df
+
+
+def read_xlsx(path: PathLike, usecols: Optional[Sequence[str]] = None, sheet: Union[int, str] = 0) -> pd.DataFrame:
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        raise ValueError("xlsx files need openpyxl (pip install openpyxl)")
+    df = pd.read_excel(path, sheet_name=sheet, engine="openpyxl")
+    cols = _check_columns(usecols, [str(c) for c in df.columns])
+    return df[cols] if cols else df
+
+
+_LAS_ITEM = re.compile(r"^([^.]+?)\s*\.(\S*)\s*(.*)$")
+
+
+def _las_item(line: str) -> Optional[Tuple[str, str, str]]:
+    """``"DEPT.M   1500.0 : Depth"`` -> ``("DEPT", "M", "1500.0")``."""
+    body = line.rpartition(":")[0] if ":" in line else line
+    m = _LAS_ITEM.match(body.strip())
+    return (m.group(1).strip(), m.group(2), m.group(3).strip()) if m else None
+
+
+def read_las(path: PathLike, usecols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """LAS 1.2/2.0 well log; wrapped and unwrapped data both parse (values are
+    read as one stream and reshaped by the curve count)."""
+    sections: Dict[str, List[str]] = {}
+    section = ""
+    data = ""
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            s = line.strip()
+            if not s or s.startswith("#"):
+                continue
+            if s.startswith("~"):
+                section = s[1:2].upper()
+                if section == "A":
+                    data = fh.read()
+                    break
+                continue
+            sections.setdefault(section, []).append(s)
+    curves: List[str] = []
+    for line in sections.get("C", []):
+        item = _las_item(line)
+        if item is not None:
+            name = item[0]
+            n = sum(1 for c in curves if c == name or c.startswith(f"{name}:"))
+            curves.append(name if not n else f"{name}:{n}")
+    if not curves:
+        raise ValueError("LAS file has no ~C (curve) section")
+    well = {item[0].upper(): item[2] for item in map(_las_item, sections.get("W", [])) if item}
+    try:
+        null = float(well.get("NULL", LAS_NULL))
+    except ValueError:
+        null = LAS_NULL
+    tokens = [t for line in data.splitlines() if not line.lstrip().startswith("#") for t in line.split()]
+    try:
+        values = np.array(tokens, dtype=np.float64)
+    except ValueError as e:
+        raise ValueError(f"LAS data section is not numeric ({e})")
+    if values.size % len(curves):
+        raise ValueError(f"LAS data do not divide into {len(curves)} curves")
+    values[values == null] = np.nan
+    df = pd.DataFrame(values.reshape(-1, len(curves)), columns=curves)
+    cols = _check_columns(usecols, curves)
+    if cols:
+        df = df[cols]
+    if well.get("WELL") and "well_id" not in df.columns:
+        df.insert(0, "well_id", well["WELL"])
+    return df
+
+
+def detect_format(path: PathLike, filename: Optional[str] = None) -> str:
+    """One of ``FORMATS`` from the leading bytes, else from the extension of ``filename`` or ``path``."""
+    with open(path, "rb") as fh:
+        head = fh.read(4096)
+    if head.startswith(b"PAR1"):
+        return "parquet"
+    if head.startswith(b"PK\x03\x04"):  # zip container: xlsx/xlsm
+        return "xlsx"
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        raise ValueError("Legacy .xls workbooks are not supported; save the file as .xlsx")
+    for line in head.decode("utf-8", "ignore").lstrip("\ufeff").splitlines():
+        s = line.strip()
+        if s and not s.startswith("#"):
+            if s.upper().startswith("~V"):
+                return "las"
+            break
+    return EXTENSIONS.get(Path(filename or path).suffix.lower(), "csv")
+
+
+def read_table(path: PathLike, fmt: str = "csv", usecols: Optional[Sequence[str]] = None,
+               dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Read ``path`` in format ``fmt``; ``dtypes`` is for CSV (the other formats carry their types)."""
+    if fmt == "csv":
+        return read_csv(path, usecols=usecols, dtypes=dtypes)
+    readers = {"parquet": read_parquet, "xlsx": read_xlsx, "las": read_las}
+    if fmt not in readers:
+        raise ValueError(f"Unsupported format: {fmt}")
+    return readers[fmt](path, usecols=usecols)
+
+
+def widen_kind(a: str, b: str) -> str:
+    """Narrowest kind holding both ``a`` and ``b`` (``string`` holds anything)."""
+    if a == b:
+        return a
+    return "float64" if {a, b} == {"int64", "float64"} else "string"
+
+
+class SchemaStore:
+    """Column kinds per header signature, kept in a JSON file."""
+
+    def __init__(self, path: Path = SCHEMA_FILE) -> None:
+        self.path = path
+        self._schemas: Optional[Dict[str, Dict[str, str]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        if self._schemas is None:
+            try:
+                self._schemas = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._schemas = {}
+            except Exception as e:
+                log.warning("Ignoring unreadable schema file %s: %s", self.path, e)
+                self._schemas = {}
+        return self._schemas
+
+    def get(self, headers: Sequence[Any]) -> Dict[str, str]:
+        """Parse hints for ``headers``: the columns every file so far had as timestamps."""
+        with self._lock:
+            kinds = self._load().get(HeaderIndex.signature(headers), {})
+        return {c: k for c, k in kinds.items() if k == "timestamp"}
+
+    def remember(self, headers: Sequence[Any], df: pd.DataFrame) -> None:
+        kinds = {str(c): k for c in df.columns if (k := column_kind(df[c])) is not None}
+        sig = HeaderIndex.signature(headers)
+        with self._lock:
+            schemas = self._load()
+            merged = dict(schemas.get(sig, {}))
+            for c, k in kinds.items():
+                merged[c] = widen_kind(merged[c], k) if c in merged else k
+            if schemas.get(sig) == merged:
+                return
+            schemas[sig] = merged
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump(schemas, fh, indent=1, sort_keys=True)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                log.warning("Could not save schema file %s: %s", self.path, e)
+
+
+SCHEMAS = SchemaStore()
+
@@ -1,50 +1,56 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pathlib import Path
 import pandas as pd
 from typing import Optional
 
 # Removed duplicate import - using the local .auth import below
 
-from backend.profiling import profile_dataframe
-from backend.cleaning import deduplicate, standardize, impute_simple, kpis
-from backend.services.storage import STORE
+from backend.cleaning import deduplicate, standardize, impute_simple, kpis, normalize_values, near_deduplicate
+from backend.near_duplicates import parse_tolerances
+from backend.services.storage import STORE, DATA_DIR, snapshot
+from backend.services.lineage import LINEAGE, StepError
+from backend.services.jobs import JOBS, JobCancelled, FileResult, FINISHED, DONE
+from backend.services.metrics import METRICS, span, record_request, start_profiler
+from backend.services.scheduler import SCHEDULER, SchedulerBusy
+from backend.services.result_cache import RESULTS, cache_key
 from backend.auth import (
-    COOKIE_NAME, COOKIE_MAX_AGE, verify_credentials,
-    create_cookie_value, current_user_email
+    COOKIE_NAME, COOKIE_MAX_AGE, verify_credentials_async,
+    create_cookie_value, current_user_email, forget_cookie_value
 )
-from backend.cleaning_api import _get_df as get_df_cleaning, _duplicates_count,\
-    _missing_by_column, _completeness_pct, ApplyRequest,\
+from backend.cleaning_api import _get_df as get_df_cleaning, ApplyRequest,\
     _put_df, df_records_safe, dict_numbers_safe
 
 from backend.anomalies_api import (
-    _get_df as get_df_anomalies, _iqr_per_col, _dup_count, _missing_col, SKLEARN,
-    _safe_numeric,          # <-- add this
+    _get_df as get_df_anomalies, summarize_anomalies,
 )
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Response, Depends, Body, Request as FastAPIRequest, Query
 import numpy as np
-from typing import List, Dict, Any
-from sklearn.ensemble import IsolationForest
+from typing import Callable, List, Dict, Any
+from backend.anomaly_engine import IForestConfig
+from backend.detectors import DETECTORS, DetectionContext, DetectionResult, combined_rank, parse_methods
+from backend.rolling import cached_rolling_features, summarize_features
+from backend.drift import compare_datasets
+from backend.memory import optimize_dtypes
+from backend.ingest import SCHEMAS, csv_engine, detect_format, read_header, read_table
+from backend.standardization import RULES as STANDARD_RULES
+from backend.column_stats import column_stats
+from backend import out_of_core
 
 import sys
 import os
+import logging
 import webbrowser
 import threading
 import time
 
-# Handle paths for both development and bundled executable
-if getattr(sys, "frozen", False):
-    # Running from bundled executable - use _MEIPASS for bundled files
-    BUNDLE_ROOT = Path(getattr(sys, "_MEIPASS", Path(sys.executable).parent))
-    ROOT = Path(sys.executable).resolve().parent  # where the exe lives
-else:
-    # Running from source
-    BUNDLE_ROOT = ROOT = Path(__file__).resolve().parents[1]
+log = logging.getLogger("drilling-dq")
 
-FRONTEND_DIR = BUNDLE_ROOT / "frontend"
+from backend.paths import ROOT
+from backend.services.assets import ASSETS, PAGE_CACHE
 
 app = FastAPI(title="Drilling DQ Demo v2", version="0.2.0")
 
@@ -56,7 +62,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/static", StaticFiles(directory=str(FRONTEND_DIR)), name="static")
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+def static_asset(path: str, request: FastAPIRequest):
+    """Frontend files, precompressed once and served with ETag/Cache-Control."""
+    resp = ASSETS.response(request, path)
+    if resp is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return resp
+
+def _page(request: FastAPIRequest, name: str, missing: str):
+    """HTML page from the asset layer (revalidated by ETag on every load)."""
+    resp = ASSETS.response(request, name, PAGE_CACHE)
+    if resp is None:
+        raise HTTPException(status_code=404, detail=missing)
+    return resp
+
+@app.middleware("http")
+async def instrument_requests(request: FastAPIRequest, call_next):
+    """Record per-endpoint latency; with DQ_PROFILER=1, ``X-Profile: 1`` returns a pyinstrument report."""
+    profiler = start_profiler() if request.headers.get("x-profile") == "1" else None
+    METRICS.add("dq_http_requests_in_flight", 1, "Requests currently being handled")
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        METRICS.add("dq_http_requests_in_flight", -1)
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        record_request(request.method, path, status, time.perf_counter() - t0)
+    if profiler is not None:
+        return HTMLResponse(profiler.output_html())
+    return response
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(content=METRICS.render(), media_type="text/plain; version=0.0.4")
 
 # --- Auth helpers ---
 def require_auth(request: FastAPIRequest):
@@ -65,29 +110,59 @@ def require_auth(request: FastAPIRequest):
         # For browser endpoints, redirect to /login. For APIs, you could raise 401.
         raise HTTPException(status_code=401, detail="Not authenticated")
     return email
+
+def _user_key(request: FastAPIRequest) -> str:
+    """Who a heavy request is charged to: the session user, else the client address."""
+    email = current_user_email(request)
+    if email:
+        return email
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def _content_key(params: Dict[str, Any]) -> Optional[str]:
+    """Content key of the dataset version named by ``params["dataset_id"]`` (latest if omitted)."""
+    try:
+        return STORE.get_entry(STORE.resolve(params.get("dataset_id"))).content_key
+    except KeyError:
+        return None
+
+def _scheduled(request: Optional[FastAPIRequest], kind: str, params: Dict[str, Any],
+               fn: Callable[[int], Any], threads: Optional[int] = None, persist: bool = False):
+    """Run ``fn(n_jobs)`` under the scheduler (per-user cap, CPU budget, coalescing).
+
+    ``request=None`` is used by background jobs, which are not charged to a user.
+    With ``persist`` the result is kept in the on-disk result cache under the
+    dataset's content key and served from there without being scheduled.
+    """
+    user = _user_key(request) if request is not None else None
+    content = _content_key(params) if persist else None
+    job = fn
+    if content is not None:
+        args = {k: v for k, v in params.items() if k != "dataset_id"}
+        hit = RESULTS.get(kind, content, args)
+        if hit is not None:
+            return hit
+
+        def _job(n_jobs: int):
+            value = fn(n_jobs)
+            if _content_key(params) == content:  # not cleaned while computing
+                RESULTS.put(value, kind, content, args)
+            return value
+        job = _job
+    try:
+        return SCHEDULER.run(_job_cache_key(kind, params), user, job, threads=threads)
+    except SchedulerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 # --- Pages ---
 
-@app.get("/login", response_class=HTMLResponse)
-async def login_page():
-    page = FRONTEND_DIR / "login.html"
-    if not page.exists():
-        raise HTTPException(status_code=404, detail="Missing login.html in frontend/")
-    return HTMLResponse(page.read_text(encoding="utf-8"))
-
-@app.head("/login")
-async def login_page_head():
-    """HEAD handler for login page - returns same headers as GET but no body"""
-    page = FRONTEND_DIR / "login.html"
-    if not page.exists():
-        raise HTTPException(status_code=404, detail="Missing login.html in frontend/")
-    content = page.read_text(encoding="utf-8")
-    return HTMLResponse(content="", headers={"Content-Length": str(len(content.encode('utf-8')))})
+@app.api_route("/login", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def login_page(request: FastAPIRequest):
+    return _page(request, "login.html", "Missing login.html in frontend/")
 
 @app.post("/api/login")
 async def api_login(payload: dict):
     email = (payload.get("email") or "").strip()
     password = payload.get("password") or ""
-    if not verify_credentials(email, password):
+    if not await verify_credentials_async(email, password):
         return JSONResponse({"ok": False, "message": "Invalid email or password"}, status_code=401)
 
 
@@ -105,82 +180,145 @@ async def api_login(payload: dict):
     return resp
 
 @app.post("/api/logout")
-async def api_logout():
+async def api_logout(request: FastAPIRequest):
+    forget_cookie_value(request.cookies.get(COOKIE_NAME))
     resp = JSONResponse({"ok": True})
     resp.delete_cookie(COOKIE_NAME, path="/")
     return resp
 
-@app.get("/", response_class=HTMLResponse)
-async def landing_page():
+@app.api_route("/", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def landing_page(request: FastAPIRequest):
     # Public landing page - no auth required
-    landing_path = FRONTEND_DIR / "landing.html"
-    if not landing_path.exists():
-        raise HTTPException(status_code=404, detail="landing.html not found in frontend/")
-    return HTMLResponse(landing_path.read_text(encoding="utf-8"))
-
-@app.head("/")
-async def landing_page_head():
-    """HEAD handler for landing page - returns same headers as GET but no body"""
-    landing_path = FRONTEND_DIR / "landing.html"
-    if not landing_path.exists():
-        raise HTTPException(status_code=404, detail="landing.html not found in frontend/")
-    content = landing_path.read_text(encoding="utf-8")
-    return HTMLResponse(content="", headers={"Content-Length": str(len(content.encode('utf-8')))})
+    return _page(request, "landing.html", "landing.html not found in frontend/")
 
 @app.get("/upload", response_class=HTMLResponse)
 async def upload_page(request: FastAPIRequest):
     # Require auth before showing upload page
     _ = require_auth(request)
-    index_path = FRONTEND_DIR / "index.html"
-    if not index_path.exists():
-        raise HTTPException(status_code=404, detail="index.html not found in frontend/")
-    return HTMLResponse(index_path.read_text(encoding="utf-8"))
+    return _page(request, "index.html", "index.html not found in frontend/")
 
 @app.get("/app", response_class=HTMLResponse)
 @app.get("/dashboard", response_class=HTMLResponse)
 async def index(request: FastAPIRequest):
     # Require auth before showing app (redirect to upload)
     _ = require_auth(request)
-    index_path = FRONTEND_DIR / "index.html"
-    if not index_path.exists():
-        raise HTTPException(status_code=404, detail="index.html not found in frontend/")
-    return HTMLResponse(index_path.read_text(encoding="utf-8"))
+    return _page(request, "index.html", "index.html not found in frontend/")
 
 @app.get("/general", response_class=HTMLResponse)
 async def general_page(request: FastAPIRequest):
     # Require auth before showing app
     _ = require_auth(request)
-    general_path = FRONTEND_DIR / "general.html"
-    if not general_path.exists():
-        raise HTTPException(status_code=404, detail="general.html not found in frontend/")
-    return HTMLResponse(general_path.read_text(encoding="utf-8"))
-
-@app.get("/favicon.ico")
-def favicon():
-    ico = FRONTEND_DIR / "favicon.ico"
-    if ico.exists():
-        return FileResponse(str(ico), media_type="image/x-icon")
-    raise HTTPException(status_code=404, detail="favicon not found")
-
-@app.head("/favicon.ico")
-def favicon_head():
-    """HEAD handler for favicon - returns same headers as GET but no body"""
-    ico = FRONTEND_DIR / "favicon.ico"
-    if ico.exists():
-        return Response(headers={
-            "Content-Type": "image/x-icon",
-            "Content-Length": str(ico.stat().st_size)
-        })
-    raise HTTPException(status_code=404, detail="favicon not found")
+    return _page(request, "general.html", "general.html not found in frontend/")
+
+@app.api_route("/favicon.ico", methods=["GET", "HEAD"])
+def favicon(request: FastAPIRequest):
+    resp = ASSETS.response(request, "favicon.ico")
+    if resp is None:
+        raise HTTPException(status_code=404, detail="favicon not found")
+    return resp
 
 @app.post("/api/upload")
-async def upload(file: UploadFile = File(...)):
+async def upload(file: UploadFile = File(...), columns: Optional[str] = Form(None)):
+    """Register a CSV, Parquet, xlsx or LAS file, hashing its bytes while they are written to disk.
+
+    Bytes already uploaded get a copy-on-write copy of that dataset without
+    parsing (their own id, so in-place cleaning by one uploader never changes
+    another's data); otherwise the parsed frame comes from the result cache
+    when this file was seen before. ``columns`` (comma-separated) loads only
+    those columns.
+    """
+    import hashlib
+    import uuid
+    tmp = DATA_DIR / f".upload-{uuid.uuid4().hex}"
+    digest = hashlib.sha256()
+    size = 0
+    with span("receive") as sp, open(tmp, "wb") as fh:
+        while block := await file.read(1 << 20):
+            digest.update(block)
+            fh.write(block)
+            size += len(block)
+        sp.bytes = size
+    content_hash = digest.hexdigest()
+    usecols = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    if usecols:  # a projection is a different dataset than the whole file
+        content_hash = hashlib.sha256(f"{content_hash}:{','.join(usecols)}".encode()).hexdigest()
+
+    # parsing, dtype optimization and the statistics pass are CPU-bound: keep them off the event loop
+    return await run_in_threadpool(_register_upload, tmp, file.filename, content_hash, usecols)
+
+def _register_upload(tmp: Path, filename: Optional[str], content_hash: str,
+                     usecols: Optional[List[str]]) -> Dict[str, Any]:
+    """Parse (or reuse) the received file at ``tmp`` and add it to the catalog."""
     try:
-        df = pd.read_csv(file.file)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"CSV parse error: {e}")
-    ds_id = STORE.add(df, save_name=file.filename)
-    return {"dataset_id": ds_id, "columns": list(df.columns), "rows": len(df)}
+        existing = STORE.find_by_hash(content_hash)
+        if existing is not None:
+            ds_id = STORE.clone(existing)
+            df = STORE.get_raw(ds_id)
+            return {"dataset_id": ds_id, "columns": list(df.columns), "rows": len(df), "memory": None,
+                    "format": STORE.get_entry(ds_id).format, "content_hash": content_hash, "reused": True}
+
+        try:
+            fmt = detect_format(tmp, filename)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        header = read_header(tmp) if fmt == "csv" else None
+        hints = SCHEMAS.get(header) if header else None
+        # the parse depends on the schema hints and the CSV engine as well as the bytes
+        parsed_key = ("parsed", content_hash, hints, csv_engine() if fmt == "csv" else None)
+        cached = RESULTS.get(*parsed_key)
+        if cached is not None:
+            df, memory = cached
+        else:
+            try:
+                with span("parse") as sp:
+                    df = read_table(tmp, fmt, usecols=usecols, dtypes=hints)
+                    sp.rows = len(df)
+                    sp.bytes = int(df.memory_usage(index=True).sum())
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"{fmt.upper()} parse error: {e}")
+            with span("optimize_dtypes", rows=len(df)) as sp:
+                df, memory = optimize_dtypes(df)
+                sp.bytes = memory["bytes_after"]
+            if header:
+                SCHEMAS.remember(header, df)
+            RESULTS.put((df, memory), *parsed_key)
+        ds_id = STORE.add(df, save_name=filename, content_hash=content_hash, source=tmp, fmt=fmt)
+    finally:
+        tmp.unlink(missing_ok=True)  # already moved into the catalog on success
+    with span("column_stats", rows=len(df)):
+        column_stats(ds_id)
+    return {"dataset_id": ds_id, "columns": list(df.columns), "rows": len(df), "memory": memory,
+            "format": fmt, "content_hash": content_hash, "reused": False}
+
+ARCHIVE_DIR = DATA_DIR / "archives"
+
+@app.post("/api/archives")
+async def upload_archive(file: UploadFile = File(...)):
+    """Store a CSV on disk without parsing it, for the out-of-core ``ooc_*`` jobs."""
+    import uuid
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    file_id = f"{uuid.uuid4().hex}_{Path(file.filename or 'archive.csv').name}"
+    size = 0
+    with span("archive_write") as sp, open(ARCHIVE_DIR / file_id, "wb") as fh:
+        while block := await file.read(1 << 20):
+            fh.write(block)
+            size += len(block)
+        sp.bytes = size
+    return {"file_id": file_id, "bytes": size}
+
+def _archive_path(params: Dict[str, Any]) -> Path:
+    """On-disk CSV for an out-of-core job: an archive ``file_id`` or a dataset's raw upload."""
+    if params.get("file_id"):
+        path = (ARCHIVE_DIR / str(params["file_id"])).resolve()
+        if path.parent != ARCHIVE_DIR.resolve() or not path.is_file():
+            raise KeyError(params["file_id"])
+        return path
+    entry = STORE.get_entry(STORE.resolve(params.get("dataset_id")))
+    if entry.path_raw is None or not Path(entry.path_raw).is_file():
+        raise KeyError(params.get("dataset_id"))
+    if entry.format != "csv":
+        raise ValueError(f"Out-of-core jobs read CSV; dataset {entry.id} was uploaded as {entry.format}")
+    return Path(entry.path_raw)
 
 @app.get("/api/sample")
 def sample():
@@ -199,59 +337,185 @@ def sample_head():
         })
     raise HTTPException(status_code=404, detail="Sample file not found")
 
+def _rolling_profile(dataset_id: str, window: int) -> Dict[str, Any]:
+    with span("rolling", rows=len(STORE.get_clean(dataset_id))):
+        feats = cached_rolling_features(dataset_id, window=window)
+    return {"window": window, "features": summarize_features(feats)}
+
 @app.get("/api/profile")
-def api_profile(dataset_id: str):
+def api_profile(request: FastAPIRequest, dataset_id: str, rolling_window: Optional[int] = Query(default=None, ge=1)):
+    """Column profile; ``rolling_window`` adds per-well rolling feature stats."""
     try:
         df = STORE.get_clean(dataset_id)
-        print(f"Dataset shape: {df.shape}")
-        print(f"Dataset columns: {list(df.columns)}")
-        print(f"Dataset dtypes: {df.dtypes.to_dict()}")
     except KeyError:
         raise HTTPException(status_code=404, detail="Dataset not found (server reload clears memory). Please re-upload.")
-    
-    try:
-        prof = profile_dataframe(df)
-        print(f"Profile result length: {len(prof)}")
-        result = {"dataset_id": dataset_id, "profile": prof}
-        print(f"Final result keys: {list(result.keys())}")
-        return result
-    except Exception as e:
-        import traceback
-        print(f"Error in profiling: {e}")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=f"Profiling error: {str(e)}")
+
+    def compute(n_jobs: int):
+        try:
+            with span("profile", rows=len(df)):
+                prof = column_stats(dataset_id, workers=n_jobs).profile()
+            out = {"dataset_id": dataset_id, "profile": prof}
+            if rolling_window:
+                out["rolling"] = _rolling_profile(dataset_id, rolling_window)
+            return out
+        except Exception as e:
+            log.exception("Profiling failed for dataset %s", dataset_id)
+            raise HTTPException(status_code=500, detail=f"Profiling error: {str(e)}")
+
+    return _scheduled(request, "profile", {"dataset_id": dataset_id, "rolling_window": rolling_window},
+                      compute)
 
 @app.post("/api/dedup")
 async def api_dedup(dataset_id: str = Form(...), subset: Optional[str] = Form(None)):
+    cols = subset.split(",") if subset else None
     try:
-        df = STORE.get_clean(dataset_id)
+        return LINEAGE.apply(dataset_id, "dedup", {"subset": cols})
+    except StepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+
+def _near_dup_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword arguments for ``near_deduplicate`` from request parameters."""
+    allowed = ("tolerances", "rtol", "time_col", "time_tolerance", "exact", "window")
+    out = {k: params[k] for k in allowed if params.get(k) is not None}
+    if isinstance(out.get("tolerances"), str):
+        out["tolerances"] = parse_tolerances(out["tolerances"])
+    if isinstance(out.get("exact"), str):
+        out["exact"] = out["exact"].split(",")
+    return out
+
+@app.get("/api/near-duplicates")
+def api_near_duplicates(request: FastAPIRequest, dataset_id: Optional[str] = Query(default=None),
+                        tolerances: Optional[str] = None, rtol: Optional[float] = None,
+                        time_col: Optional[str] = None, time_tolerance: Optional[float] = None,
+                        exact: Optional[str] = None, window: Optional[int] = None):
+    """Near-duplicate clusters (``tolerances=depth_m=0.1,pressure_psi=2``) without changing the data."""
+    try:
+        params = _near_dup_params({"tolerances": tolerances, "rtol": rtol, "time_col": time_col,
+                                   "time_tolerance": time_tolerance, "exact": exact, "window": window})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="tolerances must look like column=number,...")
+    df = get_df_cleaning(dataset_id)
+
+    def compute(_threads: int) -> Dict[str, Any]:
+        with span("near_dedup", rows=len(df)):
+            res = near_deduplicate(df, collapse=False, **params)
+        res.pop("df")
+        return res
+
+    return _scheduled(request, "near_duplicates", {"dataset_id": dataset_id, **params}, compute, threads=1,
+                      persist=True)
+
+@app.post("/api/near-dedup")
+async def api_near_dedup(dataset_id: str = Form(...), tolerances: Optional[str] = Form(None),
+                         time_tolerance: Optional[float] = Form(None), exact: Optional[str] = Form(None)):
+    try:
+        params = _near_dup_params({"tolerances": tolerances, "time_tolerance": time_tolerance, "exact": exact})
+        return LINEAGE.apply(dataset_id, "near_dedup", params)
+    except StepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="tolerances must look like column=number,...")
     except KeyError:
         raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
-    cols = subset.split(",") if subset else None
-    result = deduplicate(df, subset=cols)
-    STORE.set_clean(dataset_id, result["df"])
-    return {k:v for k,v in result.items() if k != "df"}
 
 @app.post("/api/standardize")
 async def api_standardize(dataset_id: str = Form(...)):
     try:
-        df = STORE.get_clean(dataset_id)
+        result = LINEAGE.apply(dataset_id, "standardize")
+    except StepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+    return {"applied_aliases": result["applied_aliases"], "applied_units": result["applied_units"],
+            "alias_details": result["alias_details"], "unit_details": result["unit_details"]}
+
+@app.post("/api/normalize-values")
+async def api_normalize_values(dataset_id: str = Form(...), columns: Optional[str] = Form(None)):
+    cols = columns.split(",") if columns else None
+    try:
+        result = LINEAGE.apply(dataset_id, "normalize_values", {"columns": cols})
+    except StepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except KeyError:
         raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
-    result = standardize(df)
-    STORE.set_clean(dataset_id, result["df"])
-    return {"applied_aliases": result["applied_aliases"], "applied_units": result["applied_units"]}
+    return {"normalized_values": jsonable_encoder(result["normalized_values"])}
+
+@app.post("/api/schema/match")
+def api_schema_match(payload: dict = Body(...)):
+    """Match ``{"headers": [...]}`` (or a dataset's columns) to canonical fields with confidences."""
+    headers = payload.get("headers")
+    if headers is None and payload.get("dataset_id"):
+        try:
+            headers = [str(c) for c in STORE.get_raw(STORE.resolve(payload["dataset_id"])).columns]
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+    if not isinstance(headers, list):
+        raise HTTPException(status_code=400, detail="Provide 'headers' (list of column names) or 'dataset_id'")
+    index = STANDARD_RULES.index
+    return {
+        "signature": index.signature(headers),
+        "min_confidence": index.min_confidence,
+        "matches": [{**m.to_dict(), "accepted": index.accept(m)} for m in index.match_headers(headers)],
+    }
 
 @app.post("/api/impute")
 async def api_impute(dataset_id: str = Form(...)):
     try:
-        df = STORE.get_clean(dataset_id)
+        result = LINEAGE.apply(dataset_id, "impute")
+    except StepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except KeyError:
         raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
-    result = impute_simple(df)
-    STORE.set_clean(dataset_id, result["df"])
     return {"imputations": result["imputations"]}
 
+@app.get("/api/history")
+def api_history(dataset_id: str):
+    """Cleaning steps applied to ``dataset_id`` and whether undo/redo is possible."""
+    try:
+        return {"dataset_id": dataset_id, **LINEAGE.history(dataset_id)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+
+@app.post("/api/undo")
+async def api_undo(dataset_id: str = Form(...)):
+    try:
+        node = LINEAGE.undo(dataset_id)
+    except StepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+    return {"undone": node.op if node else None, **LINEAGE.history(dataset_id)}
+
+@app.post("/api/redo")
+async def api_redo(dataset_id: str = Form(...)):
+    try:
+        node = LINEAGE.redo(dataset_id)
+    except StepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+    return {"redone": node.op if node else None, **LINEAGE.history(dataset_id)}
+
+@app.post("/api/replay")
+async def api_replay(dataset_id: str = Form(...), step: int = Form(...), params: str = Form("{}")):
+    """Re-run the history from ``step`` (1-based) with new JSON ``params`` for that step."""
+    import json
+    try:
+        new_params = json.loads(params) if params else {}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid params JSON: {e}")
+    try:
+        LINEAGE.replay(dataset_id, step, new_params)
+    except StepError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+    except IndexError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"dataset_id": dataset_id, **LINEAGE.history(dataset_id)}
+
 @app.get("/api/kpis")
 def api_kpis(dataset_id: str):
     try:
@@ -279,22 +543,34 @@ def api_export(dataset_id: str):
     df.to_csv(out, index=False)
     return FileResponse(str(out), media_type="text/csv", filename=out.name)
 
+@app.get("/api/datasets/{dataset_id}/lineage")
+def api_lineage(dataset_id: str):
+    """Versions from the raw upload down to ``dataset_id``."""
+    try:
+        return {"dataset_id": dataset_id, "lineage": STORE.lineage(dataset_id)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found. Re-upload and retry.")
+
+@app.get("/api/compare")
+def api_compare(dataset_ids: str = Query(..., description="Comma-separated ids; the first is the reference")):
+    """Schema differences, per-column drift (PSI, KS) and row overlap against the first dataset."""
+    ids = [d.strip() for d in dataset_ids.split(",") if d.strip()]
+    if len(ids) < 2:
+        raise HTTPException(status_code=400, detail="Provide at least two dataset ids")
+    missing = [d for d in ids if d not in STORE.datasets]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Dataset not found: {', '.join(missing)}")
+    with span("compare"):
+        return compare_datasets(ids)
+
 @app.get("/api/general")
 def api_general(dataset_id: str | None = None):
     """Return comprehensive general data from the uploaded CSV file."""
     import math
-    print(f"General API called with dataset_id: {dataset_id}")
-    print(f"Available datasets: {list(STORE.datasets.keys())}")
-    
     try:
-        if dataset_id:
-            df = STORE.get_clean(dataset_id)
-            print(f"Retrieved dataset with ID: {dataset_id}, shape: {df.shape}")
-        else:
-            df = STORE.get_latest()
-            print(f"Retrieved latest dataset, shape: {df.shape}")
+        stats = column_stats(STORE.resolve(dataset_id))
     except Exception as e:
-        print(f"Error retrieving dataset: {e}")
+        log.debug("General: no dataset for %r (%s)", dataset_id, e)
         # fall back empty KPIs
         return {
             "rows": 0,
@@ -311,65 +587,28 @@ def api_general(dataset_id: str | None = None):
             }
         }
     
-    # Basic KPIs
-    rows = len(df)
-    cells = int(df.size) if rows else 0
-    nulls = int(df.isna().sum().sum()) if rows else 0
-    completeness = (1.0 - (nulls / cells)) * 100.0 if cells else 0.0
-    unique_rows = len(df.drop_duplicates()) if rows else 0
-    duplicate_rows = rows - unique_rows if rows else 0
-    uniqueness = (unique_rows / rows) * 100.0 if rows else 0.0
+    # Basic KPIs (from the cached column-statistics table, O(columns))
+    rows = stats.rows
+    cells = stats.cells
+    completeness = stats.completeness_pct()
+    duplicate_rows = stats.duplicate_rows
+    uniqueness = (stats.unique_rows / rows) * 100.0 if rows else 0.0
     dq_score = 0.6 * completeness + 0.4 * uniqueness
-    miss_by_col = (df.isna().sum() / max(rows,1)).to_dict()
-    
-    print(f"Unique rows: {unique_rows}")
-    print(f"total rows: {len(df)}")
+    miss_by_col = stats.missing_by_column()
+
     # Column types analysis
-    column_types = {}
-    data_types_distribution = {}
-    
-    for col in df.columns:
-        dtype = str(df[col].dtype)
-        
-        # Categorize data types
-        if 'int' in dtype:
-            col_type = 'Integer'
-            data_type = 'Integer'
-        elif 'float' in dtype:
-            col_type = 'Numeric'
-            data_type = 'Numeric'
-        elif 'datetime' in dtype or 'date' in dtype:
-            col_type = 'Date'
-            data_type = 'Date'
-        elif 'bool' in dtype:
-            col_type = 'Boolean'
-            data_type = 'Boolean'
-        else:
-            col_type = 'Text'
-            data_type = 'Text'
-        
-        column_types[col] = col_type
-        
-        # Count data types
-        if data_type in data_types_distribution:
-            data_types_distribution[data_type] += 1
-        else:
-            data_types_distribution[data_type] = 1
-    
+    column_types = {c.name: c.type_class for c in stats.columns}
+    data_types_distribution: Dict[str, int] = {}
+    for col_type in column_types.values():
+        data_types_distribution[col_type] = data_types_distribution.get(col_type, 0) + 1
+
     # Missing data statistics
-    missing_values = df.isna().sum()
-    total_missing = int(missing_values.sum())
-    columns_with_missing = int((missing_values > 0).sum())
+    total_missing = stats.total_nulls
+    columns_with_missing = sum(1 for c in stats.columns if c.nulls > 0)
     missing_percentage = (total_missing / cells * 100) if cells > 0 else 0.0
 
-    # Uniqueness statistics by row (not by column)
-    uniqueness_by_row = {}
-    if rows > 0:
-        # Check if each row is unique (not duplicated)
-        is_duplicate = df.duplicated()
-        print(f"Is duplicate: {is_duplicate}")
-        for idx in range(min(rows, 1000)):  # Limit to first 1000 rows for performance
-            uniqueness_by_row[str(idx)] = 0 if is_duplicate.iloc[idx] else 1
+    # Uniqueness statistics by row (not by column), first 1000 rows
+    uniqueness_by_row = {str(i): int(not dup) for i, dup in enumerate(stats.duplicated(1000).tolist())}
 
     return {
         "rows": rows,
@@ -392,20 +631,18 @@ def api_general(dataset_id: str | None = None):
 async def cleansing_page(request: FastAPIRequest):
     # Require auth before showing app
     _ = require_auth(request)
-    cleansing_path = FRONTEND_DIR / "cleansing.html"
-    if not cleansing_path.exists():
-        raise HTTPException(status_code=404, detail="cleansing.html not found in frontend/")
-    return HTMLResponse(cleansing_path.read_text(encoding="utf-8"))
+    return _page(request, "cleansing.html", "cleansing.html not found in frontend/")
 
 @app.get("/api/cleansing/preview")
 def preview(dataset_id: Optional[str] = Query(default=None)):
     import math
-    df = get_df_cleaning(dataset_id)
-    cols = list(df.columns)
+    get_df_cleaning(dataset_id)  # 404s for unknown ids
+    stats = column_stats(STORE.resolve(dataset_id))
+    cols = [c.name for c in stats.columns]
 
     # Stats
-    dups = _duplicates_count(df)
-    miss_raw = _missing_by_column(df)
+    dups = stats.duplicate_rows
+    miss_raw = stats.missing_by_column()
 
     # sanitize per-column missing to avoid NaN/Inf
     miss = {}
@@ -439,7 +676,7 @@ def preview(dataset_id: Optional[str] = Query(default=None)):
         pass
 
     # completeness (guard NaN/Inf)
-    comp = _completeness_pct(df)
+    comp = stats.completeness_pct()
     if isinstance(comp, float) and (math.isnan(comp) or math.isinf(comp)):
         comp = 0.0
 
@@ -447,7 +684,7 @@ def preview(dataset_id: Optional[str] = Query(default=None)):
         "columns": cols,
         "missing_by_column": miss,
         "stats": {
-            "rows": int(len(df)),
+            "rows": stats.rows,
             "duplicates": dups,
             "missing_pct": round(miss_pct, 2),
             "columns_with_missing": int(cols_with_missing),
@@ -457,34 +694,74 @@ def preview(dataset_id: Optional[str] = Query(default=None)):
         "standardization_targets": std_targets,
     }
 
-@app.post("/api/cleansing/apply")
-def apply(req: ApplyRequest = Body(...)):
+def _apply_actions(req: ApplyRequest, report=None) -> Dict[str, Any]:
+    """Run the requested cleaning actions; ``report(fraction, message)`` receives progress.
+
+    For datasets with a content key the cleaned frame and its report are
+    kept in the on-disk result cache, keyed by that key plus the actions.
+    """
+    report = report or (lambda fraction, message: None)
+    content = _content_key({"dataset_id": req.dataset_id})
     df0 = get_df_cleaning(req.dataset_id)
-    applied: List[str] = []
-    df = df0.copy()
-    imputations: List[Dict[str, Any]] = []
-
-    # Apply in a predictable order
-    if req.actions.deduplicate is not None:
-        subset = req.actions.deduplicate.get("subset") or None
-        res = deduplicate(df, subset=subset)
-        df = res["df"]
-        applied.append(f"Deduplicated rows (subset={subset or 'ALL COLUMNS'})")
-
-    if req.actions.standardize is not None:
-        res = standardize(df)
-        df = res["df"]
-        applied.append("Standardized aliases/units")
-
-    if req.actions.impute is not None:
-        res = impute_simple(df)
-        df = res["df"]
-        imputations = res["imputations"]
-        filled_total = sum(int(x.get("filled",0)) for x in imputations)
-        applied.append(f"Imputed missing values (total filled={filled_total})")
-
-    summary = kpis(df0, df)
-    summary = dict_numbers_safe(summary)
+    if _content_key({"dataset_id": req.dataset_id}) != content:
+        content = None  # cleaned in between; do not cache under either key
+    actions = req.actions.dict()
+
+    def run() -> Dict[str, Any]:
+        applied: List[str] = []
+        df = snapshot(df0)
+        imputations: List[Dict[str, Any]] = []
+
+        # Apply in a predictable order; value spellings first so dedup sees them merged
+        if req.actions.normalize_values is not None:
+            report(0.05, "Normalizing values")
+            columns = req.actions.normalize_values.get("columns") or None
+            with span("normalize_values", rows=len(df)):
+                res = normalize_values(df, columns=columns)
+            df = res["df"]
+            merged = sum(r["distinct_before"] - r["distinct_after"] for r in res["normalized_values"])
+            applied.append(f"Normalized categorical values (merged {merged} spellings)")
+
+        if req.actions.deduplicate is not None:
+            report(0.1, "Deduplicating")
+            subset = req.actions.deduplicate.get("subset") or None
+            with span("dedup", rows=len(df)):
+                res = deduplicate(df, subset=subset)
+            df = res["df"]
+            applied.append(f"Deduplicated rows (subset={subset or 'ALL COLUMNS'})")
+
+        if req.actions.near_duplicates is not None:
+            report(0.25, "Collapsing near duplicates")
+            with span("near_dedup", rows=len(df)):
+                res = near_deduplicate(df, **_near_dup_params(req.actions.near_duplicates))
+            df = res["df"]
+            applied.append(f"Collapsed near-duplicate rows (clusters={res['clusters_found']}, removed={res['removed']})")
+
+        if req.actions.standardize is not None:
+            report(0.4, "Standardizing")
+            with span("standardize", rows=len(df)):
+                res = standardize(df)
+            df = res["df"]
+            applied.append("Standardized aliases/units")
+
+        if req.actions.impute is not None:
+            report(0.6, "Imputing")
+            with span("impute", rows=len(df)):
+                res = impute_simple(df)
+            df = res["df"]
+            imputations = res["imputations"]
+            filled_total = sum(int(x.get("filled",0)) for x in imputations)
+            applied.append(f"Imputed missing values (total filled={filled_total})")
+
+        report(0.85, "Computing KPIs")
+        return {"df": df, "applied": applied, "imputations": imputations,
+                "kpis": dict_numbers_safe(kpis(df0, df))}
+
+    if content is not None:
+        res = RESULTS.get_or_compute(run, "cleansing_apply", content, actions)
+    else:
+        res = run()
+    df, applied, imputations, summary = res["df"], res["applied"], res["imputations"], res["kpis"]
 
     # For transparency, return a tiny preview of rows (JSON-safe)
     preview_before = df_records_safe(df0.head(5))
@@ -492,9 +769,11 @@ def apply(req: ApplyRequest = Body(...)):
     # Persist unless dry run
     new_dataset_id = None
     if not req.dry_run:
-        new_dataset_id = _put_df(df)
+        version = cache_key("cleansing_apply", content, actions) if content is not None else None
+        new_dataset_id = _put_df(df, parent_id=req.dataset_id, label="; ".join(applied) or "cleaned",
+                                 content_key=version)
 
-    payload = {
+    return {
         "kpis": summary,
         "applied": applied,
         "imputations": imputations,
@@ -503,216 +782,144 @@ def apply(req: ApplyRequest = Body(...)):
         "new_dataset_id": new_dataset_id,
         }
 
+@app.post("/api/cleansing/apply")
+def apply(req: ApplyRequest = Body(...)):
+    payload = _apply_actions(req)
     return JSONResponse(content=jsonable_encoder(payload, exclude_none=False))
 
 @app.get("/anomalies", response_class=HTMLResponse)
 async def anomalies_page(request: FastAPIRequest):
     _ = require_auth(request)
-    page = FRONTEND_DIR / "anomalies.html"
-    if not page.exists():
-        raise HTTPException(status_code=404, detail="anomalies.html not found in frontend/")
-    return HTMLResponse(page.read_text(encoding="utf-8"))
+    return _page(request, "anomalies.html", "anomalies.html not found in frontend/")
+
+def _iforest_config(n_estimators: Optional[int], max_samples: Optional[str], fit_sample: Optional[int],
+                    chunk_size: Optional[int]) -> IForestConfig:
+    """IsolationForest settings from optional query params (0 for fit_sample = fit on all rows)."""
+    # the routes validate these with Query(ge=...); job params arrive unchecked
+    for name, value, low in (("n_estimators", n_estimators, 1), ("fit_sample", fit_sample, 0),
+                             ("chunk_size", chunk_size, 1)):
+        if value is not None and int(value) < low:
+            raise HTTPException(status_code=400, detail=f"{name} must be >= {low}")
+    try:
+        cfg = IForestConfig().updated(n_estimators=n_estimators, max_samples=max_samples, chunk_size=chunk_size)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid max_samples: {max_samples}")
+    if fit_sample is not None:
+        cfg.fit_sample_size = fit_sample if fit_sample > 0 else None
+    return cfg
+
+def _catalog_id(dataset_id: Optional[str]) -> Optional[str]:
+    """Catalog id for an optional query param (None if it cannot be resolved)."""
+    try:
+        return STORE.resolve(dataset_id)
+    except KeyError:
+        return None
 
 @app.get("/api/anomalies/rows")
-def rows(dataset_id: Optional[str] = Query(default=None), limit: int = 100):
-    """Return a small sample of flagged rows (combined IQR + IForest)."""
+def rows(request: FastAPIRequest, dataset_id: Optional[str] = Query(default=None), limit: int = 100,
+         order: str = Query(default="index", pattern="^(index|score)$"),
+         n_estimators: Optional[int] = Query(default=None, ge=1), max_samples: Optional[str] = None,
+         fit_sample: Optional[int] = Query(default=None, ge=0), chunk_size: Optional[int] = Query(default=None, ge=1),
+         methods: Optional[str] = None):
+    """Return a small sample of flagged rows (combined IQR + IForest by default).
+
+    ``methods`` selects detectors from ``backend.detectors`` (e.g. ``mad,rolling,lof``);
+    ``order=score`` ranks flagged rows by their highest per-detector percentile rank.
+    """
+    params = dict(dataset_id=dataset_id, limit=limit, order=order, n_estimators=n_estimators,
+                  max_samples=max_samples, fit_sample=fit_sample, chunk_size=chunk_size, methods=methods)
+    return _scheduled(request, "anomalies_rows", params, lambda n_jobs: _anomaly_rows(**params, n_jobs=n_jobs),
+                      persist=True)
+
+def _anomaly_rows(dataset_id: Optional[str], limit: int = 100, order: str = "index",
+                  n_estimators: Optional[int] = None, max_samples: Optional[str] = None,
+                  fit_sample: Optional[int] = None, chunk_size: Optional[int] = None,
+                  methods: Optional[str] = None, n_jobs: int = -1) -> Dict[str, Any]:
     df = get_df_anomalies(dataset_id)
+    config = _iforest_config(n_estimators, max_samples, fit_sample, chunk_size)
+    config.n_jobs = n_jobs
+    try:
+        names = parse_methods(methods, default=("iqr", "iforest"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Calculate IQR mask
-    iqr = _iqr_per_col(df)
-    mask_iqr = pd.Series(False, index=df.index)
-    for c, v in iqr.items():
-        if c in df and "lower" in v and "upper" in v:
-            mask_iqr |= (df[c] < v["lower"]) | (df[c] > v["upper"])  # type: ignore
-
-    # Calculate Isolation Forest mask, also store per-row, per-col outliers for IForest when available
-    mask_if = pd.Series(False, index=df.index)
-    iforest_outlier_idxs = set()
-    iforest = {}
-    iforest_bounds = {}
-    if SKLEARN and not df.select_dtypes(include=[np.number]).empty and len(df) >= 10:
+    ctx = DetectionContext(df, dataset_id=_catalog_id(dataset_id))
+    results: Dict[str, DetectionResult] = {}
+    for name in names:
         try:
-            X = _safe_numeric(df)
-
-            # Ensure X is a numeric DataFrame without Series
-            if isinstance(X, pd.Series):
-                X = X.to_frame()
-
-            model = IsolationForest(n_estimators=200, contamination=0.02, random_state=42, n_jobs=-1)
-            model.fit(X)
-            pred = model.predict(X)
-            mask_if = (pred == -1)
-            iforest_outlier_idxs = set(df.index[mask_if])
-            # Per-column iforest flags (for UI summary ONLY, not per-row value pointing in sample)
-            for col in X.columns:
-                col_vals = X[col]
-                # count_in_flagged: number of flagged rows (by iforest, not IQR)
-                count_in_flagged = int((mask_if & (~mask_iqr)).sum())
-                # total_nonnull: valid values in column
-                total_nonnull = int(col_vals.notnull().sum())
-                iforest[col] = {
-                    "count_in_flagged": count_in_flagged,
-                    "total_nonnull": total_nonnull
-                }
-                # Calculate rough bounds as heuristic (not true iforest bounds)
-                Q1 = col_vals.quantile(0.30)
-                Q3 = col_vals.quantile(0.70)
-                IQR = Q3 - Q1
-                iforest_bounds[col] = {
-                    "lower": Q1 - 1.5 * IQR,
-                    "upper": Q3 + 1.5 * IQR
-                }
+            with span("fit" if name in ("iforest", "lof") else name, rows=len(df)):
+                results[name] = DETECTORS[name](ctx, {"config": config} if name == "iforest" else {"n_jobs": n_jobs})
         except Exception as e:
-            # Print error but do not crash API, as in provided logs
-            print(f"Isolation Forest error: {e}")
-            pass
-
-            
-    print(iforest_bounds)
-    # Combine both outlier masks
-    mask = mask_iqr | mask_if
+            # Log error but do not crash API
+            log.warning("%s detector error: %s", name, e)
+
+    # Combine detector masks
+    mask = np.zeros(len(df), dtype=bool)
+    for res in results.values():
+        mask |= res.mask
     flagged = df[mask].copy()
-    flagged["__is_outlier_iqr"] = mask_iqr[mask]
-    flagged["__is_outlier_iforest"] = mask_if[mask]
-
-    # Add information about which values are outliers
-    outlier_values = {}
-    for idx in flagged.index:
-        outlier_values[idx] = {}
-        # Check IQR outliers for each column
-        for c, bounds in iqr.items():
-            if c in df.columns and "lower" in bounds and "upper" in bounds:
-                val = df.loc[idx, c]
-                if not (isinstance(val, float) and (np.isnan(val) or np.isinf(val))):
-                    if val < bounds["lower"] or val > bounds["upper"]:
-                        outlier_values[idx][c] = "iqr"
-        # Check IForest outliers at row and column level, including upper/lower heuristic bounds
-        if idx in iforest_outlier_idxs:
-            for c in df.select_dtypes(include=[np.number]).columns:
-                if c in df.columns:
-                    val = df.loc[idx, c]
-                    # Only flag value if it is also out of bounds (heuristic) for iforest
-                    iForest_flagged = False
-                    if c in iforest_bounds:
-                        lower = iforest_bounds[c].get("lower", None)
-                        upper = iforest_bounds[c].get("upper", None)
-                        if lower is not None and upper is not None:
-                            if not (isinstance(val, float) and (np.isnan(val) or np.isinf(val))):
-                                if val < lower or val > upper:
-                                    iForest_flagged = True
-                    # If out of bounds, mark. Otherwise, only mark if row is outlier anyway.
-                    if iForest_flagged:  # fallback: always mark if IsolationForest flagged row
-                        existing = outlier_values[idx].get(c, "")
-                        outlier_values[idx][c] = (existing + ("iforest" if not existing else ",iforest"))
+    for name, res in results.items():
+        flagged[f"__is_outlier_{name}"] = res.mask[mask]
+    if "iforest" in results and results["iforest"].scores is not None:
+        flagged["__iforest_score"] = results["iforest"].scores[mask]
+    rank = combined_rank(results.values()) if order == "score" else None
+    if rank is not None:
+        flagged = flagged.iloc[np.argsort(-rank[mask], kind="stable")]
+
     cols = list(flagged.columns)
     if len(cols) > 18:
         cols = cols[:18]
         flagged = flagged[cols]
 
     sample = flagged.head(max(1, int(limit)))
+
+    # Which values of the sampled rows were flagged, and by which detectors
+    positions = pd.Index(df.index).get_indexer(sample.index)
+    outlier_values: Dict[Any, Dict[str, str]] = {idx: {} for idx in sample.index}
+    for name, res in results.items():
+        for c, cmask in res.column_masks.items():
+            for idx in sample.index[cmask[positions]]:
+                existing = outlier_values[idx].get(c)
+                outlier_values[idx][c] = name if not existing else f"{existing},{name}"
+
     return {
         "count": int(flagged.shape[0]),
         "columns": list(sample.columns),
+        "methods": names,
         "outlier_values": outlier_values,
         "rows": [
-            {c: (0.0 if (isinstance(v, float) and (np.isnan(v) or np.isinf(v))) else v) for c, v in r.items()}
+            {c: (0.0 if (v is pd.NA or (isinstance(v, float) and (np.isnan(v) or np.isinf(v)))) else v)
+             for c, v in r.items()}
             for r in sample.to_dict(orient="records")
         ],
     }
 
 @app.get("/api/anomalies/summary")
-def summary(dataset_id: Optional[str] = Query(default=None)):
-    """Aggregated anomalies snapshot to fill KPI cards and lists."""
+def summary(request: FastAPIRequest, dataset_id: Optional[str] = Query(default=None),
+            n_estimators: Optional[int] = Query(default=None, ge=1), max_samples: Optional[str] = None,
+            fit_sample: Optional[int] = Query(default=None, ge=0), chunk_size: Optional[int] = Query(default=None, ge=1),
+            methods: Optional[str] = None):
+    """Aggregated anomalies snapshot to fill KPI cards and lists.
+
+    ``methods`` adds detectors (e.g. ``mad,rolling,roc,lof``) reported under ``detectors``.
+    """
+    params = dict(dataset_id=dataset_id, n_estimators=n_estimators, max_samples=max_samples,
+                  fit_sample=fit_sample, chunk_size=chunk_size, methods=methods)
+    return _scheduled(request, "anomalies_summary", params, lambda n_jobs: _anomaly_summary(**params, n_jobs=n_jobs),
+                      persist=True)
+
+def _anomaly_summary(dataset_id: Optional[str], n_estimators: Optional[int] = None,
+                     max_samples: Optional[str] = None, fit_sample: Optional[int] = None,
+                     chunk_size: Optional[int] = None, methods: Optional[str] = None,
+                     n_jobs: int = -1) -> Dict[str, Any]:
     df = get_df_anomalies(dataset_id)
-
-    # Missingness
-    miss_by_col = _missing_col(df)
-    total_cells = int(df.shape[0] * df.shape[1])
-    total_missing = int(df.isna().sum().sum())
-    miss_pct = (total_missing / total_cells * 100.0) if total_cells else 0.0
-
-    # Duplicates
-    dup_rows = _dup_count(df)
-    dup_pct = (dup_rows / len(df) * 100.0) if len(df) else 0.0
-
-    # IQR Outliers
-    iqr = _iqr_per_col(df)
-    iqr_row_mask = pd.Series(False, index=df.index)
-    for c, b in iqr.items():
-        if "lower" in b and "upper" in b:
-            iqr_row_mask |= (df[c] < b["lower"]) | (df[c] > b["upper"]) if c in df else False
-    iqr_rows = int(iqr_row_mask.sum())
-
-    # Isolation Forest (optional), now also calculate per-column anomaly hit counts
-    if_rows = 0
-    if_pct = 0.0
-    if_note = None
-    iforest_per_column = []
-    if SKLEARN and not df.select_dtypes(include=[np.number]).empty and len(df) >= 10:
-        try:
-            X = _safe_numeric(df)
-            model = IsolationForest(n_estimators=200, contamination=0.02, random_state=42, n_jobs=-1)
-            pred = model.fit_predict(X)
-            if_mask = (pred == -1)
-            if_rows = int(if_mask.sum())
-            if_pct = float(if_rows / len(X) * 100.0)
-            # For each column in X, count non-null and (optionally) extreme/flagged values among anomalies
-            flagged_idx = X.index[if_mask]
-            for col in X.columns:
-                flagged_nonnull = X.loc[flagged_idx, col].notnull().sum()
-                total_nonnull = X[col].notnull().sum()
-                iforest_per_column.append({
-                    "column": col,
-                    "count_in_flagged": int(flagged_nonnull),
-                    "total_nonnull": int(total_nonnull)
-                })
-        except Exception as e:
-            if_note = f"IsolationForest error: {e}"
-    else:
-        if_note = "IsolationForest unavailable (no sklearn or insufficient numeric data)."
-        iforest_per_column = []
-
-    # Column dtypes & flags
-    nunique = df.nunique(dropna=False)
-    constants = [c for c in df.columns if int(nunique[c]) <= 1]
-
-    return {
-        "shape": {"rows": int(df.shape[0]), "cols": int(df.shape[1])},
-        "missing": {
-            "total_missing": total_missing,
-            "pct_missing": round(miss_pct, 2),
-            "by_column": miss_by_col,
-        },
-        "duplicates": {"row_duplicates": dup_rows, "row_duplicates_pct": round(dup_pct, 2)},
-        "outliers": {
-            "method": "iqr",
-            "per_column": [
-                {"column": c, "count": v["count"], "lower": v.get("lower", None), "upper": v.get("upper", None)}
-                for c, v in iqr.items()
-            ],
-            "n_rows_flagged": iqr_rows,
-        },
-        "iforest": {
-            "available": SKLEARN and if_note is None,
-            "n_rows_flagged": if_rows,
-            "pct_rows_flagged": round(if_pct, 2),
-            "note": if_note,
-            "per_column": iforest_per_column,
-        },
-        "columns": {
-            "dtypes": {
-                c: (
-                    "text"
-                    if str(t) == "object"
-                    else "numeric"
-                    if str(t) in {"float64", "float32", "int64", "int32", "float", "int"}
-                    else str(t)
-                )
-                for c, t in df.dtypes.items()
-            },
-            "constants": constants,
-        },
-    }
+    config = _iforest_config(n_estimators, max_samples, fit_sample, chunk_size)
+    config.n_jobs = n_jobs
+    try:
+        extra = parse_methods(methods, default=())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return summarize_anomalies(df, config=config, methods=extra, dataset_id=_catalog_id(dataset_id))
 
 
 def open_browser():
@@ -725,10 +932,7 @@ def open_browser():
 async def export_page(request: FastAPIRequest):
     # Require auth before showing export page
     _ = require_auth(request)
-    export_path = FRONTEND_DIR / "export.html"
-    if not export_path.exists():
-        raise HTTPException(status_code=404, detail="export.html not found in frontend/")
-    return HTMLResponse(export_path.read_text(encoding="utf-8"))
+    return _page(request, "export.html", "export.html not found in frontend/")
 
 @app.get("/api/export/csv")
 def export_csv(dataset_id: Optional[str] = Query(default=None)):
@@ -744,8 +948,10 @@ def export_csv(dataset_id: Optional[str] = Query(default=None)):
         # Create CSV response
         from io import StringIO
         csv_buffer = StringIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_content = csv_buffer.getvalue()
+        with span("serialize", rows=len(df)) as sp:
+            df.to_csv(csv_buffer, index=False)
+            csv_content = csv_buffer.getvalue()
+            sp.bytes = len(csv_content)
         
         # Return CSV file
         return Response(
@@ -762,6 +968,162 @@ def export_csv(dataset_id: Optional[str] = Query(default=None)):
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
 
+# --- Background jobs ---
+# Long operations can be submitted to the job pool instead of running inside
+# the HTTP request; the browser polls /api/jobs/{id} or listens on the SSE stream.
+
+def _job_profile(ctx, params: Dict[str, Any]):
+    ds_id = STORE.resolve(params.get("dataset_id"))
+    ctx.progress(0.05, "Profiling")
+    prof_rows: List[Dict[str, Any]] = []
+
+    def on_column(done, total, stat):
+        prof_rows.append(stat.profile_row())
+        ctx.progress(0.05 + 0.95 * done / max(total, 1), f"Profiled {done}/{total} columns", partial=list(prof_rows))
+
+    out = {"dataset_id": ds_id, "profile": column_stats(ds_id, on_column=on_column).profile()}
+    if params.get("rolling_window"):
+        ctx.progress(0.99, "Rolling features")
+        out["rolling"] = _rolling_profile(ds_id, int(params["rolling_window"]))
+    return out
+
+def _job_cleansing_apply(ctx, params: Dict[str, Any]):
+    payload = _apply_actions(ApplyRequest(**params), report=ctx.progress)
+    return jsonable_encoder(payload, exclude_none=False)
+
+def _job_anomalies_summary(ctx, params: Dict[str, Any]):
+    ctx.progress(0.05, "Detecting anomalies")
+    args = dict(dataset_id=params.get("dataset_id"), n_estimators=params.get("n_estimators"),
+                max_samples=params.get("max_samples"), fit_sample=params.get("fit_sample"),
+                chunk_size=params.get("chunk_size"), methods=params.get("methods"))
+    return jsonable_encoder(_scheduled(None, "anomalies_summary", args,
+                                       lambda n_jobs: _anomaly_summary(**args, n_jobs=n_jobs), persist=True))
+
+def _job_anomalies_rows(ctx, params: Dict[str, Any]):
+    ctx.progress(0.05, "Detecting anomalies")
+    args = dict(dataset_id=params.get("dataset_id"), limit=int(params.get("limit", 100)),
+                order=params.get("order", "index"), n_estimators=params.get("n_estimators"),
+                max_samples=params.get("max_samples"), fit_sample=params.get("fit_sample"),
+                chunk_size=params.get("chunk_size"), methods=params.get("methods"))
+    return jsonable_encoder(_scheduled(None, "anomalies_rows", args,
+                                       lambda n_jobs: _anomaly_rows(**args, n_jobs=n_jobs), persist=True))
+
+def _job_export(ctx, params: Dict[str, Any]):
+    ds_id = STORE.resolve(params.get("dataset_id"))
+    df = STORE.get_clean(ds_id)
+    out_dir = DATA_DIR / "exports"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / f"{ctx.job.id}_clean.csv"
+    n = len(df)
+    chunk = 100_000
+    try:
+        with open(out, "w", newline="", encoding="utf-8") as fh:
+            for start in range(0, max(n, 1), chunk):
+                df.iloc[start:start + chunk].to_csv(fh, index=False, header=(start == 0))
+                done = min(start + chunk, n)
+                ctx.progress(done / max(n, 1), f"Wrote {done}/{n} rows")
+    except JobCancelled:
+        out.unlink(missing_ok=True)
+        raise
+    return FileResult(str(out), "drill_dq_export.csv", info={"dataset_id": ds_id, "rows": n})
+
+def _job_ooc_profile(ctx, params: Dict[str, Any]):
+    src = _archive_path(params)
+    res = out_of_core.profile_file(src, chunk_rows=int(params.get("chunk_rows") or out_of_core.CHUNK_ROWS),
+                                   progress=ctx.progress, spill_dir=DATA_DIR / "spill",
+                                   iqr=bool(params.get("iqr", True)))
+    # name the source by its id; the server path stays private
+    source = {k: params[k] for k in ("file_id", "dataset_id") if params.get(k)}
+    return {**source, **res}
+
+def _job_ooc_export(ctx, params: Dict[str, Any]):
+    src = _archive_path(params)
+    out = DATA_DIR / "exports" / f"{ctx.job.id}_clean.csv"
+    res = out_of_core.export_file(src, out, dedup=bool(params.get("dedup", True)),
+                                  impute=bool(params.get("impute", True)),
+                                  standardize=bool(params.get("standardize", False)),
+                                  chunk_rows=int(params.get("chunk_rows") or out_of_core.CHUNK_ROWS),
+                                  progress=ctx.progress, spill_dir=DATA_DIR / "spill",
+                                  dedup_subset=params.get("subset") or None)
+    return FileResult(res.pop("path"), f"{src.stem.split('_', 1)[-1]}_clean.csv", info=res)
+
+JOBS.register("profile", _job_profile)
+JOBS.register("cleansing_apply", _job_cleansing_apply)
+JOBS.register("anomalies_summary", _job_anomalies_summary)
+JOBS.register("anomalies_rows", _job_anomalies_rows)
+JOBS.register("export", _job_export)
+JOBS.register("ooc_profile", _job_ooc_profile)
+JOBS.register("ooc_export", _job_ooc_export)
+
+def _job_cache_key(kind: str, params: Dict[str, Any]) -> Optional[str]:
+    """Same kind + params + dataset revision -> same job, so finished results are reused."""
+    import json
+    try:
+        ds_id = STORE.resolve(params.get("dataset_id"))
+        revision = STORE.get_entry(ds_id).revision
+    except KeyError:
+        return None
+    return f"{kind}:{ds_id}:{revision}:{json.dumps(params, sort_keys=True, default=str)}"
+
+def _get_job(job_id: str):
+    try:
+        return JOBS.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+@app.post("/api/jobs")
+def submit_job(payload: dict = Body(...)):
+    """Submit ``{"kind": ..., "params": {...}}``; returns the job id to poll."""
+    kind = payload.get("kind") or ""
+    params = payload.get("params") or {}
+    if kind not in JOBS.kinds:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind '{kind}'. Available: {JOBS.kinds}")
+    job, reused = JOBS.submit(kind, params, cache_key=_job_cache_key(kind, params))
+    return {"job_id": job.id, "status": job.status, "reused": reused}
+
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: str):
+    job = _get_job(job_id)
+    return JSONResponse(content=jsonable_encoder(job.to_dict(include_result=job.status == DONE)))
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events with the job state on every change until it finishes."""
+    import asyncio
+    import json
+    job = _get_job(job_id)
+
+    async def stream():
+        seen = -1
+        while True:
+            if job.version != seen:
+                seen = job.version
+                data = json.dumps(jsonable_encoder(job.to_dict(include_result=job.status == DONE)))
+                yield f"event: {job.status}\ndata: {data}\n\n"
+                if job.status in FINISHED:
+                    break
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    result = job.result
+    if isinstance(result, FileResult):
+        return FileResponse(result.path, media_type=result.media_type, filename=result.filename)
+    return JSONResponse(content=result)
+
+@app.delete("/api/jobs/{job_id}")
+def cancel_job(job_id: str):
+    _get_job(job_id)
+    job = JOBS.cancel(job_id)
+    return {"job_id": job.id, "status": job.status, "cancel_requested": True}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,105 @@
+"""Ingest-time dtype optimizer.
+
+``read_csv`` yields ``int64``/``float64``/``object`` columns (the pyarrow
+engine of ``backend.ingest`` yields Arrow-backed strings instead of
+``object``); the object columns (one Python string per cell) dominate memory
+and hashing cost.
+After parsing, every column is narrowed where that is lossless:
+
+* integers  -> the smallest signed/unsigned type holding the range, if narrower
+* floats    -> ``float32`` only if every value round-trips exactly
+* strings   -> ``category`` when values repeat (e.g. ``well_id``), otherwise
+  Arrow-backed ``string[pyarrow]`` when pyarrow is installed
+
+Mixed-type object columns are left alone. Cleaning, anomaly and export code
+accept these dtypes, so the optimized frame is what gets stored.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+import os
+
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=1)
+def has_pyarrow() -> bool:
+    """pyarrow is imported on the first upload rather than at startup."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+# A text column becomes categorical when distinct values <= this share of rows
+CATEGORY_RATIO = float(os.environ.get("DQ_CATEGORY_RATIO", "0.5"))
+ENABLED = os.environ.get("DQ_OPTIMIZE_DTYPES", "1") != "0"
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _optimize_numeric(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_integer_dtype(s.dtype):
+        if s.empty:
+            return s
+        kind = "unsigned" if s.min() >= 0 else "integer"
+        narrow = pd.to_numeric(s, downcast=kind)
+        # same width (int64 -> uint64) saves nothing and invites unsigned wraparound
+        return narrow if narrow.dtype.itemsize < s.dtype.itemsize else s
+    if s.dtype == np.float64:
+        vals = s.to_numpy()
+        narrow = vals.astype(np.float32)
+        finite = np.isfinite(vals)
+        if np.array_equal(narrow[finite].astype(np.float64), vals[finite]) and \
+                not np.any(np.abs(vals[finite]) > np.finfo(np.float32).max):
+            return s.astype(np.float32)
+    return s
+
+
+def _optimize_text(s: pd.Series, category_ratio: float) -> pd.Series:
+    non_null = s.dropna()
+    if non_null.empty:
+        return s
+    inferred = pd.api.types.infer_dtype(non_null, skipna=True)
+    if inferred != "string":
+        return s
+    if non_null.nunique() <= max(1, int(len(s) * category_ratio)):
+        cat = s.astype("category")
+        if cat.cat.categories.dtype != object:  # Arrow strings: same categories as the C engine gives
+            cat = cat.cat.set_categories(cat.cat.categories.astype(object))
+        return cat
+    if has_pyarrow():
+        return s.astype("string[pyarrow]")
+    return s
+
+
+def optimize_dtypes(df: pd.DataFrame, category_ratio: float = CATEGORY_RATIO) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Return ``(optimized_df, report)`` with the before/after footprint and dtype changes."""
+    before = frame_nbytes(df)
+    if not ENABLED:
+        return df, {"bytes_before": before, "bytes_after": before, "reduction_pct": 0.0, "columns": {}}
+    out: Dict[str, pd.Series] = {}
+    changes: Dict[str, Dict[str, str]] = {}
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+            new = _optimize_numeric(s)
+        elif s.dtype == object or isinstance(s.dtype, pd.StringDtype):
+            new = _optimize_text(s, category_ratio)
+        else:
+            new = s
+        if new.dtype != s.dtype:
+            changes[str(col)] = {"from": str(s.dtype), "to": str(new.dtype)}
+        out[col] = new
+    optimized = pd.DataFrame(out, index=df.index)
+    after = frame_nbytes(optimized)
+    return optimized, {
+        "bytes_before": before,
+        "bytes_after": after,
+        "reduction_pct": round((1 - after / before) * 100.0, 1) if before else 0.0,
+        "columns": changes,
+    }
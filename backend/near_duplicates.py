@@ -0,0 +1,192 @@
+"""Near-duplicate rows: sensor re-transmissions with float noise or a shifted timestamp.
+
+Two rows are near duplicates when
+
+* every *exact* column is equal (text/categorical columns such as
+  ``well_id``, and any column named in ``exact``), missing == missing
+* every numeric column is within its tolerance: an absolute one from
+  ``tolerances`` or ``rtol * max(|a|, |b|)`` otherwise
+* the time column (first datetime column, else a parseable ``timestamp``)
+  is within ``time_tolerance`` seconds
+
+Rows are blocked by the exact columns (one integer group id) and sorted by
+time inside each block - a sorted neighborhood, so readings straddling a
+time-bucket edge are still compared. Each row is compared with the next
+``window`` rows of its block, one vectorized pass per offset; the passes stop
+as soon as no row has a neighbor that close in time. Matching pairs are
+joined into clusters with union-find, so the work stays close to linear in
+the row count.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import os
+
+import numpy as np
+import pandas as pd
+
+RTOL = float(os.environ.get("DQ_NEAR_DUP_RTOL", "1e-4"))
+TIME_TOLERANCE = float(os.environ.get("DQ_NEAR_DUP_SECONDS", "1"))
+WINDOW = int(os.environ.get("DQ_NEAR_DUP_WINDOW", "20"))
+TIME_NAMES = ("timestamp", "time", "datetime", "date_time", "date")
+MAX_REPORTED_CLUSTERS = 20
+
+
+def _parse(values: pd.Series) -> pd.Series:
+    t = pd.to_datetime(values, errors="coerce")
+    if t.isna().sum() > values.isna().sum():
+        t = pd.to_datetime(values, errors="coerce", format="mixed")  # e.g. some rows with fractions
+    return t
+
+
+def _as_time(s: pd.Series) -> Optional[np.ndarray]:
+    """Nanoseconds since epoch as float (NaN for missing), or None if ``s`` is not a time column."""
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        t = s
+    elif isinstance(s.dtype, pd.CategoricalDtype):
+        cats = _parse(pd.Series(s.cat.categories))
+        if cats.isna().any():
+            return None
+        t = pd.Series(cats.to_numpy().take(s.cat.codes.to_numpy(), mode="clip"), index=s.index)
+        t[s.cat.codes.to_numpy() < 0] = pd.NaT
+    elif s.dtype == object or pd.api.types.is_string_dtype(s.dtype):
+        t = _parse(s)
+        if t.isna().sum() > s.isna().sum():
+            return None
+    else:
+        return None
+    ns = t.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    ns[t.isna().to_numpy()] = np.nan
+    return ns
+
+
+def _time_column(df: pd.DataFrame, time_col: Optional[str]) -> Optional[str]:
+    if time_col is not None:
+        return time_col if time_col in df.columns else None
+    for c in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[c].dtype):
+            return c
+    for c in df.columns:
+        if str(c).lower() in TIME_NAMES:
+            return c
+    return None
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def parse_tolerances(text: Optional[str]) -> Dict[str, float]:
+    """``"depth_m=0.1,pressure_psi=2"`` -> ``{"depth_m": 0.1, "pressure_psi": 2.0}``."""
+    out: Dict[str, float] = {}
+    for part in (text or "").split(","):
+        if part.strip():
+            col, _, tol = part.partition("=")
+            out[col.strip()] = float(tol)
+    return out
+
+
+def near_duplicate_clusters(df: pd.DataFrame, tolerances: Optional[Dict[str, float]] = None,
+                            rtol: float = RTOL, time_col: Optional[str] = None,
+                            time_tolerance: float = TIME_TOLERANCE, exact: Optional[List[str]] = None,
+                            window: int = WINDOW) -> List[np.ndarray]:
+    """Positions (``iloc``) of each cluster of two or more near-duplicate rows, in row order."""
+    n = len(df)
+    if n < 2:
+        return []
+    tolerances = {c: float(v) for c, v in (tolerances or {}).items() if c in df.columns}
+    exact_set = set(exact or [])
+    tcol = _time_column(df, time_col)
+    times = _as_time(df[tcol]) if tcol is not None else None
+    if times is None:
+        tcol = None
+
+    exact_cols, numeric_cols = [], []
+    for c in df.columns:
+        if c == tcol:
+            continue
+        s = df[c]
+        if c not in exact_set and (c in tolerances or (
+                pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype))):
+            numeric_cols.append(c)
+        else:
+            exact_cols.append(c)
+
+    # block id: one integer per distinct combination of the exact columns
+    if exact_cols:
+        group = df.groupby(exact_cols, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    else:
+        group = np.zeros(n, dtype=np.int64)
+    values = [df[c].to_numpy(dtype=np.float64, na_value=np.nan) for c in numeric_cols]
+    tols = [tolerances.get(c) for c in numeric_cols]
+
+    # sort key inside a block: time, else the first numeric column
+    if times is not None:
+        key, key_tol = times, time_tolerance * 1e9
+    elif values:
+        key, key_tol = values.pop(0), tols.pop(0)   # None: relative tolerance
+    else:
+        key, key_tol = np.zeros(n), 0.0
+    order = np.lexsort((key, group))
+    g, k = group[order], key[order]
+    vs = [v[order] for v in values]
+
+    def close(a: np.ndarray, b: np.ndarray, tol: Optional[float]) -> np.ndarray:
+        both_nan = np.isnan(a) & np.isnan(b)
+        limit = tol if tol is not None else rtol * np.maximum(np.abs(a), np.abs(b))
+        with np.errstate(invalid="ignore"):
+            return both_nan | (np.abs(a - b) <= limit)
+
+    pairs_i: List[np.ndarray] = []
+    pairs_j: List[np.ndarray] = []
+    for off in range(1, min(window, n - 1) + 1):
+        a, b = slice(0, n - off), slice(off, n)
+        m = (g[a] == g[b]) & close(k[a], k[b], key_tol)
+        if not m.any():
+            break  # sorted by key inside blocks: larger offsets are further apart
+        for v, tol in zip(vs, tols):
+            m &= close(v[a], v[b], tol)
+        idx = np.flatnonzero(m)
+        if idx.size:
+            pairs_i.append(order[idx])
+            pairs_j.append(order[idx + off])
+    if not pairs_i:
+        return []
+
+    parent = np.arange(n)
+    for i, j in zip(np.concatenate(pairs_i).tolist(), np.concatenate(pairs_j).tolist()):
+        ri, rj = _find(parent, i), _find(parent, j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    members = np.unique(np.concatenate(pairs_i + pairs_j))
+    roots = np.array([_find(parent, i) for i in members.tolist()])
+    by_root = np.argsort(roots, kind="stable")
+    members, roots = members[by_root], roots[by_root]
+    return np.split(members, np.flatnonzero(np.diff(roots)) + 1)
+
+
+def near_deduplicate(df: pd.DataFrame, tolerances: Optional[Dict[str, float]] = None,
+                     rtol: float = RTOL, time_col: Optional[str] = None,
+                     time_tolerance: float = TIME_TOLERANCE, exact: Optional[List[str]] = None,
+                     window: int = WINDOW, collapse: bool = True) -> Dict[str, Any]:
+    """Find near-duplicate clusters; with ``collapse`` keep only the first row of each."""
+    clusters = near_duplicate_clusters(df, tolerances=tolerances, rtol=rtol, time_col=time_col,
+                                       time_tolerance=time_tolerance, exact=exact, window=window)
+    drop = np.concatenate([c[1:] for c in clusters]) if clusters else np.empty(0, dtype=np.int64)
+    out = df
+    if collapse and drop.size:
+        keep = np.ones(len(df), dtype=bool)
+        keep[drop] = False
+        out = df.iloc[keep]
+    biggest = [df.index[c].tolist() for c in sorted(clusters, key=len, reverse=True)[:MAX_REPORTED_CLUSTERS]]
+    return {
+        "rows_before": len(df),
+        "rows_after": len(out),
+        "removed": len(df) - len(out),
+        "clusters_found": len(clusters),
+        "near_duplicate_rows": int(drop.size),
+        "clusters": [{"keep": rows[0], "rows": rows} for rows in biggest],
+        "df": out,
+    }
@@ -0,0 +1,536 @@
+"""Out-of-core profiling, deduplication, imputation and export for CSVs larger than RAM.
+
+The in-memory pipeline loads a whole dataset into one DataFrame. This module
+streams the on-disk CSV in row chunks (``DQ_CHUNK_ROWS``, default 250k) and
+keeps only small, mergeable state per column, so memory is bounded by one
+chunk plus a few MB per column whatever the file size:
+
+* pass 1 - counts, nulls, min/max, mean/variance (Chan's parallel update),
+  KMV sketch of value hashes for distinct counts, a bottom-k random sample
+  of numeric values (``DQ_OOC_SAMPLE``) and capped value counts of text
+  columns for their mode. Row hashes are spilled to ``DQ_SPILL_PARTITIONS``
+  files by ``hash % partitions`` together with their row number.
+* duplicate candidates - each spill partition is sorted on its own; a row
+  whose hash equals an earlier one is paired with the first row of that
+  hash. Only these row numbers are kept.
+* pass 2 - quantiles (quartiles, median) refined from the sample: the
+  sample brackets each quantile, and a fine histogram of the values inside
+  the bracket plus a count of values below it pins the quantile down to a
+  bracket width / ``QUANTILE_BINS``. The same pass counts |z| > 3 outliers
+  against the pass-1 mean and standard deviation, and compares every
+  duplicate candidate with its first row value by value, so a 64-bit hash
+  collision never drops a distinct row.
+* pass 3 - IQR outlier counts (profile) or the output file (export):
+  duplicates dropped, gaps filled with the pass-2 median / pass-1 mode,
+  optionally standardized chunk by chunk.
+
+A column's kind (numeric or text) is set by the first chunk in which it has
+a value; until then it is unknown. If a later chunk disagrees (text in a
+numeric column, or numbers only in a text column), pass 1 starts over with
+that column read as raw text, so kinds only ever widen to text and no value
+is coerced to missing.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from backend.drift import KMV_K, _kmv, kmv_cardinality
+
+CHUNK_ROWS = int(os.environ.get("DQ_CHUNK_ROWS", "250000"))
+SPILL_PARTITIONS = int(os.environ.get("DQ_SPILL_PARTITIONS", "64"))
+SAMPLE_SIZE = int(os.environ.get("DQ_OOC_SAMPLE", "100000"))
+QUANTILE_BINS = 4096
+MODE_CAP = 10_000          # distinct text values tracked per column for the mode
+QUANTILES = (0.25, 0.5, 0.75)
+OUTLIER_Z = 3.0
+
+Progress = Callable[[float, str], None]
+_SPILL_DTYPE = np.dtype([("hash", "<u8"), ("row", "<i8")])
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)    # missing cell, whatever the column's kind
+_HASH_MULT = np.uint64(0x100000001B3)
+UNKNOWN, NUMERIC, TEXT = "unknown", "numeric", "text"
+
+
+def _noop(fraction: float, message: str) -> None:
+    pass
+
+
+def iter_chunks(path: Path, chunk_rows: int = CHUNK_ROWS,
+                on_bytes: Optional[Callable[[int, int], None]] = None,
+                dtype: Optional[Dict[str, Any]] = None) -> Iterator[pd.DataFrame]:
+    """CSV row chunks; ``on_bytes(read, total)`` after each one."""
+    total = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        for chunk in pd.read_csv(fh, chunksize=chunk_rows, dtype=dtype):
+            yield chunk
+            if on_bytes is not None:
+                on_bytes(fh.tell(), total)
+
+
+def chunk_kind(s: pd.Series) -> Optional[str]:
+    """Kind of one chunk of a column; None when the chunk holds no values."""
+    if not s.notna().any():
+        return None
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        return NUMERIC
+    return TEXT
+
+
+def row_hashes(frame: pd.DataFrame) -> np.ndarray:
+    """64-bit hash per row of normalized values; a missing cell hashes the same in any kind of column."""
+    out = np.zeros(len(frame), dtype=np.uint64)
+    for c in frame.columns:
+        s = frame[c]
+        h = pd.util.hash_array(s.to_numpy())
+        h[s.isna().to_numpy()] = _NULL_HASH
+        out = (out ^ h) * _HASH_MULT
+    return out
+
+
+# --- per-column state ---
+@dataclass
+class ColumnAccumulator:
+    name: str
+    kind: str = UNKNOWN            # set by the first chunk with a value
+    count: int = 0
+    nulls: int = 0
+    n: int = 0                     # non-null numeric values in mean/M2
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = np.inf
+    max: float = -np.inf
+    has_inf: Tuple[bool, bool] = (False, False)
+    hashes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint64), repr=False)
+    sample: np.ndarray = field(default_factory=lambda: np.empty(0), repr=False)
+    sample_keys: np.ndarray = field(default_factory=lambda: np.empty(0), repr=False)
+    counts: Dict[str, int] = field(default_factory=dict, repr=False)
+    # pass 2
+    quantiles: Dict[float, float] = field(default_factory=dict)
+    z_outliers: int = 0
+    iqr_outliers: int = 0
+
+    @property
+    def numeric(self) -> bool:
+        """Numeric columns and columns with no value at all (float64 NaN, as pandas reads them)."""
+        return self.kind != TEXT
+
+    def normalize(self, s: pd.Series) -> pd.Series:
+        """Chunk values in this column's kind (float64 or str, missing as NaN/None)."""
+        if self.numeric:
+            if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+                return s.astype(np.float64)
+            return pd.to_numeric(s, errors="coerce").astype(np.float64)
+        return s.astype(str).where(s.notna(), None)
+
+    def update(self, s: pd.Series, rng: np.random.Generator) -> None:
+        self.count += len(s)
+        self.nulls += int(s.isna().sum())
+        values = s.dropna().to_numpy()
+        if values.size:
+            self.hashes = _kmv(np.concatenate([self.hashes, pd.util.hash_array(values)]))
+        if not self.numeric:
+            vc = s.value_counts(dropna=True)
+            for k, v in vc.items():
+                self.counts[k] = self.counts.get(k, 0) + int(v)
+            if len(self.counts) > 2 * MODE_CAP:
+                top = sorted(self.counts.items(), key=lambda kv: -kv[1])[:MODE_CAP]
+                self.counts = dict(top)
+            return
+        vals = values.astype(np.float64)
+        if not vals.size:
+            return
+        self.has_inf = (self.has_inf[0] or bool(np.isneginf(vals).any()),
+                        self.has_inf[1] or bool(np.isposinf(vals).any()))
+        self.min, self.max = min(self.min, float(vals.min())), max(self.max, float(vals.max()))
+        finite = vals[np.isfinite(vals)]
+        if finite.size:
+            n_b, mean_b = finite.size, float(finite.mean())
+            m2_b = float(((finite - mean_b) ** 2).sum())
+            n = self.n + n_b
+            delta = mean_b - self.mean
+            self.mean += delta * n_b / n
+            self.m2 += m2_b + delta * delta * self.n * n_b / n
+            self.n = n
+            keys = rng.random(finite.size)
+            keys = np.concatenate([self.sample_keys, keys])
+            sample = np.concatenate([self.sample, finite])
+            if keys.size > SAMPLE_SIZE:
+                keep = np.argpartition(keys, SAMPLE_SIZE)[:SAMPLE_SIZE]
+                keys, sample = keys[keep], sample[keep]
+            self.sample_keys, self.sample = keys, sample
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else float("nan")
+
+    def distinct(self) -> int:
+        return kmv_cardinality(self.hashes)
+
+    def mode(self) -> Optional[str]:
+        if not self.counts:
+            return None
+        return max(self.counts.items(), key=lambda kv: kv[1])[0]
+
+    def bounds(self) -> Optional[Tuple[float, float]]:
+        if not {0.25, 0.75} <= set(self.quantiles):
+            return None
+        q1, q3 = self.quantiles[0.25], self.quantiles[0.75]
+        iqr = q3 - q1
+        return (q1, q3) if iqr == 0 else (q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+
+    def profile_row(self) -> Dict[str, Any]:
+        mn = None if self.has_inf[0] or not np.isfinite(self.min) else float(self.min)
+        mx = None if self.has_inf[1] or not np.isfinite(self.max) else float(self.max)
+        return {
+            "column": self.name,
+            "null_pct": round(self.nulls / max(self.count, 1) * 100.0, 2),
+            "unique_pct": round(self.distinct() / max(self.count, 1) * 100.0, 2),
+            "min": mn if self.numeric else None,
+            "max": mx if self.numeric else None,
+            "outliers": self.z_outliers if self.numeric else None,
+        }
+
+
+class QuantileRefiner:
+    """Pass-2 state turning sample quantiles into near-exact ones."""
+
+    def __init__(self, acc: ColumnAccumulator, qs: Sequence[float] = QUANTILES) -> None:
+        self.acc = acc
+        self.total = acc.n
+        self.brackets: Dict[float, Tuple[float, float]] = {}
+        m = acc.sample.size
+        for q in qs:
+            if m == 0:
+                continue
+            slack = 4.0 * np.sqrt(q * (1 - q) / m) + 2.0 / m
+            lo, hi = np.quantile(acc.sample, [max(0.0, q - slack), min(1.0, q + slack)])
+            self.brackets[q] = (float(lo), float(hi))
+        self.below = {q: 0 for q in self.brackets}
+        self.hist = {q: np.zeros(QUANTILE_BINS + 1, dtype=np.int64) for q in self.brackets}
+        self.mean, self.std = acc.mean, acc.std
+
+    def update(self, values: np.ndarray) -> None:
+        finite = values[np.isfinite(values)]
+        for q, (lo, hi) in self.brackets.items():
+            self.below[q] += int(np.count_nonzero(finite < lo))
+            inside = finite[(finite >= lo) & (finite <= hi)]
+            if inside.size:
+                width = (hi - lo) or 1.0
+                idx = np.minimum(((inside - lo) / width * QUANTILE_BINS).astype(np.int64), QUANTILE_BINS)
+                self.hist[q] += np.bincount(idx, minlength=QUANTILE_BINS + 1)
+        if finite.size and np.isfinite(self.std):
+            scale = self.std if self.std else 1.0
+            self.acc.z_outliers += int(np.count_nonzero(np.abs((finite - self.mean) / scale) > OUTLIER_Z))
+
+    def finish(self) -> Dict[float, float]:
+        out: Dict[float, float] = {}
+        for q, (lo, hi) in self.brackets.items():
+            rank = q * (self.total - 1)          # pandas "linear" quantile position
+            pos = rank - self.below[q]
+            hist = self.hist[q]
+            inside = int(hist.sum())
+            if 0 <= pos < inside and hi > lo:
+                cum = np.cumsum(hist)
+                b = int(np.searchsorted(cum, pos, side="right"))
+                start = cum[b - 1] if b else 0
+                frac = (pos - start + 0.5) / max(hist[b], 1)
+                out[q] = float(min(hi, lo + (b + frac) * (hi - lo) / QUANTILE_BINS))
+            elif 0 <= pos < inside:
+                out[q] = lo
+            else:                                 # bracket missed: keep the sample estimate
+                out[q] = float(np.quantile(self.acc.sample, q))
+        self.acc.quantiles = out
+        return out
+
+
+# --- duplicates ---
+class DuplicateSpill:
+    """Row hashes partitioned to disk; duplicates are found one partition at a time."""
+
+    def __init__(self, partitions: int = SPILL_PARTITIONS, directory: Optional[Path] = None) -> None:
+        self.partitions = max(1, partitions)
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+        self.dir = Path(tempfile.mkdtemp(prefix="dq-spill-", dir=directory))
+        self.rows = 0
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Append one chunk's row hashes (rows are numbered in arrival order)."""
+        if not hashes.size:
+            return
+        rec = np.empty(hashes.size, dtype=_SPILL_DTYPE)
+        rec["hash"] = hashes
+        rec["row"] = np.arange(self.rows, self.rows + hashes.size)
+        self.rows += hashes.size
+        part = (hashes % np.uint64(self.partitions)).astype(np.int64)
+        order = np.argsort(part, kind="stable")
+        rec, part = rec[order], part[order]
+        cuts = np.flatnonzero(np.diff(part)) + 1
+        for start, end in zip(np.r_[0, cuts], np.r_[cuts, rec.size]):
+            with open(self.dir / f"{int(part[start])}.bin", "ab") as fh:
+                rec[start:end].tofile(fh)
+
+    def duplicate_candidates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """``(rows, firsts)``: rows whose hash repeats an earlier row's, and the first row with that hash.
+
+        Sorted by row. Equal hashes are only candidates; ``DuplicateVerifier``
+        confirms them against the values.
+        """
+        rows: List[np.ndarray] = []
+        firsts: List[np.ndarray] = []
+        for f in sorted(self.dir.glob("*.bin")):
+            rec = np.fromfile(f, dtype=_SPILL_DTYPE)
+            rec = rec[np.lexsort((rec["row"], rec["hash"]))]
+            new = np.ones(rec.size, dtype=bool)
+            new[1:] = rec["hash"][1:] != rec["hash"][:-1]
+            start = np.maximum.accumulate(np.where(new, np.arange(rec.size), 0)) if rec.size else new
+            rows.append(rec["row"][~new])
+            firsts.append(rec["row"][start][~new])
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        row, first = np.concatenate(rows), np.concatenate(firsts)
+        order = np.argsort(row, kind="stable")
+        return row[order], first[order]
+
+    def close(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def __enter__(self) -> "DuplicateSpill":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class DuplicateVerifier:
+    """Confirms duplicate candidates by comparing values with the first row of their hash.
+
+    Fed the normalized key columns chunk by chunk in file order. The first
+    rows are kept in one preallocated array per column; a candidate that
+    differs from its first row (a hash collision) is compared with the other
+    distinct rows seen under the same hash.
+    """
+
+    def __init__(self, rows: np.ndarray, firsts: np.ndarray) -> None:
+        self.rows, self.firsts = rows, firsts
+        self.reps = np.unique(firsts)
+        self.rep_pos = np.searchsorted(self.reps, firsts)
+        self.values: Dict[Any, np.ndarray] = {}
+        self.confirmed = np.zeros(rows.size, dtype=bool)
+        self.collisions: Dict[int, List[Tuple[Any, ...]]] = {}   # first row -> other distinct keys
+
+    def update(self, chunk: pd.DataFrame, start: int, normalize: Callable[[pd.DataFrame], pd.DataFrame]) -> None:
+        """Check the candidates in ``chunk`` (rows ``start``...); ``normalize`` maps raw rows to key values."""
+        end = start + len(chunk)
+        r_lo, r_hi = np.searchsorted(self.reps, [start, end])
+        c_lo, c_hi = np.searchsorted(self.rows, [start, end])
+        if r_hi == r_lo and c_hi == c_lo:
+            return
+        # normalize only the rows involved: first rows, then candidates
+        rep_local, cand_local = self.reps[r_lo:r_hi] - start, self.rows[c_lo:c_hi] - start
+        keys = normalize(chunk.iloc[np.concatenate([rep_local, cand_local])])
+        n_rep = rep_local.size
+        for c in keys.columns:
+            col = keys[c].to_numpy()
+            if c not in self.values:
+                self.values[c] = np.empty(self.reps.size, dtype=col.dtype)
+            self.values[c][r_lo:r_hi] = col[:n_rep]
+        if c_hi == c_lo:
+            return
+        ref = self.rep_pos[c_lo:c_hi]
+        same = np.ones(c_hi - c_lo, dtype=bool)
+        for c in keys.columns:
+            a, b = keys[c].to_numpy()[n_rep:], self.values[c][ref]
+            same &= (a == b) | (pd.isna(a) & pd.isna(b))
+        self.confirmed[c_lo:c_hi] = same
+        for i in np.flatnonzero(~same):
+            key = tuple(None if pd.isna(v) else v for v in keys.iloc[n_rep + i])
+            seen = self.collisions.setdefault(int(self.firsts[c_lo + i]), [])
+            if key in seen:
+                self.confirmed[c_lo + i] = True
+            else:
+                seen.append(key)
+
+    def duplicate_rows(self) -> np.ndarray:
+        """Sorted row numbers that repeat an earlier row."""
+        return self.rows[self.confirmed]
+
+
+# --- passes ---
+@dataclass
+class FileStats:
+    path: Path
+    rows: int
+    columns: Dict[str, ColumnAccumulator]
+    duplicate_rows: np.ndarray
+    dtypes: Dict[str, Any] = field(default_factory=dict)   # read options: mixed columns as raw text
+
+    def fill_values(self) -> Dict[str, Any]:
+        """Median for numeric columns, most frequent value for text ones."""
+        out: Dict[str, Any] = {}
+        for name, acc in self.columns.items():
+            if not acc.nulls:
+                continue
+            value = acc.quantiles.get(0.5) if acc.numeric else acc.mode()
+            if value is not None:
+                out[name] = value
+        return out
+
+
+def _normalized(chunk: pd.DataFrame, accs: Dict[str, ColumnAccumulator]) -> pd.DataFrame:
+    return pd.DataFrame({c: accs[str(c)].normalize(chunk[c]) for c in chunk.columns}, index=chunk.index)
+
+
+def _pass1(path: Path, chunk_rows: int, progress: Progress, spill_dir: Optional[Path],
+           subset: Optional[Sequence[str]], text: Set[str], rng: np.random.Generator):
+    """Column statistics and duplicate candidates, or the columns to re-read as text if kinds disagree."""
+    accs: Dict[str, ColumnAccumulator] = {}
+    rows = 0
+    dtypes = {c: str for c in text}
+    with DuplicateSpill(directory=spill_dir) as spill:
+        for chunk in iter_chunks(path, chunk_rows, lambda r, t: progress(0.45 * r / max(t, 1), "Pass 1: scanning"),
+                                 dtype=dtypes or None):
+            if not accs:
+                accs = {str(c): ColumnAccumulator(str(c), TEXT if str(c) in text else UNKNOWN) for c in chunk.columns}
+            mixed = set()
+            for c in chunk.columns:
+                acc, kind = accs[str(c)], chunk_kind(chunk[c])
+                if acc.kind == UNKNOWN and kind is not None:
+                    acc.kind = kind
+                elif kind is not None and kind != acc.kind:
+                    mixed.add(str(c))
+            if mixed:
+                return None, mixed
+            norm = _normalized(chunk, accs)
+            for c in norm.columns:
+                accs[str(c)].update(norm[c], rng)
+            keys = norm[[c for c in subset if c in norm.columns]] if subset else norm
+            spill.add(row_hashes(keys))
+            rows += len(chunk)
+        progress(0.5, "Collecting duplicate candidates")
+        return (accs, rows, spill.duplicate_candidates()), set()
+
+
+def scan(path: Path, chunk_rows: int = CHUNK_ROWS, progress: Progress = _noop,
+         spill_dir: Optional[Path] = None, subset: Optional[Sequence[str]] = None, seed: int = 0) -> FileStats:
+    """Passes 1 and 2: column statistics, duplicate rows (over ``subset``) and refined quantiles."""
+    text: Set[str] = set()
+    while True:
+        result, mixed = _pass1(path, chunk_rows, progress, spill_dir, subset, text, np.random.default_rng(seed))
+        if result is not None:
+            break
+        text |= mixed      # kinds only widen, so this terminates
+    accs, rows, (cand_rows, cand_firsts) = result
+    dtypes = {c: str for c in text}
+    key_cols = [c for c in subset if c in accs] if subset else list(accs)
+
+    refiners = {n: QuantileRefiner(a) for n, a in accs.items() if a.numeric}
+    verifier = DuplicateVerifier(cand_rows, cand_firsts) if cand_rows.size else None
+    if refiners or verifier is not None:
+        start = 0
+        for chunk in iter_chunks(path, chunk_rows,
+                                 lambda r, t: progress(0.5 + 0.45 * r / max(t, 1), "Pass 2: quantiles, duplicates"),
+                                 dtype=dtypes or None):
+            for name, ref in refiners.items():
+                ref.update(accs[name].normalize(chunk[name]).to_numpy())
+            if verifier is not None:
+                verifier.update(chunk, start, lambda rows: _normalized(rows[key_cols], accs))
+            start += len(chunk)
+        for ref in refiners.values():
+            ref.finish()
+    dup_rows = verifier.duplicate_rows() if verifier is not None else np.empty(0, dtype=np.int64)
+    return FileStats(path=Path(path), rows=rows, columns=accs, duplicate_rows=dup_rows, dtypes=dtypes)
+
+
+def profile_file(path: Path, chunk_rows: int = CHUNK_ROWS, progress: Progress = _noop,
+                 spill_dir: Optional[Path] = None, iqr: bool = True) -> Dict[str, Any]:
+    """Profile, missingness, duplicates and IQR outliers of a CSV, chunk by chunk.
+
+    The result mirrors ``/api/profile`` plus the missing/duplicate/outlier
+    blocks of ``/api/anomalies/summary``.
+    """
+    stats = scan(path, chunk_rows, lambda f, m: progress(f * (0.7 if iqr else 1.0), m), spill_dir)
+    accs = stats.columns
+    numeric = [a for a in accs.values() if a.numeric and a.bounds() is not None]
+    if iqr and numeric:
+        for chunk in iter_chunks(path, chunk_rows,
+                                 lambda r, t: progress(0.7 + 0.3 * r / max(t, 1), "Pass 3: IQR outliers"),
+                                 dtype=stats.dtypes or None):
+            for acc in numeric:
+                lo, hi = acc.bounds()
+                v = acc.normalize(chunk[acc.name]).to_numpy()
+                acc.iqr_outliers += int(np.count_nonzero((v < lo) | (v > hi)))
+    cells = stats.rows * len(accs)
+    total_missing = sum(a.nulls for a in accs.values())
+    n_dup = int(stats.duplicate_rows.size)
+    progress(1.0, "Done")
+    return {
+        "rows": stats.rows,
+        "profile": [a.profile_row() for a in accs.values()],
+        "missing": {
+            "total_missing": total_missing,
+            "pct_missing": round(total_missing / cells * 100.0, 2) if cells else 0.0,
+            "by_column": {n: a.nulls / max(a.count, 1) for n, a in accs.items()},
+        },
+        "duplicates": {"row_duplicates": n_dup,
+                       "row_duplicates_pct": round(n_dup / stats.rows * 100.0, 2) if stats.rows else 0.0},
+        "outliers": {
+            "method": "iqr",
+            "per_column": [{"column": a.name, "count": a.iqr_outliers if iqr else None,
+                            "lower": a.bounds()[0], "upper": a.bounds()[1]} for a in numeric],
+        },
+        "quantiles": {a.name: {str(q): v for q, v in a.quantiles.items()} for a in accs.values() if a.quantiles},
+        "exact_distinct": all(len(a.hashes) < KMV_K for a in accs.values()),
+    }
+
+
+def export_file(path: Path, dest: Path, dedup: bool = True, impute: bool = True, standardize: bool = False,
+                chunk_rows: int = CHUNK_ROWS, progress: Progress = _noop, spill_dir: Optional[Path] = None,
+                dedup_subset: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Write a cleaned copy of a CSV without loading it: drop duplicates, fill gaps, standardize."""
+    stats = scan(path, chunk_rows, lambda f, m: progress(0.6 * f, m), spill_dir,
+                 subset=dedup_subset) if dedup or impute else None
+    dup_rows = stats.duplicate_rows if stats is not None and dedup else np.empty(0, dtype=np.int64)
+    fill = stats.fill_values() if stats is not None and impute else {}
+    rules = None
+    if standardize:
+        from backend.standardization import RULES as rules
+    written = start = 0
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(dest, "w", newline="", encoding="utf-8") as fh:
+            for chunk in iter_chunks(path, chunk_rows,
+                                     lambda r, t: progress(0.6 + 0.4 * r / max(t, 1), f"Wrote {written} rows"),
+                                     dtype=(stats.dtypes or None) if stats is not None else None):
+                n = len(chunk)
+                lo, hi = np.searchsorted(dup_rows, [start, start + n])
+                if hi > lo:
+                    keep = np.ones(n, dtype=bool)
+                    keep[dup_rows[lo:hi] - start] = False
+                    chunk = chunk[keep]
+                start += n
+                if fill:
+                    chunk = chunk.fillna({c: v for c, v in fill.items() if c in chunk.columns})
+                if rules is not None:
+                    chunk = rules.apply(chunk)["df"]
+                chunk.to_csv(fh, index=False, header=fh.tell() == 0)
+                written += len(chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    progress(1.0, f"Wrote {written} rows")
+    return {
+        "path": str(dest),
+        "rows_before": stats.rows if stats is not None else start,
+        "rows": written,
+        "removed_duplicates": int(dup_rows.size),
+        "imputed": {c: (v if isinstance(v, str) else float(v)) for c, v in fill.items()},
+    }
@@ -0,0 +1,150 @@
+"""Per-column work spread over a pool: profiling, statistics, imputation, IQR.
+
+``map_columns(fn, df)`` returns ``[fn(label, df.iloc[:, i]) for i ...]``.
+Columns are cut into contiguous blocks and each block is one task on a
+pool shared by the whole process (created on first use, so concurrent
+requests never run more than ``DQ_COLUMN_WORKERS`` column tasks together):
+
+* threads (default) - the per-column kernels (``isna``, hashing, quantiles,
+  ``fillna`` on NumPy/Arrow arrays) release the GIL for most of their time,
+  and threads share the frame without copying it
+* processes (``DQ_COLUMN_EXECUTOR=process``) - for frames dominated by
+  object columns, where the GIL is held; each block is pickled to a worker.
+  ``fn`` must then be a module-level function; if the pool cannot be used
+  (unpicklable ``fn``, no fork/spawn in a frozen build) threads are used
+
+Tuning:
+
+* ``DQ_COLUMN_WORKERS`` - size of the shared pool (default ``DQ_TASK_THREADS``,
+  the CPU grant of one scheduled computation). ``map_columns(workers=n)``
+  keeps at most ``n`` of a call's blocks in flight; scheduled computations
+  pass the ``n_jobs`` they were granted
+* ``DQ_COLUMN_BLOCK`` - columns per task; 0 (default) sizes blocks so each
+  worker gets about four, which evens out wide and narrow columns
+* ``DQ_PARALLEL_MIN_CELLS`` - frames with fewer cells (default 200000) run
+  serially, where starting a pool would cost more than it saves
+
+Results (and ``on_result`` callbacks) always come back in column order on the
+calling thread, so progress reporting and job cancellation work unchanged.
+"""
+from __future__ import annotations
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+import logging
+import os
+import pickle
+import threading
+
+import pandas as pd
+
+from backend.services.scheduler import TASK_THREADS
+
+log = logging.getLogger("drilling-dq")
+
+WORKERS = int(os.environ.get("DQ_COLUMN_WORKERS", str(TASK_THREADS)))
+BLOCK_COLUMNS = int(os.environ.get("DQ_COLUMN_BLOCK", "0"))
+MIN_CELLS = int(os.environ.get("DQ_PARALLEL_MIN_CELLS", "200000"))
+EXECUTOR = os.environ.get("DQ_COLUMN_EXECUTOR", "thread").strip().lower()
+BLOCKS_PER_WORKER = 4
+
+ColumnFn = Callable[[Any, pd.Series], Any]
+
+_pools: Dict[str, Executor] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(kind: str) -> Executor:
+    """The process-wide ``thread`` or ``process`` pool, created on first use."""
+    with _pools_lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            if kind == "process":
+                pool = ProcessPoolExecutor(max_workers=WORKERS)
+            else:
+                pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="dq-column")
+            _pools[kind] = pool
+        return pool
+
+
+def _drop_pool(kind: str, pool: Executor) -> None:
+    """Forget a broken pool so the next call starts a fresh one."""
+    with _pools_lock:
+        if _pools.get(kind) is pool:
+            del _pools[kind]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def column_blocks(n_columns: int, workers: int, block: int = 0) -> List[range]:
+    """Contiguous column ranges; ``block=0`` aims at ``BLOCKS_PER_WORKER`` blocks per worker."""
+    size = block if block > 0 else max(1, -(-n_columns // (workers * BLOCKS_PER_WORKER)))
+    return [range(s, min(s + size, n_columns)) for s in range(0, n_columns, size)]
+
+
+def _run_block(fn: ColumnFn, frame: pd.DataFrame, positions: Sequence[int]) -> List[Any]:
+    return [fn(frame.columns[i], frame.iloc[:, i]) for i in positions]
+
+
+def _submit(pool: Executor, fn: ColumnFn, df: pd.DataFrame, block: range, processes: bool) -> Future:
+    if processes:
+        # workers get only their own columns
+        return pool.submit(_run_block, fn, df.iloc[:, list(block)], range(len(block)))
+    return pool.submit(_run_block, fn, df, block)
+
+
+def map_columns(fn: ColumnFn, df: pd.DataFrame, workers: Optional[int] = None, block: Optional[int] = None,
+                executor: Optional[str] = None,
+                on_result: Optional[Callable[[int, int, Any], None]] = None) -> List[Any]:
+    """``fn(label, series)`` for every column of ``df``, in column order.
+
+    ``workers`` caps how many of this call's blocks run at once (default
+    ``DQ_COLUMN_WORKERS``; pass a scheduler grant here). ``on_result(done, total, result)`` is called on the calling thread as
+    results arrive (in order); an exception from it or from ``fn`` cancels
+    the blocks not yet started.
+    """
+    n = len(df.columns)
+    workers = WORKERS if workers is None or workers < 1 else workers   # n_jobs=-1 style: the whole pool
+    results: List[Any] = []
+
+    def emit(result: Any) -> None:
+        results.append(result)
+        if on_result is not None:
+            on_result(len(results), n, result)
+
+    if workers == 1 or n < 2 or df.size < MIN_CELLS:
+        for i in range(n):
+            emit(fn(df.columns[i], df.iloc[:, i]))
+        return results
+
+    blocks = column_blocks(n, workers, BLOCK_COLUMNS if block is None else block)
+    kind = "process" if (executor or EXECUTOR) == "process" else "thread"
+    pool = _pool(kind)
+    pending: Deque[Future] = deque()
+    queued = iter(blocks)
+    try:
+        for b in queued:                      # first window
+            pending.append(_submit(pool, fn, df, b, kind == "process"))
+            if len(pending) >= workers:
+                break
+        while pending:
+            results_block = pending.popleft().result()
+            nxt = next(queued, None)
+            if nxt is not None:
+                pending.append(_submit(pool, fn, df, nxt, kind == "process"))
+            for result in results_block:
+                emit(result)
+    except (BrokenProcessPool, pickle.PicklingError, AttributeError, OSError) as e:
+        for fut in pending:
+            fut.cancel()
+        if kind != "process" or results:
+            raise
+        if isinstance(e, (BrokenProcessPool, OSError)):
+            _drop_pool(kind, pool)
+        log.warning("Process pool unavailable for column work (%s); using threads", e)
+        return map_columns(fn, df, workers=workers, block=block, executor="thread", on_result=on_result)
+    except BaseException:
+        for fut in pending:
+            fut.cancel()
+        raise
+    return results
@@ -0,0 +1,14 @@
+"""Install paths shared by the app and the startup shell (no heavy imports)."""
+from pathlib import Path
+import sys
+
+# Handle paths for both development and bundled executable
+if getattr(sys, "frozen", False):
+    # Running from bundled executable - use _MEIPASS for bundled files
+    BUNDLE_ROOT = Path(getattr(sys, "_MEIPASS", Path(sys.executable).parent))
+    ROOT = Path(sys.executable).resolve().parent  # where the exe lives
+else:
+    # Running from source
+    BUNDLE_ROOT = ROOT = Path(__file__).resolve().parents[1]
+
+FRONTEND_DIR = BUNDLE_ROOT / "frontend"
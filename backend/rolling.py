@@ -0,0 +1,187 @@
+"""Rolling-window features per well along the timestamp.
+
+Rows are sorted once by (``well_id``, ``timestamp``) and every feature is
+computed over the sorted NumPy arrays in O(n), without per-group pandas
+``rolling``:
+
+* mean / std - differences of cumulative sums (count-aware, NaNs skipped)
+* min / max  - van Herk/Gil-Werman: each well is cut into blocks of
+  ``window`` rows, prefix and suffix extrema are accumulated per block and a
+  window's extreme is ``max(suffix[start], prefix[end])`` - the block-wise
+  equivalent of a monotonic deque, but vectorized
+* diff       - first difference within the well
+
+Windows are counted in rows. ``closed="right"`` includes the current row,
+``closed="left"`` uses only the previous ``window`` rows (what deviation
+detectors compare against). Results are aligned with the input index.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from backend.services.storage import STORE
+
+GROUP_COL = "well_id"
+TIME_COL = "timestamp"
+FEATURES: Tuple[str, ...] = ("mean", "std", "min", "max", "diff")
+
+
+def sort_positions(df: pd.DataFrame, group_col: Optional[str] = GROUP_COL,
+                   time_col: Optional[str] = TIME_COL) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(order, group_start)``.
+
+    ``order`` sorts rows by (group, time), keeping file order for ties;
+    ``group_start[i]`` is the sorted position where row ``order[i]``'s group begins.
+    """
+    n = len(df)
+    keys = [np.arange(n)]
+    if time_col and time_col in df.columns:
+        ts = pd.to_datetime(df[time_col], errors="coerce")
+        keys.append(ts.to_numpy(dtype="datetime64[ns]").astype(np.int64))
+    if group_col and group_col in df.columns:
+        codes, _ = pd.factorize(df[group_col], sort=False)
+    else:
+        codes = np.zeros(n, dtype=np.int64)
+    keys.append(codes)
+    order = np.lexsort(tuple(keys))
+    g = codes[order]
+    new = np.ones(n, dtype=bool)
+    if n > 1:
+        new[1:] = g[1:] != g[:-1]
+    start = np.maximum.accumulate(np.where(new, np.arange(n), 0)) if n else np.zeros(0, dtype=np.int64)
+    return order, start
+
+
+def _bounds(n: int, group_start: np.ndarray, window: int, closed: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Half-open [lo, hi) sorted-position bounds of each row's window."""
+    pos = np.arange(n)
+    hi = pos + 1 if closed == "right" else pos
+    lo = np.maximum(hi - window, group_start)
+    return lo, hi
+
+
+def window_sums(x: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+    """Count, sum and sum of squares of the non-NaN values in each [lo, hi) window."""
+    valid = ~np.isnan(x)
+    center = float(np.nanmean(x)) if valid.any() else 0.0  # improves the sum-of-squares precision
+    v = np.where(valid, x - center, 0.0)
+    cs = np.concatenate(([0.0], np.cumsum(v)))
+    cs2 = np.concatenate(([0.0], np.cumsum(v * v)))
+    cn = np.concatenate(([0], np.cumsum(valid)))
+    return cn[hi] - cn[lo], cs[hi] - cs[lo], cs2[hi] - cs2[lo], center
+
+
+def window_extreme(x: np.ndarray, group_start: np.ndarray, window: int, closed: str, op: str) -> np.ndarray:
+    """Windowed max (``op="max"``) or min over sorted ``x`` using block prefix/suffix extrema."""
+    n = len(x)
+    if n == 0:
+        return x.astype(np.float64)
+    is_max = op == "max"
+    fill = -np.inf if is_max else np.inf
+    acc = np.maximum if is_max else np.minimum
+    vals = np.where(np.isnan(x), fill, x)
+    if closed == "left":  # shift by one within each group: window of previous rows
+        prev = np.full(n, fill)
+        prev[1:] = vals[:-1]
+        prev[group_start == np.arange(n)] = fill
+        vals = prev
+    w = max(1, int(window))
+
+    # Lay each group out on block-aligned padded storage
+    pos = np.arange(n)
+    rel = pos - group_start
+    starts = np.flatnonzero(group_start == pos)
+    lengths = np.diff(np.r_[starts, n])
+    padded_len = -(-lengths // w) * w
+    pad_start = np.r_[0, np.cumsum(padded_len)[:-1]]
+    group_idx = np.repeat(np.arange(len(starts)), lengths)
+    ppos = pad_start[group_idx] + rel
+
+    buf = np.full(int(padded_len.sum()), fill)
+    buf[ppos] = vals
+    blocks = buf.reshape(-1, w)
+    prefix = acc.accumulate(blocks, axis=1).ravel()
+    suffix = acc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    s = ppos - (w - 1)
+    inside = rel >= (w - 1)  # full window fits inside the group
+    out = prefix[ppos].copy()
+    out[inside] = acc(suffix[s[inside]], prefix[ppos[inside]])
+    out[np.isinf(out)] = np.nan
+    return out
+
+
+def rolling_features(df: pd.DataFrame, window: int = 12, columns: Optional[Sequence[str]] = None,
+                     features: Iterable[str] = FEATURES, closed: str = "right", min_periods: int = 1,
+                     group_col: Optional[str] = GROUP_COL, time_col: Optional[str] = TIME_COL,
+                     positions: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> pd.DataFrame:
+    """Windowed mean/std/min/max/diff per numeric column, named ``<col>__<feature>``.
+
+    ``positions`` lets callers reuse a ``sort_positions`` result.
+    """
+    if closed not in ("right", "left"):
+        raise ValueError("closed must be 'right' or 'left'")
+    features = tuple(features)
+    unknown = set(features) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown rolling feature(s): {', '.join(sorted(unknown))}")
+    if columns is None:
+        columns = [c for c in df.select_dtypes(include=[np.number]).columns]
+    n = len(df)
+    order, gstart = positions if positions is not None else sort_positions(df, group_col, time_col)
+    lo, hi = _bounds(n, gstart, int(window), closed)
+    out: Dict[str, np.ndarray] = {}
+    for c in columns:
+        x = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        x[np.isinf(x)] = np.nan
+        res: Dict[str, np.ndarray] = {}
+        if "mean" in features or "std" in features:
+            cnt, s, s2, center = window_sums(x, lo, hi)
+            enough = cnt >= max(1, min_periods)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean_c = s / cnt
+                if "mean" in features:
+                    res["mean"] = np.where(enough, mean_c + center, np.nan)
+                if "std" in features:
+                    var = (s2 - cnt * mean_c * mean_c) / (cnt - 1)
+                    res["std"] = np.where(enough & (cnt > 1), np.sqrt(np.maximum(var, 0.0)), np.nan)
+        if "min" in features:
+            res["min"] = window_extreme(x, gstart, window, closed, "min")
+        if "max" in features:
+            res["max"] = window_extreme(x, gstart, window, closed, "max")
+        if "diff" in features:
+            d = np.full(n, np.nan)
+            d[1:] = x[1:] - x[:-1]
+            d[gstart == np.arange(n)] = np.nan
+            res["diff"] = d
+        for feat in features:
+            arr = np.empty(n)
+            arr[order] = res[feat]
+            out[f"{c}__{feat}"] = arr
+    return pd.DataFrame(out, index=df.index)
+
+
+def cached_rolling_features(dataset_id: str, window: int = 12, columns: Optional[Sequence[str]] = None,
+                            features: Iterable[str] = FEATURES, closed: str = "right",
+                            min_periods: int = 1) -> pd.DataFrame:
+    """``rolling_features`` for the current version of a catalog dataset, memoized per revision."""
+    features = tuple(features)
+    key = ("rolling", int(window), tuple(columns) if columns else None, features, closed, int(min_periods))
+    return STORE.memo(dataset_id, key, lambda df: rolling_features(
+        df, window=window, columns=columns, features=features, closed=closed, min_periods=min_periods),
+        persist=True)
+
+
+def summarize_features(features: pd.DataFrame) -> Dict[str, Dict[str, Optional[float]]]:
+    """Compact per-feature stats for profiles (mean, max and null share)."""
+    out: Dict[str, Dict[str, Optional[float]]] = {}
+    for c in features.columns:
+        s = features[c]
+        valid = s.dropna()
+        out[c] = {
+            "mean": float(valid.mean()) if len(valid) else None,
+            "max": float(valid.max()) if len(valid) else None,
+            "null_pct": round(float(s.isna().mean() * 100), 2) if len(s) else 0.0,
+        }
+    return out
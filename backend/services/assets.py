@@ -0,0 +1,235 @@
+"""Frontend asset layer: read and precompress each file once, serve with validators.
+
+Each file under ``frontend/`` is loaded on first request (or from the
+prebuilt bundle), compressed once with gzip and, when the ``brotli``
+package is installed, brotli, and kept in memory. Responses carry a weak
+ETag, ``Cache-Control`` and ``Vary: Accept-Encoding``; a matching
+``If-None-Match`` gets an empty 304. HEAD responses report the size
+without reading anything again.
+
+Builds embed the same data as a zip (``python -m backend.services.assets
+build``) holding every file plus its ``.gz``/``.br`` variants and a manifest,
+so the packaged exe compresses nothing at runtime. When running from source,
+files are re-read when their mtime changes so edits show up without a restart.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import threading
+import zipfile
+
+from backend.paths import BUNDLE_ROOT, FRONTEND_DIR
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+BUNDLE_NAME = "frontend_assets.zip"
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "image/x-icon")
+MIN_COMPRESS_BYTES = 512
+STATIC_MAX_AGE = int(os.environ.get("DQ_STATIC_MAX_AGE", "3600"))
+# Public pages and static files may be cached; pages behind login must be revalidated
+STATIC_CACHE = f"public, max-age={STATIC_MAX_AGE}"
+PAGE_CACHE = "private, no-cache"
+
+
+@dataclass
+class Asset:
+    name: str
+    body: bytes
+    content_type: str
+    etag: str
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+    mtime: float = 0.0
+
+    def encoded(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        accepted = {p.split(";")[0].strip().lower() for p in accept_encoding.split(",")}
+        if self.br is not None and "br" in accepted:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.body, None
+
+
+def _content_type(name: str) -> str:
+    ctype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if ctype.startswith("text/") or ctype in ("application/javascript", "application/json"):
+        ctype += "; charset=utf-8"
+    return ctype
+
+
+def build_asset(name: str, body: bytes, mtime: float = 0.0, brotli_quality: int = 11) -> Asset:
+    ctype = _content_type(name)
+    asset = Asset(name=name, body=body, content_type=ctype, mtime=mtime,
+                  etag='W/"' + hashlib.sha1(body).hexdigest()[:20] + '"')
+    if len(body) >= MIN_COMPRESS_BYTES and ctype.startswith(COMPRESSIBLE):
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            asset.gzip = gz
+        if brotli is not None:
+            br = brotli.compress(body, quality=brotli_quality)
+            if len(br) < len(body):
+                asset.br = br
+    return asset
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = {t.strip() for t in header.split(",")}
+    if "*" in tags:
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((t[2:] if t.startswith("W/") else t) == bare for t in tags)
+
+
+class AssetStore:
+    def __init__(self, root: Path, bundle: Optional[Path] = None, watch: bool = False) -> None:
+        self.root = root
+        self.watch = watch
+        self._assets: Dict[str, Asset] = {}
+        self._lock = threading.Lock()
+        self._from_bundle = False
+        if bundle is not None and bundle.exists():
+            self._assets = load_bundle(bundle)
+            self._from_bundle = True
+
+    def _path(self, name: str) -> Optional[Path]:
+        path = (self.root / name).resolve()
+        root = self.root.resolve()
+        if root != path and root not in path.parents:
+            return None
+        return path
+
+    def get(self, name: str) -> Optional[Asset]:
+        name = name.lstrip("/")
+        asset = self._assets.get(name)
+        if asset is not None and (self._from_bundle or not self.watch):
+            return asset
+        path = self._path(name)
+        if path is None or not path.is_file():
+            return asset if self._from_bundle else None
+        mtime = path.stat().st_mtime
+        if asset is not None and asset.mtime == mtime:
+            return asset
+        with self._lock:
+            asset = self._assets.get(name)
+            if asset is None or asset.mtime != mtime:
+                # quick brotli setting at runtime; builds use the maximum quality
+                asset = build_asset(name, path.read_bytes(), mtime, brotli_quality=5)
+                self._assets[name] = asset
+        return asset
+
+    def negotiate(self, name: str, if_none_match: Optional[str], accept_encoding: str,
+                  cache_control: str = STATIC_CACHE, head: bool = False) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """``(status, headers, body)`` for ``name``, or None if there is no such file.
+
+        Framework-free so the startup shell (``backend.asgi``) can use it too.
+        """
+        asset = self.get(name)
+        if asset is None:
+            return None
+        headers = {"ETag": asset.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if _etag_matches(if_none_match, asset.etag):
+            return 304, headers, b""
+        body, encoding = asset.encoded(accept_encoding)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        headers["Content-Type"] = asset.content_type
+        headers["Content-Length"] = str(len(body))
+        return 200, headers, b"" if head else body
+
+    def response(self, request: "Request", name: str, cache_control: str = STATIC_CACHE) -> Optional["Response"]:
+        """Starlette response for ``name`` (None if there is no such file)."""
+        from starlette.responses import Response
+        found = self.negotiate(name, request.headers.get("if-none-match"), request.headers.get("accept-encoding", ""),
+                               cache_control, head=request.method == "HEAD")
+        if found is None:
+            return None
+        status, headers, body = found
+        return Response(content=body, status_code=status, headers=headers)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "files": len(self._assets),
+            "bytes": sum(len(a.body) for a in self._assets.values()),
+            "gzip_bytes": sum(len(a.gzip or a.body) for a in self._assets.values()),
+            "br_bytes": sum(len(a.br or a.gzip or a.body) for a in self._assets.values()),
+        }
+
+
+# --- build-time bundle ---
+
+def _walk(root: Path) -> Iterable[Path]:
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and not path.name.startswith("."):
+            yield path
+
+
+def build_bundle(root: Path, out: Path) -> Dict[str, int]:
+    """Write every file under ``root`` plus its precompressed variants to ``out``."""
+    manifest = {}
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as zf:
+        for path in _walk(root):
+            name = path.relative_to(root).as_posix()
+            asset = build_asset(name, path.read_bytes())
+            zf.writestr(name, asset.body)
+            if asset.gzip is not None:
+                zf.writestr(name + ".gz", asset.gzip)
+            if asset.br is not None:
+                zf.writestr(name + ".br", asset.br)
+            manifest[name] = {"etag": asset.etag, "gzip": asset.gzip is not None, "br": asset.br is not None}
+        zf.writestr("manifest.json", json.dumps(manifest, indent=1))
+    return {"files": len(manifest), "bytes": out.stat().st_size}
+
+
+def load_bundle(path: Path) -> Dict[str, Asset]:
+    assets: Dict[str, Asset] = {}
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        for name, meta in manifest.items():
+            assets[name] = Asset(
+                name=name,
+                body=zf.read(name),
+                content_type=_content_type(name),
+                etag=meta["etag"],
+                gzip=zf.read(name + ".gz") if meta.get("gzip") else None,
+                br=zf.read(name + ".br") if meta.get("br") else None,
+            )
+    return assets
+
+
+ASSETS = AssetStore(FRONTEND_DIR, bundle=BUNDLE_ROOT / BUNDLE_NAME, watch=not getattr(sys, "frozen", False))
+
+
+def main(argv: Optional[list] = None) -> int:
+    from backend.paths import ROOT
+    parser = argparse.ArgumentParser(prog="python -m backend.services.assets")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Precompress frontend/ into a bundle for packaged builds")
+    b.add_argument("--src", default=str(FRONTEND_DIR))
+    b.add_argument("--out", default=str(ROOT / "build" / BUNDLE_NAME))
+    args = parser.parse_args(argv)
+    info = build_bundle(Path(args.src), Path(args.out))
+    print(f"Wrote {args.out}: {info['files']} files, {info['bytes']:,} bytes"
+          + ("" if brotli is not None else " (brotli not installed: gzip only)"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import os
+import threading
+import time
+import uuid
+
+log = logging.getLogger("drilling-dq")
+
+DEFAULT_WORKERS = int(os.environ.get("DQ_JOB_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_FINISHED_JOBS = int(os.environ.get("DQ_JOB_HISTORY", "200"))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = {DONE, FAILED, CANCELLED}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when the job has been cancelled."""
+
+
+@dataclass
+class FileResult:
+    """Job result that ``/api/jobs/{id}/result`` serves as a file download."""
+    path: str
+    filename: str
+    media_type: str = "text/csv"
+    info: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.info, "filename": self.filename}
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    cache_key: Optional[str] = None
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    partial: Any = None
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    version: int = 0  # bumped on every state change; lets SSE clients detect updates
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        out = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "message": self.message,
+            "partial": self.partial,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "version": self.version,
+        }
+        if include_result:
+            out["result"] = self.result.to_dict() if isinstance(self.result, FileResult) else self.result
+        return out
+
+
+class JobContext:
+    """Handle passed to job functions for reporting progress and honouring cancellation."""
+
+    def __init__(self, job: Job, manager: "JobManager") -> None:
+        self.job = job
+        self._manager = manager
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, fraction: float, message: Optional[str] = None, partial: Any = None) -> None:
+        """Report progress in [0, 1]; also a cancellation point."""
+        self.check_cancelled()
+        with self._manager._lock:
+            self.job.progress = max(0.0, min(1.0, float(fraction)))
+            if message is not None:
+                self.job.message = message
+            if partial is not None:
+                self.job.partial = partial
+            self.job.version += 1
+
+
+JobFn = Callable[[JobContext, Dict[str, Any]], Any]
+
+
+class JobManager:
+    """Runs long operations on a worker pool and keeps their results for polling.
+
+    Submitting a job whose cache key matches a running or successfully
+    finished job returns that job instead of starting the work again, so a
+    browser that reconnects (or reloads) picks up the existing result.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="dq-job")
+        self._lock = threading.RLock()
+        self._kinds: Dict[str, JobFn] = {}
+        self.jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, str] = {}
+
+    def register(self, kind: str, fn: JobFn) -> None:
+        self._kinds[kind] = fn
+
+    @property
+    def kinds(self) -> List[str]:
+        return sorted(self._kinds)
+
+    def submit(self, kind: str, params: Dict[str, Any], cache_key: Optional[str] = None) -> tuple[Job, bool]:
+        """Queue a job; returns ``(job, reused)``."""
+        if kind not in self._kinds:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._lock:
+            if cache_key is not None:
+                existing = self.jobs.get(self._by_key.get(cache_key, ""))
+                if existing is not None and existing.status in (QUEUED, RUNNING, DONE):
+                    return existing, True
+            job = Job(id=uuid.uuid4().hex, kind=kind, params=params, cache_key=cache_key)
+            self.jobs[job.id] = job
+            if cache_key is not None:
+                self._by_key[cache_key] = job.id
+            self._prune()
+        self._pool.submit(self._run, job)
+        return job, False
+
+    def get(self, job_id: str) -> Job:
+        return self.jobs[job_id]
+
+    def cancel(self, job_id: str) -> Job:
+        with self._lock:
+            job = self.jobs[job_id]
+            if job.status not in FINISHED:
+                job._cancel.set()
+                if job.status == QUEUED:
+                    self._finish(job, CANCELLED)
+            return job
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        if status == DONE:
+            job.progress = 1.0
+        job.version += 1
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            if job._cancel.is_set():
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.version += 1
+        ctx = JobContext(job, self)
+        try:
+            result = self._kinds[job.kind](ctx, job.params)
+            ctx.check_cancelled()
+        except JobCancelled:
+            with self._lock:
+                self._finish(job, CANCELLED)
+        except Exception as e:
+            log.exception("Job %s (%s) failed", job.id, job.kind)
+            with self._lock:
+                self._finish(job, FAILED, error=str(e) or type(e).__name__)
+        else:
+            with self._lock:
+                self._finish(job, DONE, result=result)
+
+    def _prune(self) -> None:
+        finished = [j for j in self.jobs.values() if j.status in FINISHED]
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for job in sorted(finished, key=lambda j: j.finished_at or 0)[:max(0, excess)]:
+            self.jobs.pop(job.id, None)
+            if job.cache_key and self._by_key.get(job.cache_key) == job.id:
+                self._by_key.pop(job.cache_key, None)
+
+
+JOBS = JobManager()
@@ -0,0 +1,285 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+import pandas as pd
+
+from backend.cleaning import deduplicate, standardize, impute_simple, normalize_values, near_deduplicate
+from backend.services.storage import STORE
+from backend.services.metrics import span
+from backend.services.result_cache import RESULTS
+
+# Cleaning operations that can be recorded as steps. Each takes the input
+# frame plus the step parameters and returns the cleaning helper's result
+# dict (which always carries the output frame under "df").
+OPS: Dict[str, Callable[[pd.DataFrame, Dict[str, Any]], Dict[str, Any]]] = {
+    "dedup": lambda df, p: deduplicate(df, subset=p.get("subset") or None),
+    "near_dedup": lambda df, p: near_deduplicate(df, **p),
+    "standardize": lambda df, p: standardize(df),
+    "normalize_values": lambda df, p: normalize_values(df, columns=p.get("columns") or None),
+    "impute": lambda df, p: impute_simple(df),
+}
+# Parameters each op accepts; anything else is rejected instead of being recorded.
+PARAMS: Dict[str, Tuple[str, ...]] = {
+    "dedup": ("subset",),
+    "near_dedup": ("tolerances", "rtol", "time_col", "time_tolerance", "exact", "window"),
+    "standardize": (),
+    "normalize_values": ("columns",),
+    "impute": (),
+}
+
+DEFAULT_BUDGET_MB = int(os.environ.get("DQ_LINEAGE_CACHE_MB", "512"))
+
+
+class StepError(ValueError):
+    """A cleaning step got parameters it does not accept or failed on the data."""
+
+
+def _check_params(op: str, params: Dict[str, Any]) -> None:
+    unknown = sorted(set(params).difference(PARAMS[op]))
+    if unknown:
+        raise StepError(f"Unknown parameter(s) for {op}: {', '.join(map(str, unknown))}")
+
+
+def _frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+@dataclass
+class StepNode:
+    id: str
+    parent: Optional[str]          # None means the step was applied to the raw data
+    op: str
+    params: Dict[str, Any]
+    key: str                       # identifies the full chain raw -> ... -> this step
+    info: Dict[str, Any] = field(default_factory=dict)  # op report without the frame
+
+
+@dataclass
+class DatasetLineage:
+    root_key: str
+    persistent: bool = False       # root_key is the upload's content hash: frames go to the disk cache too
+    nodes: Dict[str, StepNode] = field(default_factory=dict)
+    cursor: Optional[str] = None   # node the current clean frame corresponds to
+    redo: List[str] = field(default_factory=list)
+
+    def path(self, node_id: Optional[str] = None) -> List[StepNode]:
+        """Steps from the raw data down to ``node_id`` (default: the cursor)."""
+        out: List[StepNode] = []
+        cur = self.cursor if node_id is None else node_id
+        while cur is not None:
+            node = self.nodes[cur]
+            out.append(node)
+            cur = node.parent
+        out.reverse()
+        return out
+
+    def child(self, parent: Optional[str], key: str) -> Optional[StepNode]:
+        for node in self.nodes.values():
+            if node.parent == parent and node.key == key:
+                return node
+        return None
+
+
+def _step_key(parent_key: str, op: str, params: Dict[str, Any]) -> str:
+    blob = json.dumps([parent_key, op, params], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+class LineageRegistry:
+    """Per-dataset DAG of cleaning steps with an LRU cache of intermediate frames.
+
+    Every applied step becomes a node keyed by the whole chain that produced
+    it, so re-running the same prefix with the same parameters hits the cache.
+    Undo/redo just move the cursor; replaying from step k recomputes only
+    from the nearest cached ancestor. For uploads with a content hash the
+    chain starts from that hash, so step frames (and their reports) are also
+    stored in the on-disk result cache and shared by re-uploads of the file.
+    """
+
+    def __init__(self, budget_mb: int = DEFAULT_BUDGET_MB) -> None:
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.graphs: Dict[str, DatasetLineage] = {}
+        self._cache: "OrderedDict[str, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.RLock()
+
+    # --- cache ---
+    def _cache_get(self, key: str) -> Optional[pd.DataFrame]:
+        hit = self._cache.get(key)
+        if hit is None:
+            return None
+        self._cache.move_to_end(key)
+        return hit[0]
+
+    def _cache_put(self, key: str, df: pd.DataFrame) -> None:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return
+        nbytes = _frame_nbytes(df)
+        if nbytes > self.budget_bytes:
+            return
+        self._cache[key] = (df, nbytes)
+        self._cache_bytes += nbytes
+        while self._cache_bytes > self.budget_bytes and self._cache:
+            _, (_, freed) = self._cache.popitem(last=False)
+            self._cache_bytes -= freed
+
+    def cache_stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "bytes": self._cache_bytes, "budget_bytes": self.budget_bytes}
+
+    # --- graph ---
+    def _graph(self, ds_id: str) -> DatasetLineage:
+        g = self.graphs.get(ds_id)
+        if g is None:
+            content = STORE.get_entry(ds_id).content_hash  # KeyError for unknown ids
+            if content:
+                g = DatasetLineage(root_key=content, persistent=True)
+            else:
+                g = DatasetLineage(root_key=f"{ds_id}:{uuid.uuid4().hex}")
+            self.graphs[ds_id] = g
+        return g
+
+    def _materialize(self, g: DatasetLineage, ds_id: str, node_id: Optional[str]) -> pd.DataFrame:
+        """Frame for ``node_id``, recomputed from the nearest cached ancestor."""
+        if node_id is None:
+            return STORE.get_raw(ds_id)
+        path = g.path(node_id)
+        start = len(path)
+        df: Optional[pd.DataFrame] = None
+        while start > 0:
+            node = path[start - 1]
+            df = self._cache_get(node.key)
+            if df is None and g.persistent:
+                df = RESULTS.get("step", node.key)
+                if df is not None:
+                    self._cache_put(node.key, df)
+            if df is not None:
+                if g.persistent and not node.info:
+                    # computed under another upload of the same file
+                    node.info = RESULTS.get("step_info", node.key, default={})
+                break
+            start -= 1
+        if df is None:
+            df = STORE.get_raw(ds_id)
+        for node in path[start:]:
+            try:
+                with span(node.op, rows=len(df)):
+                    res = OPS[node.op](df, node.params)
+            except KeyError as e:  # a column named in the parameters
+                raise StepError(f"{node.op} failed: unknown column(s) {e}") from e
+            except (ValueError, TypeError) as e:
+                raise StepError(f"{node.op} failed: {e}") from e
+            df = res.pop("df")
+            node.info = res
+            self._cache_put(node.key, df)
+            if g.persistent:
+                RESULTS.put(df, "step", node.key)
+                RESULTS.put(res, "step_info", node.key)
+        return df
+
+    def _extend(self, g: DatasetLineage, ds_id: str, parent: Optional[str],
+                op: str, params: Dict[str, Any]) -> StepNode:
+        parent_key = g.root_key if parent is None else g.nodes[parent].key
+        key = _step_key(parent_key, op, params)
+        node = g.child(parent, key)
+        if node is None:
+            node = StepNode(id=uuid.uuid4().hex[:8], parent=parent, op=op, params=params, key=key)
+            g.nodes[node.id] = node
+        return node
+
+    def _publish(self, g: DatasetLineage, ds_id: str, node_id: Optional[str]) -> pd.DataFrame:
+        """Make ``node_id`` current; the cursor only moves once its frame was computed."""
+        df = self._materialize(g, ds_id, node_id)
+        content = None
+        if g.persistent:
+            content = g.root_key if node_id is None else g.nodes[node_id].key
+        STORE.set_clean(ds_id, df, content_key=content)
+        g.cursor = node_id
+        return df
+
+    def _branch(self, g: DatasetLineage, ds_id: str, node_id: str, known: Set[str]) -> None:
+        """Publish a new branch tip; nodes added for it are dropped again if it fails."""
+        try:
+            self._publish(g, ds_id, node_id)
+        except Exception:
+            for nid in set(g.nodes).difference(known):
+                del g.nodes[nid]
+            raise
+        g.redo.clear()
+
+    # --- public API ---
+    def apply(self, ds_id: str, op: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Apply ``op`` on top of the current step and make it the new current step."""
+        if op not in OPS:
+            raise ValueError(f"Unknown cleaning step: {op}")
+        params = params or {}
+        _check_params(op, params)
+        with self._lock:
+            g = self._graph(ds_id)
+            known = set(g.nodes)
+            node = self._extend(g, ds_id, g.cursor, op, params)
+            self._branch(g, ds_id, node.id, known)
+            return dict(node.info)
+
+    def undo(self, ds_id: str) -> Optional[StepNode]:
+        with self._lock:
+            g = self._graph(ds_id)
+            if g.cursor is None:
+                return None
+            node = g.nodes[g.cursor]
+            self._publish(g, ds_id, node.parent)
+            g.redo.append(node.id)
+            return node
+
+    def redo(self, ds_id: str) -> Optional[StepNode]:
+        with self._lock:
+            g = self._graph(ds_id)
+            if not g.redo:
+                return None
+            self._publish(g, ds_id, g.redo[-1])
+            return g.nodes[g.redo.pop()]
+
+    def replay(self, ds_id: str, step: int, params: Dict[str, Any]) -> List[StepNode]:
+        """Re-run the current history with new parameters for step ``step`` (1-based).
+
+        Steps before ``step`` are reused as-is; later steps keep their own
+        parameters and are re-applied on top of the new branch.
+        """
+        with self._lock:
+            g = self._graph(ds_id)
+            path = g.path()
+            if not 1 <= step <= len(path):
+                raise IndexError(f"Step {step} out of range (history has {len(path)} steps)")
+            target = path[step - 1]
+            _check_params(target.op, params)
+            known = set(g.nodes)
+            cur = target.parent
+            for i, node in enumerate(path[step - 1:]):
+                new = self._extend(g, ds_id, cur, node.op, params if i == 0 else node.params)
+                cur = new.id
+            self._branch(g, ds_id, cur, known)
+            return g.path()
+
+    def history(self, ds_id: str) -> Dict[str, Any]:
+        with self._lock:
+            g = self._graph(ds_id)
+            return {
+                "steps": [
+                    {"step": i + 1, "id": n.id, "op": n.op, "params": n.params,
+                     "cached": n.key in self._cache, **n.info}
+                    for i, n in enumerate(g.path())
+                ],
+                "can_undo": g.cursor is not None,
+                "can_redo": bool(g.redo),
+                "nodes": len(g.nodes),
+            }
+
+
+LINEAGE = LineageRegistry()
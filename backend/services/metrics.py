@@ -0,0 +1,179 @@
+"""Lightweight request/stage instrumentation with Prometheus text exposition.
+
+Usage inside handlers and helpers::
+
+    with span("profile", rows=len(df)) as sp:
+        prof = profile_dataframe(df)
+        sp.bytes = int(df.memory_usage().sum())
+
+Durations, rows and bytes are aggregated per stage; the HTTP middleware in
+``backend.main`` records per-endpoint latency. ``GET /metrics`` renders
+everything in the Prometheus text format.
+
+Allocated bytes are measured with ``tracemalloc`` when ``DQ_TRACE_ALLOC=1``
+(slow, for diagnosis only); otherwise a span reports whatever the caller
+assigns to ``sp.bytes``.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+log = logging.getLogger("drilling-dq")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+TRACE_ALLOC = os.environ.get("DQ_TRACE_ALLOC", "") == "1"
+PROFILER_ENABLED = os.environ.get("DQ_PROFILER", "") == "1"
+
+if TRACE_ALLOC and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value: float) -> None:
+        for i, b in enumerate(BUCKETS):
+            if value <= b:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.n += 1
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.help: Dict[str, Tuple[str, str]] = {}
+
+    def _describe(self, name: str, kind: str, text: str) -> None:
+        self.help.setdefault(name, (kind, text))
+
+    def observe(self, name: str, value: float, help: str = "", **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._describe(name, "histogram", help)
+            self.histograms.setdefault(name, {}).setdefault(key, Histogram()).observe(value)
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._describe(name, "counter", help)
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, help: str = "", **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._describe(name, "gauge", help)
+            self.gauges.setdefault(name, {})[key] = value
+
+    def add(self, name: str, value: float, help: str = "", **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._describe(name, "gauge", help)
+            series = self.gauges.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        def fmt(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            body = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                            for k, v in items)
+            return "{" + body + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self.help):
+                kind, text = self.help[name]
+                if text:
+                    lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "histogram":
+                    for labels, h in self.histograms.get(name, {}).items():
+                        cum = 0
+                        for b, c in zip(BUCKETS, h.counts):
+                            cum += c
+                            lines.append(f"{name}_bucket{fmt(labels, ('le', repr(b)))} {cum}")
+                        lines.append(f"{name}_bucket{fmt(labels, ('le', '+Inf'))} {h.n}")
+                        lines.append(f"{name}_sum{fmt(labels)} {h.total}")
+                        lines.append(f"{name}_count{fmt(labels)} {h.n}")
+                else:
+                    series = (self.counters if kind == "counter" else self.gauges).get(name, {})
+                    for labels, v in series.items():
+                        lines.append(f"{name}{fmt(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+@dataclass
+class Span:
+    stage: str
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    seconds: float = 0.0
+
+
+@contextmanager
+def span(stage: str, rows: Optional[int] = None) -> Iterator[Span]:
+    """Time a processing stage and record its rows/bytes under ``stage``."""
+    sp = Span(stage=stage, rows=rows)
+    mem_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    t0 = time.perf_counter()
+    try:
+        yield sp
+    finally:
+        sp.seconds = time.perf_counter() - t0
+        if mem_before is not None and sp.bytes is None:
+            sp.bytes = max(0, tracemalloc.get_traced_memory()[0] - mem_before)
+        METRICS.observe("dq_stage_duration_seconds", sp.seconds,
+                        "Time spent in a processing stage", stage=stage)
+        if sp.rows is not None:
+            METRICS.inc("dq_stage_rows_total", sp.rows, "Rows processed by a stage", stage=stage)
+        if sp.bytes is not None:
+            METRICS.inc("dq_stage_bytes_total", sp.bytes, "Bytes allocated or produced by a stage", stage=stage)
+        log.debug("stage=%s seconds=%.4f rows=%s bytes=%s", stage, sp.seconds, sp.rows, sp.bytes)
+
+
+def record_request(method: str, path: str, status: int, seconds: float) -> None:
+    METRICS.observe("dq_http_request_duration_seconds", seconds,
+                    "HTTP request latency by endpoint", method=method, path=path)
+    METRICS.inc("dq_http_requests_total", 1, "HTTP requests by endpoint and status",
+                method=method, path=path, status=str(status))
+
+
+# --- optional sampling profiler ---
+
+def start_profiler():
+    """Return a running pyinstrument profiler, or None when unavailable/disabled."""
+    if not PROFILER_ENABLED:
+        return None
+    try:
+        from pyinstrument import Profiler  # type: ignore
+    except ImportError:
+        return None
+    profiler = Profiler(async_mode="enabled")
+    profiler.start()
+    return profiler
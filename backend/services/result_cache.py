@@ -0,0 +1,160 @@
+"""On-disk, content-addressed cache for derived results.
+
+Uploads are identified by the SHA-256 of their bytes, hashed while they are
+streamed to disk. Everything derived from an upload is then named by what
+it was computed from, not by the (random) dataset id:
+
+* the parsed, dtype-optimized frame - ``("parsed", <sha256>)``
+* per-version memos such as the column statistics table or rolling features
+  - ``("memo", <content key>, <memo key>)``
+* cleaned versions - lineage steps are keyed by the chain of operations on
+  top of the upload hash, ``/api/cleansing/apply`` by parent key + actions
+* scheduled results (anomaly summaries/rows, near-duplicate reports) -
+  ``(<kind>, <content key>, <params>)``
+
+Every key also includes ``CODE_VERSION`` (a hash of the backend sources and
+rule files, or ``DQ_CODE_VERSION``), so a deploy never serves results of
+older code. Entries are pickles under ``DQ_RESULT_CACHE_DIR`` (default
+``data/cache``), written atomically; the least recently used ones are removed
+once the directory exceeds ``DQ_RESULT_CACHE_MB`` (default 2048).
+``DQ_RESULT_CACHE=0`` turns the cache off.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import threading
+
+from backend.services.metrics import METRICS
+from backend.services.storage import DATA_DIR
+
+log = logging.getLogger("drilling-dq")
+
+ENABLED = os.environ.get("DQ_RESULT_CACHE", "1") != "0"
+CACHE_DIR = Path(os.environ.get("DQ_RESULT_CACHE_DIR", str(DATA_DIR / "cache")))
+BUDGET_MB = int(os.environ.get("DQ_RESULT_CACHE_MB", "2048"))
+
+_MISS = object()
+
+
+def _code_version() -> str:
+    """Hash of the backend sources and rule files; changes with every code change."""
+    if os.environ.get("DQ_CODE_VERSION"):
+        return os.environ["DQ_CODE_VERSION"]
+    root = Path(__file__).resolve().parents[1]
+    files = sorted(p for pattern in ("**/*.py", "rules/*.json") for p in root.glob(pattern))
+    if not files:  # bundled executable without sources
+        return f"frozen-{int(os.path.getmtime(sys.executable))}"
+    h = hashlib.sha1()
+    for p in files:
+        h.update(str(p.relative_to(root)).encode())
+        h.update(p.read_bytes())
+    return h.hexdigest()[:16]
+
+
+CODE_VERSION = _code_version()
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable hex key for ``parts`` (JSON-encoded, so dict order does not matter) plus the code version."""
+    blob = json.dumps([CODE_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, root: Path = CACHE_DIR, budget_mb: int = BUDGET_MB, enabled: bool = ENABLED) -> None:
+        self.root = root
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.enabled = enabled
+        self._bytes: Optional[int] = None   # size on disk, scanned on first write
+        self._lock = threading.Lock()
+        self.stats_counts = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pkl"
+
+    def _count(self, outcome: str) -> None:
+        self.stats_counts[outcome] += 1
+        METRICS.inc("dq_result_cache_total", help="On-disk result cache lookups and writes", outcome=outcome)
+
+    def get(self, *parts: Any, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        path = self._path(cache_key(*parts))
+        try:
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except FileNotFoundError:
+            self._count("misses")
+            return default
+        except Exception as e:  # truncated or written by an incompatible library version
+            log.warning("Dropping unreadable cache entry %s: %s", path.name, e)
+            path.unlink(missing_ok=True)
+            self._count("misses")
+            return default
+        os.utime(path)  # recency for eviction
+        self._count("hits")
+        return value
+
+    def put(self, value: Any, *parts: Any) -> None:
+        if not self.enabled:
+            return
+        path = self._path(cache_key(*parts))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except Exception as e:
+            log.warning("Could not write cache entry %s: %s", path.name, e)
+            return
+        self._count("writes")
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._disk_bytes()
+            else:
+                self._bytes += size
+            if self._bytes > self.budget_bytes:
+                self._evict()
+
+    def get_or_compute(self, compute: Callable[[], Any], *parts: Any) -> Any:
+        """Cached value for ``parts``; on a miss ``compute()`` runs and its result is stored."""
+        value = self.get(*parts, default=_MISS)
+        if value is _MISS:
+            value = compute()
+            self.put(value, *parts)
+        return value
+
+    def _entries(self):
+        return [(p, p.stat()) for p in self.root.glob("*/*.pkl")]
+
+    def _disk_bytes(self) -> int:
+        return sum(st.st_size for _, st in self._entries())
+
+    def _evict(self) -> None:
+        """Drop least recently used entries down to 90% of the budget."""
+        entries = sorted(self._entries(), key=lambda e: e[1].st_mtime)
+        total = sum(st.st_size for _, st in entries)
+        target = int(self.budget_bytes * 0.9)
+        for path, st in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            self._count("evictions")
+        self._bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "dir": str(self.root), "code_version": CODE_VERSION,
+                "bytes": self._bytes, "budget_bytes": self.budget_bytes, **self.stats_counts}
+
+
+RESULTS = ResultCache()
@@ -0,0 +1,187 @@
+"""Admission control for CPU-heavy requests (anomaly detection, profiling).
+
+Three layers, applied by ``SCHEDULER.run``:
+
+* coalescing - a request whose key (kind, dataset revision, parameters)
+  matches one already in flight waits for that computation's result
+  instead of starting its own
+* per-user cap - each user (session email, else client address) may run
+  ``DQ_USER_CONCURRENCY`` computations at once; beyond that the request is
+  rejected with ``SchedulerBusy`` (HTTP 429)
+* CPU budget - running computations share ``DQ_CPU_BUDGET`` threads. Each
+  is granted up to ``DQ_TASK_THREADS`` of them (its ``n_jobs``); when the
+  budget is used up, waiters are served user with fewest running first,
+  then in arrival order, for at most ``DQ_QUEUE_TIMEOUT`` seconds
+
+BLAS/OpenMP pools are capped once at ``DQ_TASK_THREADS`` with threadpoolctl
+(when installed) so NumPy and scikit-learn internals cannot exceed a grant.
+"""
+from __future__ import annotations
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import itertools
+import logging
+import os
+import threading
+import time
+
+from backend.services.metrics import METRICS
+
+log = logging.getLogger("drilling-dq")
+
+CPU_BUDGET = int(os.environ.get("DQ_CPU_BUDGET", str(os.cpu_count() or 1)))
+TASK_THREADS = int(os.environ.get("DQ_TASK_THREADS", str(max(1, CPU_BUDGET // 2))))
+USER_CONCURRENCY = int(os.environ.get("DQ_USER_CONCURRENCY", "2"))
+QUEUE_TIMEOUT = float(os.environ.get("DQ_QUEUE_TIMEOUT", "60"))
+
+
+class SchedulerBusy(Exception):
+    """The request cannot be admitted now; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Ticket:
+    user: Optional[str]
+    threads: int
+    seq: int
+
+
+class Scheduler:
+    def __init__(self, cpu_budget: int = CPU_BUDGET, task_threads: int = TASK_THREADS,
+                 user_concurrency: int = USER_CONCURRENCY, queue_timeout: float = QUEUE_TIMEOUT) -> None:
+        self.cpu_budget = max(1, cpu_budget)
+        self.task_threads = max(1, min(task_threads, self.cpu_budget))
+        self.user_concurrency = max(1, user_concurrency)
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._free = self.cpu_budget
+        self._running: Dict[Optional[str], int] = {}   # admitted computations per user
+        self._waiting: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._inflight: Dict[str, Future] = {}
+        self._limited = False
+        self.stats_counts = {"admitted": 0, "rejected": 0, "coalesced": 0, "timeouts": 0}
+
+    def _count(self, outcome: str) -> None:
+        self.stats_counts[outcome] += 1
+        METRICS.inc("dq_scheduler_requests_total", help="Heavy requests by admission outcome", outcome=outcome)
+
+    def _gauge(self) -> None:
+        METRICS.set("dq_scheduler_threads_in_use", self.cpu_budget - self._free,
+                    help="CPU-budget threads granted to running computations")
+
+    def _limit_native_pools(self) -> None:
+        if self._limited:
+            return
+        self._limited = True
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=self.task_threads)
+        except Exception:
+            log.debug("threadpoolctl unavailable; BLAS/OpenMP pools not capped", exc_info=True)
+
+    # --- admission ---
+    def _next(self) -> Optional[_Ticket]:
+        if not self._waiting:
+            return None
+        return min(self._waiting, key=lambda t: (self._running.get(t.user, 0), t.seq))
+
+    @contextmanager
+    def admit(self, user: Optional[str], threads: Optional[int] = None) -> Iterator[int]:
+        """Hold a user slot and a CPU grant; yields the number of threads granted.
+
+        ``user=None`` (background jobs) skips the per-user cap but still draws
+        from the CPU budget.
+        """
+        self._limit_native_pools()
+        want = self.task_threads if not threads or threads < 1 else min(threads, self.task_threads)
+        with self._cond:
+            if user is not None and self._running.get(user, 0) >= self.user_concurrency:
+                self._count("rejected")
+                raise SchedulerBusy(f"Too many concurrent requests (limit {self.user_concurrency} per user)")
+            ticket = _Ticket(user, want, next(self._seq))
+            self._waiting.append(ticket)
+            self._running[user] = self._running.get(user, 0) + 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while not (self._next() is ticket and self._free >= want):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._count("timeouts")
+                        raise SchedulerBusy("Server busy, CPU budget exhausted", retry_after=5)
+                    self._cond.wait(remaining)
+            except BaseException:
+                self._waiting.remove(ticket)
+                self._release_user(user)
+                self._cond.notify_all()
+                raise
+            self._waiting.remove(ticket)
+            self._free -= want
+            self._count("admitted")
+            self._gauge()
+            self._cond.notify_all()  # the next waiter may fit into what is left
+        try:
+            yield want
+        finally:
+            with self._cond:
+                self._free += want
+                self._release_user(user)
+                self._gauge()
+                self._cond.notify_all()
+
+    def _release_user(self, user: Optional[str]) -> None:
+        left = self._running.get(user, 0) - 1
+        if left > 0:
+            self._running[user] = left
+        else:
+            self._running.pop(user, None)
+
+    # --- coalescing ---
+    def run(self, key: Optional[str], user: Optional[str], fn: Callable[[int], Any],
+            threads: Optional[int] = None) -> Any:
+        """``fn(granted_threads)`` under admission control, shared by identical in-flight ``key`` s."""
+        if key is None:
+            with self.admit(user, threads) as granted:
+                return fn(granted)
+        with self._cond:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+            else:
+                self._count("coalesced")
+        if not leader:
+            return fut.result()
+        try:
+            with self.admit(user, threads) as granted:
+                result = fn(granted)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "cpu_budget": self.cpu_budget,
+                "task_threads": self.task_threads,
+                "threads_in_use": self.cpu_budget - self._free,
+                "waiting": len(self._waiting),
+                "in_flight": len(self._inflight),
+                **self.stats_counts,
+            }
+
+
+SCHEDULER = Scheduler()
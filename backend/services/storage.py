@@ -1,12 +1,18 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
 import pandas as pd
 from pathlib import Path
+import threading
+import time
 import uuid
 import sys
 import tempfile
 
+# Versions share column buffers through pandas Copy-on-Write: a snapshot is a
+# shallow copy, and a column is only duplicated when one side writes to it.
+pd.set_option("mode.copy_on_write", True)
+
 # Handle data directory for both development and bundled executable
 if getattr(sys, 'frozen', False):
     # Running from bundled executable - use temp directory for data storage
@@ -16,24 +22,108 @@ else:
     # Running from source
     DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 
+
+def snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Cheap copy of a frame; unchanged columns stay shared with the source."""
+    return df.copy(deep=False)
+
+
 @dataclass
 class DatasetEntry:
     id: str
-    path_raw: Path
+    path_raw: Optional[Path]
     df_raw: pd.DataFrame
     df_clean: Optional[pd.DataFrame] = None
+    parent_id: Optional[str] = None   # version this one was derived from
+    root_id: str = ""                 # raw upload at the top of the lineage
+    label: str = "raw"                # how this version was produced
+    created_at: float = field(default_factory=time.time)
+    revision: int = 0                 # bumped on every set_clean
+    memo: Dict[Hashable, Any] = field(default_factory=dict, repr=False)
+    content_hash: Optional[str] = None  # SHA-256 of the uploaded bytes (roots only)
+    content_key: Optional[str] = None   # names the current frame's content; None if unknown
+    format: str = "csv"                 # file format of path_raw (csv, parquet, xlsx, las)
+
+
+class DatasetCatalog:
+    """Single registry for uploaded datasets and every version derived from them.
+
+    Raw uploads are roots; cleaned results are registered as child versions
+    that point back to their parent. All endpoints resolve ids here, so the
+    cleansing, anomalies and export pages see the same cached frames.
+    """
 
-class InMemoryStore:
     def __init__(self) -> None:
         self.datasets: Dict[str, DatasetEntry] = {}
+        self._lock = threading.RLock()
 
-    def add(self, df: pd.DataFrame, save_name: str) -> str:
+    def add(self, df: pd.DataFrame, save_name: str, content_hash: Optional[str] = None,
+            source: Optional[Path] = None, fmt: str = "csv") -> str:
+        """Register an upload; ``source`` is the already written file (moved, not rewritten).
+
+        ``fmt`` is the format ``backend.ingest.detect_format`` found for
+        ``source``; without a source the frame is saved as CSV.
+        """
         ds_id = str(uuid.uuid4())
         path = DATA_DIR / f"{ds_id}_{save_name}"
-        df.to_csv(path, index=False)
-        self.datasets[ds_id] = DatasetEntry(id=ds_id, path_raw=path, df_raw=df.copy())
+        if source is not None:
+            Path(source).replace(path)
+        else:
+            df.to_csv(path, index=False)
+            fmt = "csv"
+        with self._lock:
+            self.datasets[ds_id] = DatasetEntry(
+                id=ds_id, path_raw=path, df_raw=snapshot(df), root_id=ds_id,
+                content_hash=content_hash, content_key=content_hash, format=fmt,
+            )
+        return ds_id
+
+    def find_by_hash(self, content_hash: str) -> Optional[str]:
+        """Raw upload with these bytes, preferring one that has not been cleaned in place."""
+        with self._lock:
+            roots = [e for e in self.datasets.values() if e.parent_id is None and e.content_hash == content_hash]
+        if not roots:
+            return None
+        return min(roots, key=lambda e: (e.revision > 0, e.created_at)).id
+
+    def clone(self, ds_id: str) -> str:
+        """New raw dataset sharing the upload (file and frame) of ``ds_id``.
+
+        The frame is a copy-on-write snapshot, so cleaning either dataset in
+        place leaves the other untouched; values memoized on the uncleaned
+        source carry over.
+        """
+        with self._lock:
+            src = self.datasets[ds_id]
+            new_id = str(uuid.uuid4())
+            self.datasets[new_id] = DatasetEntry(
+                id=new_id, path_raw=src.path_raw, df_raw=snapshot(src.df_raw), root_id=new_id,
+                content_hash=src.content_hash, content_key=src.content_hash, format=src.format,
+                memo=dict(src.memo) if src.revision == 0 else {},
+            )
+        return new_id
+
+    def add_version(self, parent_id: str, df: pd.DataFrame, label: str = "cleaned",
+                    content_key: Optional[str] = None) -> str:
+        """Register ``df`` as a new version derived from ``parent_id``."""
+        with self._lock:
+            parent = self.datasets[parent_id]
+            ds_id = str(uuid.uuid4())
+            self.datasets[ds_id] = DatasetEntry(
+                id=ds_id,
+                path_raw=parent.path_raw,
+                df_raw=snapshot(df),
+                parent_id=parent_id,
+                root_id=parent.root_id or parent_id,
+                label=label,
+                content_key=content_key,
+                format=parent.format,
+            )
         return ds_id
 
+    def get_entry(self, ds_id: str) -> DatasetEntry:
+        return self.datasets[ds_id]
+
     def get_raw(self, ds_id: str) -> pd.DataFrame:
         return self.datasets[ds_id].df_raw
 
@@ -41,15 +131,75 @@ class InMemoryStore:
         ent = self.datasets[ds_id]
         return ent.df_clean if ent.df_clean is not None else ent.df_raw
 
-    def set_clean(self, ds_id: str, df: pd.DataFrame) -> None:
-        self.datasets[ds_id].df_clean = df.copy()
+    def set_clean(self, ds_id: str, df: pd.DataFrame, content_key: Optional[str] = None) -> None:
+        with self._lock:
+            ent = self.datasets[ds_id]
+            ent.df_clean = snapshot(df)
+            ent.revision += 1
+            ent.content_key = content_key
+            ent.memo.clear()
 
-    def get_latest(self) -> pd.DataFrame:
-        """Get the most recently added dataset."""
+    def latest_id(self) -> str:
+        """Id of the most recently added dataset or version."""
         if not self.datasets:
             raise KeyError("No datasets available")
-        # Get the last added dataset (assuming insertion order is maintained)
-        latest_id = list(self.datasets.keys())[-1]
-        return self.get_clean(latest_id)
+        # Insertion order is maintained by dict
+        return next(reversed(self.datasets))
+
+    def get_latest(self) -> pd.DataFrame:
+        """Get the most recently added dataset."""
+        return self.get_clean(self.latest_id())
+
+    def resolve(self, ds_id: Optional[str]) -> str:
+        """Return ``ds_id`` if known, the latest id when omitted; KeyError otherwise."""
+        if ds_id:
+            if ds_id not in self.datasets:
+                raise KeyError(ds_id)
+            return ds_id
+        return self.latest_id()
+
+    def lineage(self, ds_id: str) -> List[Dict[str, Any]]:
+        """Chain of versions from the raw upload down to ``ds_id``."""
+        chain: List[Dict[str, Any]] = []
+        cur: Optional[str] = ds_id
+        while cur is not None:
+            ent = self.datasets[cur]
+            chain.append({
+                "dataset_id": ent.id,
+                "parent_id": ent.parent_id,
+                "label": ent.label,
+                "created_at": ent.created_at,
+                "revision": ent.revision,
+            })
+            cur = ent.parent_id
+        chain.reverse()
+        return chain
+
+    def memo(self, ds_id: str, key: Hashable, compute: Callable[[pd.DataFrame], Any],
+             persist: bool = False) -> Any:
+        """Cache a value derived from the current frame of ``ds_id``.
+
+        The cache is dropped whenever the version's clean frame changes. With
+        ``persist`` the value is also kept in the on-disk result cache under
+        the frame's content key, so re-uploads and restarts reuse it.
+        """
+        ent = self.datasets[ds_id]
+        if key in ent.memo:
+            return ent.memo[key]
+        with self._lock:
+            rev, content, df = ent.revision, ent.content_key, self.get_clean(ds_id)
+        if persist and content is not None:
+            from backend.services.result_cache import RESULTS  # imports DATA_DIR from here
+            value = RESULTS.get_or_compute(lambda: compute(df), "memo", content, key)
+        else:
+            value = compute(df)
+        with self._lock:
+            if ent.revision == rev:
+                ent.memo[key] = value
+        return value
+
+
+# Kept for callers that still refer to the old name
+InMemoryStore = DatasetCatalog
 
-STORE = InMemoryStore()
+STORE = DatasetCatalog()
@@ -0,0 +1,248 @@
+"""Rule-driven column standardization: vendor mnemonics -> canonical channels.
+
+Rules live in a JSON file (``backend/rules/standardization.json``, or the
+path in ``DQ_STANDARD_RULES``) with three sections:
+
+* ``units``   - unit name -> dimension, ``factor``/``offset`` to the
+  dimension's base unit and the spellings it appears under
+* ``columns`` - canonical column -> its unit and vendor aliases
+  (LAS/WITSML mnemonics such as ``DEPT``, ``SPPA``, ``HKLD``), plus
+  ``exact_aliases`` that only match as written and are kept out of the
+  fuzzy index (``dens_in`` must not pull in a log's bulk density ``DENS``)
+* ``derived`` - extra columns computed from a canonical one in another unit
+
+The file is compiled once into a lookup from normalized header
+(lowercase, punctuation collapsed to ``_``) to ``(canonical, unit)``. Every
+alias is also entered with each unit of its dimension appended, so
+``DEPT.FT``, ``Depth (ft)`` or ``SPPA_kPa`` resolve to ``depth_m`` /
+``pressure_psi`` plus the conversion to apply.
+
+``standardize`` renames matched columns (metadata only, the data is not
+copied) and applies every unit conversion and derived column as one
+vectorized ``x * scale + offset`` over a single float block. Plans are
+cached per header tuple, so repeated calls on the same layout only pay for
+the arithmetic.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from backend.header_matching import HeaderIndex, HeaderMatch
+
+DEFAULT_RULES = Path(__file__).resolve().parent / "rules" / "standardization.json"
+RULES_PATH = Path(os.environ.get("DQ_STANDARD_RULES", str(DEFAULT_RULES)))
+PLAN_CACHE_SIZE = 256
+FUZZY_PRIORITY = 1e9   # fuzzy header matches rank after every exact one
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: Any) -> str:
+    """Header key used for matching: ``"SPPA (kPa)"`` -> ``"sppa_kpa"``."""
+    return _NON_ALNUM.sub("_", str(name).lower()).strip("_")
+
+
+@dataclass(frozen=True)
+class Unit:
+    name: str
+    dimension: str
+    factor: float
+    offset: float = 0.0
+
+
+@dataclass
+class Conversion:
+    source: str          # column read (after renames)
+    target: str          # column written (same as source for in-place conversions)
+    from_unit: str
+    to_unit: str
+    scale: float
+    offset: float
+
+
+@dataclass
+class StandardizationPlan:
+    renames: Dict[str, str] = field(default_factory=dict)
+    matches: Dict[str, "HeaderMatch"] = field(default_factory=dict)
+    conversions: List[Conversion] = field(default_factory=list)
+
+
+class StandardizationRules:
+    def __init__(self, spec: Dict[str, Any], source: str = "<dict>") -> None:
+        self.source = source
+        self.units: Dict[str, Unit] = {}
+        self.unit_spellings: Dict[str, List[str]] = {}
+        self.columns: Dict[str, Optional[str]] = {}       # canonical -> unit (None = unitless)
+        self.aliases: Dict[str, List[str]] = {}           # canonical -> declared aliases
+        self.exact_aliases: Dict[str, List[str]] = {}     # canonical -> aliases never matched fuzzily
+        self.derived: Dict[str, Tuple[str, str]] = {}     # target -> (source canonical, unit)
+        self.lookup: Dict[str, Tuple[str, Optional[str], int]] = {}  # header key -> (canonical, unit, priority)
+        self._plans: Dict[Tuple[str, ...], StandardizationPlan] = {}
+        self._lock = threading.Lock()
+        self._compile(spec)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "StandardizationRules":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), source=str(path))
+
+    # --- compilation ---
+    def _compile(self, spec: Dict[str, Any]) -> None:
+        unit_keys: Dict[str, str] = {}
+        for name, u in spec.get("units", {}).items():
+            self.units[name] = Unit(name, u["dimension"], float(u["factor"]), float(u.get("offset", 0.0)))
+            self.unit_spellings[name] = [name, *u.get("aliases", [])]
+            for alias in [name, *u.get("aliases", [])]:
+                key = normalize_name(alias)
+                if unit_keys.get(key, name) != name:
+                    raise ValueError(f"{self.source}: unit spelling '{alias}' used by {unit_keys[key]} and {name}")
+                unit_keys[key] = name
+        by_dimension: Dict[str, List[Tuple[str, str]]] = {}
+        for key, name in unit_keys.items():
+            by_dimension.setdefault(self.units[name].dimension, []).append((key, name))
+
+        for canonical, col in spec.get("columns", {}).items():
+            unit = col.get("unit")
+            if unit is not None and unit not in self.units:
+                raise ValueError(f"{self.source}: column '{canonical}' uses unknown unit '{unit}'")
+            self.columns[canonical] = unit
+            self.aliases[canonical] = list(col.get("aliases", []))
+            self.exact_aliases[canonical] = list(col.get("exact_aliases", []))
+        for target, d in spec.get("derived", {}).items():
+            if d["source"] not in self.columns or d["unit"] not in self.units:
+                raise ValueError(f"{self.source}: derived column '{target}' has unknown source or unit")
+            self.derived[target] = (d["source"], d["unit"])
+
+        priority = 0
+        for canonical, unit in self.columns.items():
+            suffixes = by_dimension.get(self.units[unit].dimension, []) if unit else []
+            for alias in [canonical, *self.aliases[canonical], *self.exact_aliases[canonical]]:
+                base = normalize_name(alias)
+                self._add(base, canonical, unit, priority)
+                for key, unit_name in suffixes:
+                    self._add(f"{base}_{key}", canonical, unit_name, priority + 1)
+                priority += 2
+        for target in self.derived:  # derived outputs are never read as aliases
+            self.lookup.pop(normalize_name(target), None)
+
+    def _add(self, key: str, canonical: str, unit: Optional[str], priority: int) -> None:
+        existing = self.lookup.get(key)
+        if existing is None:
+            self.lookup[key] = (canonical, unit, priority)
+        elif existing[:2] != (canonical, unit):
+            raise ValueError(f"{self.source}: header '{key}' maps to both {existing[0]} and {canonical}")
+
+    # --- conversions ---
+    def affine(self, from_unit: str, to_unit: str) -> Tuple[float, float]:
+        """``(scale, offset)`` with ``value_to = value_from * scale + offset``."""
+        a, b = self.units[from_unit], self.units[to_unit]
+        if a.dimension != b.dimension:
+            raise ValueError(f"Cannot convert {from_unit} ({a.dimension}) to {to_unit} ({b.dimension})")
+        return a.factor / b.factor, (a.offset - b.offset) / b.factor
+
+    @property
+    def unit_map(self) -> Dict[str, Tuple[str, float, float]]:
+        """Derived columns as ``{target: (source, scale, offset)}``."""
+        return {t: (src, *self.affine(self.columns[src], unit)) for t, (src, unit) in self.derived.items()}
+
+    @cached_property
+    def index(self) -> "HeaderIndex":
+        """Fuzzy matcher for headers the exact lookup does not know."""
+        from backend.header_matching import HeaderIndex
+        return HeaderIndex(self)
+
+    # --- planning ---
+    def plan(self, columns: Sequence[Any]) -> StandardizationPlan:
+        key = tuple(str(c) for c in columns)
+        cached = self._plans.get(key)
+        if cached is not None:
+            return cached
+        plan = self._build_plan(columns)
+        with self._lock:
+            if len(self._plans) >= PLAN_CACHE_SIZE:
+                self._plans.clear()
+            self._plans[key] = plan
+        return plan
+
+    def _build_plan(self, columns: Sequence[Any]) -> StandardizationPlan:
+        present = set(columns)
+        best: Dict[str, Tuple[float, Any, Optional[str]]] = {}   # canonical -> (priority, column, unit)
+        matches: Dict[Any, HeaderMatch] = {}
+        for c, m in zip(columns, self.index.match_headers(columns)):
+            if not self.index.accept(m):
+                continue
+            canonical, unit = m.canonical, m.unit
+            if canonical in present and c != canonical:
+                continue  # canonical column already there; leave the alias alone
+            # exact matches first (in rule order), then fuzzy ones by confidence
+            priority = self.lookup[m.matched][2] if m.method == "exact" else FUZZY_PRIORITY + 1.0 - m.confidence
+            if canonical not in best or priority < best[canonical][0]:
+                best[canonical] = (priority, c, unit)
+                matches[c] = m
+
+        plan = StandardizationPlan()
+        final = set(present)
+        for canonical, (_, col, unit) in best.items():
+            if col != canonical:
+                plan.renames[col] = canonical
+                plan.matches[col] = matches[col]
+                final.discard(col)
+                final.add(canonical)
+            target_unit = self.columns[canonical]
+            if unit is not None and target_unit is not None and unit != target_unit:
+                scale, offset = self.affine(unit, target_unit)
+                plan.conversions.append(Conversion(canonical, canonical, unit, target_unit, scale, offset))
+        for target, (src, unit) in self.derived.items():
+            if src in final and target not in final:
+                scale, offset = self.affine(self.columns[src], unit)
+                plan.conversions.append(Conversion(src, target, self.columns[src], unit, scale, offset))
+        return plan
+
+    # --- application ---
+    def apply(self, df: pd.DataFrame) -> Dict[str, Any]:
+        plan = self.plan(list(df.columns))
+        out = df.rename(columns=plan.renames) if plan.renames else df
+        numeric = [cv for cv in plan.conversions if pd.api.types.is_numeric_dtype(out[cv.source].dtype)
+                   and not pd.api.types.is_bool_dtype(out[cv.source].dtype)]
+        skipped = [cv.source for cv in plan.conversions if cv not in numeric]
+        if numeric:
+            sources = list(dict.fromkeys(cv.source for cv in numeric))
+            pos = {c: i for i, c in enumerate(sources)}
+            block = out[sources].to_numpy(dtype=np.float64, na_value=np.nan)
+            cols = np.array([pos[cv.source] for cv in numeric])
+            scale = np.array([cv.scale for cv in numeric])
+            offset = np.array([cv.offset for cv in numeric])
+            values = np.asfortranarray(block[:, cols]) * scale + offset
+            new = {cv.target: values[:, i] for i, cv in enumerate(numeric)}
+            in_place = [t for t in new if t in out.columns]
+            out = out.assign(**{t: new[t] for t in in_place})
+            derived = [t for t in new if t not in in_place]
+            if derived:
+                out = pd.concat([out, pd.DataFrame({t: new[t] for t in derived}, index=out.index)], axis=1)
+        return {
+            "applied_aliases": list(plan.renames.values()),
+            "applied_units": [cv.target for cv in numeric],
+            "alias_details": [{"column": str(src), "to": dst, "method": plan.matches[src].method,
+                               "confidence": plan.matches[src].confidence} for src, dst in plan.renames.items()],
+            "unit_details": [{"column": cv.target, "source": cv.source, "from_unit": cv.from_unit,
+                              "to_unit": cv.to_unit} for cv in numeric],
+            "skipped_non_numeric": skipped,
+            "df": out,
+        }
+
+
+RULES = StandardizationRules.from_file(RULES_PATH)
+
+
+def standardize(df: pd.DataFrame, rules: Optional[StandardizationRules] = None) -> Dict[str, Any]:
+    return (rules or RULES).apply(df)
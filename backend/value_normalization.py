@@ -0,0 +1,159 @@
+"""Value-level normalization of categorical columns (``W-101``/``w101``/``WELL 101``).
+
+Works on the dictionary of a column, not its rows. A categorical column
+already has one (its categories); text columns are factorized once. Each
+distinct value then gets a fingerprint:
+
+* lowercase, split into letter and digit runs (punctuation and spaces are
+  separators), leading zeros dropped from numbers:
+  ``"W-0101"`` -> ``("w", "101")``, ``"WELL 101"`` -> ``("well", "101")``
+* values with equal fingerprints form one cluster
+* clusters whose numbers and shape agree and whose words abbreviate each
+  other (``w`` / ``well``) are merged, unless the short form would fit more
+  than one longer one (``W-1`` with both ``WELL-1`` and ``WX-1``)
+
+Every cluster takes its most frequent spelling and the row codes are
+remapped with one array lookup, so the cost grows with the number of
+distinct values; rows are only touched by that final ``take``.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import re
+
+import numpy as np
+import pandas as pd
+
+from backend.memory import CATEGORY_RATIO
+
+MAX_REPORTED_CLUSTERS = 20
+
+_TOKENS = re.compile(r"[a-z]+|[0-9]+")
+Fingerprint = Tuple[str, ...]
+
+
+def fingerprint(value: Any) -> Fingerprint:
+    """``"WELL 101"`` -> ``("well", "101")``; numbers lose leading zeros."""
+    return tuple(t if not t[0].isdigit() else (t.lstrip("0") or "0")
+                 for t in _TOKENS.findall(str(value).lower()))
+
+
+def _shape(fp: Fingerprint) -> Tuple[str, ...]:
+    """Numbers kept, words reduced to a placeholder: the part that must match exactly."""
+    return tuple(t if t[0].isdigit() else "" for t in fp)
+
+
+def _abbreviates(short: Fingerprint, long_: Fingerprint) -> bool:
+    return all(a == b or b.startswith(a) for a, b in zip(short, long_) if not a[0].isdigit())
+
+
+def cluster_values(values: Sequence[Any]) -> List[int]:
+    """Cluster id for each of ``values`` (distinct dictionary entries)."""
+    fps = [fingerprint(v) for v in values]
+    # abbreviation merges, only among fingerprints with numbers and the same shape
+    by_shape: Dict[Tuple[str, ...], List[Fingerprint]] = {}
+    for fp in dict.fromkeys(fps):
+        if fp and any(t[0].isdigit() for t in fp) and not all(t[0].isdigit() for t in fp):
+            by_shape.setdefault(_shape(fp), []).append(fp)
+    merged: Dict[Fingerprint, Fingerprint] = {}
+    for group in by_shape.values():
+        if len(group) < 2:
+            continue
+        # longest spelling first: it is the most specific form
+        group.sort(key=lambda fp: -sum(len(t) for t in fp))
+        heads: List[Fingerprint] = []
+        for fp in group:
+            fits = [h for h in heads if _abbreviates(fp, h)]
+            if len(fits) == 1:
+                merged[fp] = fits[0]
+            elif not fits:
+                heads.append(fp)
+    ids: Dict[Fingerprint, int] = {}
+    return [ids.setdefault(merged.get(fp, fp), len(ids)) for fp in fps]
+
+
+def _eligible(s: pd.Series, category_ratio: float) -> bool:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return True
+    if not (s.dtype == object or pd.api.types.is_string_dtype(s.dtype)):
+        return False
+    non_null = s.dropna()
+    if non_null.empty or pd.api.types.infer_dtype(non_null, skipna=True) != "string":
+        return False
+    return non_null.nunique() <= max(1, int(len(s) * category_ratio))
+
+
+def normalize_series(s: pd.Series) -> Tuple[pd.Series, Dict[str, Any]]:
+    """Collapse spelling variants in ``s``; returns the new series and a report."""
+    is_cat = isinstance(s.dtype, pd.CategoricalDtype)
+    if is_cat:
+        codes = s.cat.codes.to_numpy()
+        uniques = s.cat.categories
+    else:
+        codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    n = len(uniques)
+    report: Dict[str, Any] = {"column": str(s.name), "distinct_before": n, "distinct_after": n, "clusters": []}
+    if n < 2:
+        return s, report
+
+    cluster = np.asarray(cluster_values(list(uniques)), dtype=np.int64)
+    k = int(cluster.max()) + 1
+    if k == n:
+        return s, report
+    counts = np.bincount(codes[codes >= 0], minlength=n)
+    # representative per cluster: most frequent spelling, ties to the first seen
+    order = np.lexsort((np.arange(n), -counts, cluster))
+    first = np.ones(n, dtype=bool)
+    first[1:] = cluster[order][1:] != cluster[order][:-1]
+    rep_of_cluster = np.empty(k, dtype=np.int64)
+    rep_of_cluster[cluster[order][first]] = order[first]
+    # new dictionary keeps the original order of the representatives
+    reps = np.sort(rep_of_cluster)
+    new_code_of_rep = np.full(n, -1, dtype=np.int64)
+    new_code_of_rep[reps] = np.arange(len(reps))
+    remap = new_code_of_rep[rep_of_cluster[cluster]]
+
+    new_codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+    categories = uniques.take(reps)
+    out = pd.Series(pd.Categorical.from_codes(new_codes, categories=categories, ordered=is_cat and s.cat.ordered),
+                    index=s.index, name=s.name)
+    if not is_cat:
+        out = out.astype(s.dtype)
+
+    sizes = np.bincount(cluster, minlength=k)
+    for c in np.argsort(-sizes, kind="stable")[:MAX_REPORTED_CLUSTERS]:
+        if sizes[c] < 2:
+            break
+        members = np.flatnonzero(cluster == c)
+        report["clusters"].append({
+            "value": uniques[rep_of_cluster[c]],
+            "members": [uniques[i] for i in members if i != rep_of_cluster[c]],
+            "rows": int(counts[members].sum()),
+        })
+    report["distinct_after"] = len(reps)
+    report["rows_changed"] = int(np.count_nonzero(codes >= 0) - counts[reps].sum())
+    return out, report
+
+
+def normalize_values(df: pd.DataFrame, columns: Optional[List[str]] = None,
+                     category_ratio: float = CATEGORY_RATIO) -> Dict[str, Any]:
+    """Normalize categorical/text identifier columns of ``df``.
+
+    ``columns=None`` picks categorical columns and text columns whose distinct
+    values are at most ``category_ratio`` of the rows (the same rule the
+    ingest optimizer uses to make a column categorical).
+    """
+    targets = [c for c in (columns if columns is not None else df.columns)
+               if c in df.columns and _eligible(df[c], category_ratio if columns is None else 1.0)]
+    reports: List[Dict[str, Any]] = []
+    changed: Dict[Any, pd.Series] = {}
+    for col in targets:
+        new, rep = normalize_series(df[col])
+        if rep["distinct_after"] < rep["distinct_before"]:
+            changed[col] = new
+            reports.append(rep)
+    out = df
+    if changed:
+        out = df.copy(deep=False)
+        for col, s in changed.items():
+            out[col] = s
+    return {"normalized_values": reports, "df": out}
@@ -0,0 +1,353 @@
+"""Benchmark the profiling, cleaning and anomaly hot paths.
+
+Usage:
+    python -m benchmarks.run                              # 10k, 1m, 10m rows
+    python -m benchmarks.run --sizes 10k,1m --out bench.json
+    python -m benchmarks.run --cases profile,iqr --skip-http
+    python -m benchmarks.run --compare old.json new.json
+
+Every case records wall time and peak RSS (sampled while the case runs).
+Cases with a ``setup`` (the in-place cleaning routes) get a fresh upload
+before every repeat, outside the timed region.
+Results are written as JSON so two runs can be compared with ``--compare``.
+The on-disk result cache is off (``DQ_RESULT_CACHE=0``) and every upload
+has distinct bytes, so the HTTP cases time the work rather than cache hits.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synth import make_drilling_frame
+
+os.environ.setdefault("DQ_RESULT_CACHE", "0")  # read when backend is first imported
+
+
+# --- memory sampling ---
+
+def _current_rss() -> Optional[int]:
+    try:
+        import psutil  # type: ignore
+        return int(psutil.Process().memory_info().rss)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RssSampler:
+    """Track the peak resident set size while the block runs."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.start: Optional[int] = None
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            rss = _current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self.start = self.peak = _current_rss()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        rss = _current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+
+# --- cases ---
+
+@dataclass
+class Case:
+    name: str
+    group: str
+    fn: Callable[["BenchContext"], Any]
+    setup: Optional[Callable[["BenchContext"], Any]] = None  # untimed, before every repeat
+
+
+class BenchContext:
+    """Data shared by the cases of one size: the frame plus lazily built extras."""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self._client = None
+        self._dataset_id: Optional[str] = None
+        self.scratch_id: Optional[str] = None   # fresh upload for cases that modify it
+        self._csv: Optional[bytes] = None
+        self._uploads = 0
+
+    @property
+    def csv_bytes(self) -> bytes:
+        if self._csv is None:
+            buf = io.StringIO()
+            self.df.to_csv(buf, index=False)
+            self._csv = buf.getvalue().encode()
+        return self._csv
+
+    @property
+    def client(self):
+        if self._client is None:
+            from fastapi.testclient import TestClient
+            from backend.main import app
+            self._client = TestClient(app)
+        return self._client
+
+    @property
+    def dataset_id(self) -> str:
+        if self._dataset_id is None:
+            self._dataset_id = self.upload()
+        return self._dataset_id
+
+    def upload(self) -> str:
+        # trailing blank lines (skipped by the parser) keep identical bytes from reusing a dataset
+        self._uploads += 1
+        body = self.csv_bytes + b"\n" * self._uploads
+        r = self.client.post("/api/upload", files={"file": ("bench.csv", body, "text/csv")})
+        r.raise_for_status()
+        return r.json()["dataset_id"]
+
+    def fresh_dataset(self) -> None:
+        self.scratch_id = self.upload()
+
+    def post_form(self, url: str, data: Dict[str, Any]) -> Any:
+        r = self.client.post(url, data=data)
+        r.raise_for_status()
+        return r.content
+
+    def get(self, url: str) -> Any:
+        r = self.client.get(url)
+        r.raise_for_status()
+        return r.content
+
+    def post_json(self, url: str, payload: Dict[str, Any]) -> Any:
+        r = self.client.post(url, json=payload)
+        r.raise_for_status()
+        return r.content
+
+
+def _iforest(ctx: BenchContext):
+    from sklearn.ensemble import IsolationForest
+    from backend.anomalies_api import _safe_numeric
+    X = _safe_numeric(ctx.df)
+    model = IsolationForest(n_estimators=200, contamination=0.02, random_state=42, n_jobs=-1)
+    return model.fit_predict(X)
+
+
+def _iforest_engine(ctx: BenchContext):
+    from backend.anomaly_engine import fit_score
+    from backend.anomalies_api import _safe_numeric
+    return fit_score(_safe_numeric(ctx.df))
+
+
+def _build_cases() -> List[Case]:
+    from backend.profiling import profile_dataframe
+    from backend.cleaning import deduplicate, standardize, impute_simple, kpis
+    from backend.anomalies_api import _iqr_per_col, summarize_anomalies
+    from backend.rolling import rolling_features
+
+    cases = [
+        Case("profile_dataframe", "core", lambda c: profile_dataframe(c.df)),
+        Case("deduplicate", "core", lambda c: deduplicate(c.df)),
+        Case("standardize", "core", lambda c: standardize(c.df)),
+        Case("impute_simple", "core", lambda c: impute_simple(c.df)),
+        Case("kpis", "core", lambda c: kpis(c.df, c.df)),
+        Case("iqr_per_col", "core", lambda c: _iqr_per_col(c.df)),
+        Case("iforest_fit_predict", "core", _iforest),
+        Case("iforest_engine", "core", _iforest_engine),
+        Case("summarize_anomalies", "core", lambda c: summarize_anomalies(c.df)),
+        Case("rolling_features", "core", lambda c: rolling_features(c.df, window=12)),
+        Case("http_upload", "http", lambda c: c.upload()),
+        Case("http_profile", "http", lambda c: c.get(f"/api/profile?dataset_id={c.dataset_id}")),
+        Case("http_general", "http", lambda c: c.get(f"/api/general?dataset_id={c.dataset_id}")),
+        Case("http_cleansing_preview", "http", lambda c: c.get(f"/api/cleansing/preview?dataset_id={c.dataset_id}")),
+        Case("http_cleansing_apply", "http", lambda c: c.post_json("/api/cleansing/apply", {
+            "dataset_id": c.dataset_id,
+            "actions": {"deduplicate": {}, "standardize": {}, "impute": {}},
+            "dry_run": True,
+        })),
+        Case("http_anomalies_summary", "http", lambda c: c.get(f"/api/anomalies/summary?dataset_id={c.dataset_id}")),
+        Case("http_anomalies_rows", "http", lambda c: c.get(f"/api/anomalies/rows?dataset_id={c.dataset_id}&limit=100")),
+        Case("http_export_csv", "http", lambda c: c.get(f"/api/export/csv?dataset_id={c.dataset_id}")),
+        Case("http_kpis", "http", lambda c: c.get(f"/api/kpis?dataset_id={c.dataset_id}")),
+        Case("http_dedup", "http", lambda c: c.post_form("/api/dedup", {"dataset_id": c.scratch_id}),
+             setup=BenchContext.fresh_dataset),
+        Case("http_standardize", "http", lambda c: c.post_form("/api/standardize", {"dataset_id": c.scratch_id}),
+             setup=BenchContext.fresh_dataset),
+        Case("http_impute", "http", lambda c: c.post_form("/api/impute", {"dataset_id": c.scratch_id}),
+             setup=BenchContext.fresh_dataset),
+    ]
+    return cases
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    mult = 1
+    if text.endswith("k"):
+        mult, text = 1_000, text[:-1]
+    elif text.endswith("m"):
+        mult, text = 1_000_000, text[:-1]
+    return int(float(text) * mult)
+
+
+def run_case(case: Case, ctx: BenchContext, repeat: int) -> Dict[str, Any]:
+    times: List[float] = []
+    peak_delta = 0
+    peak_abs = 0
+    error = None
+    for _ in range(repeat):
+        if case.setup is not None:
+            try:
+                case.setup(ctx)
+            except Exception as e:
+                error = f"setup {type(e).__name__}: {e}"
+                times.append(0.0)
+                break
+        gc.collect()
+        with RssSampler() as mem:
+            t0 = time.perf_counter()
+            try:
+                case.fn(ctx)
+            except Exception as e:  # keep the run going; record the failure
+                error = f"{type(e).__name__}: {e}"
+            times.append(time.perf_counter() - t0)
+        if mem.peak is not None and mem.start is not None:
+            peak_delta = max(peak_delta, mem.peak - mem.start)
+            peak_abs = max(peak_abs, mem.peak)
+        if error:
+            break
+    return {
+        "case": case.name,
+        "group": case.group,
+        "wall_s": round(min(times), 6),
+        "wall_s_all": [round(t, 6) for t in times],
+        "peak_rss_mb": round(peak_abs / 2**20, 2),
+        "rss_delta_mb": round(peak_delta / 2**20, 2),
+        "error": error,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run(sizes: List[int], case_names: Optional[List[str]], skip_http: bool, repeat: int,
+        gen_options: Dict[str, Any]) -> Dict[str, Any]:
+    cases = [c for c in _build_cases()
+             if (not case_names or c.name in case_names or c.group in case_names)
+             and not (skip_http and c.group == "http")]
+    results: List[Dict[str, Any]] = []
+    for rows in sizes:
+        t0 = time.perf_counter()
+        df = make_drilling_frame(rows, **gen_options)
+        print(f"== {rows:,} rows x {df.shape[1]} cols (generated in {time.perf_counter() - t0:.1f}s)")
+        ctx = BenchContext(df)
+        for case in cases:
+            res = run_case(case, ctx, repeat)
+            res["rows"] = rows
+            res["cols"] = int(df.shape[1])
+            results.append(res)
+            flag = f"  !! {res['error']}" if res["error"] else ""
+            print(f"   {case.name:28} {res['wall_s']:10.4f}s  peak {res['peak_rss_mb']:9.1f} MB "
+                  f"(+{res['rss_delta_mb']:.1f}){flag}")
+        del ctx, df
+        gc.collect()
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "repeat": repeat,
+            "generator": gen_options,
+        },
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path) as fh:
+        old = {(r["case"], r["rows"]): r for r in json.load(fh)["results"]}
+    with open(new_path) as fh:
+        new = {(r["case"], r["rows"]): r for r in json.load(fh)["results"]}
+    print(f"{'case':28} {'rows':>10} {'old s':>10} {'new s':>10} {'speedup':>8} {'old MB':>9} {'new MB':>9}")
+    for key in sorted(set(old) & set(new), key=lambda k: (k[1], k[0])):
+        o, n = old[key], new[key]
+        speed = (o["wall_s"] / n["wall_s"]) if n["wall_s"] else float("inf")
+        print(f"{key[0]:28} {key[1]:>10,} {o['wall_s']:>10.4f} {n['wall_s']:>10.4f} {speed:>7.2f}x "
+              f"{o['rss_delta_mb']:>9.1f} {n['rss_delta_mb']:>9.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,1m,10m", help="Comma-separated row counts (k/m suffixes)")
+    parser.add_argument("--cases", default="", help="Comma-separated case names or groups (core, http)")
+    parser.add_argument("--skip-http", action="store_true", help="Skip the HTTP endpoint cases")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported")
+    parser.add_argument("--extra-columns", type=int, default=0)
+    parser.add_argument("--wells", type=int, default=5)
+    parser.add_argument("--null-rate", type=float, default=0.01)
+    parser.add_argument("--dup-rate", type=float, default=0.02)
+    parser.add_argument("--outlier-rate", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    gen_options = {
+        "extra_columns": args.extra_columns,
+        "wells": args.wells,
+        "null_rate": args.null_rate,
+        "dup_rate": args.dup_rate,
+        "outlier_rate": args.outlier_rate,
+        "seed": args.seed,
+    }
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    case_names = [c.strip() for c in args.cases.split(",") if c.strip()] or None
+    report = run(sizes, case_names, args.skip_http, max(1, args.repeat), gen_options)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Synthetic drilling data for benchmarks.
+
+Produces frames shaped like ``data/sample.csv`` (well_id, depth_m,
+pressure_psi, rpm, mud_weight_ppg, timestamp) plus optional extra sensor
+columns, with controllable nulls, duplicate rows and injected outliers.
+"""
+from __future__ import annotations
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+BASE_COLUMNS = ["well_id", "depth_m", "pressure_psi", "rpm", "mud_weight_ppg", "timestamp"]
+
+
+def make_drilling_frame(
+    rows: int,
+    extra_columns: int = 0,
+    wells: int = 5,
+    null_rate: float = 0.01,
+    dup_rate: float = 0.02,
+    outlier_rate: float = 0.005,
+    string_timestamps: bool = True,
+    seed: Optional[int] = 0,
+) -> pd.DataFrame:
+    """Return ``rows`` rows of drilling telemetry.
+
+    ``dup_rate`` of the rows are exact copies of earlier rows, ``null_rate``
+    of the numeric cells are blanked and ``outlier_rate`` of them are pushed
+    far outside the normal range. Timestamps are hourly per well and, like a
+    freshly parsed CSV, kept as strings unless ``string_timestamps`` is False.
+    """
+    rng = np.random.default_rng(seed)
+    n_unique = max(1, int(round(rows * (1.0 - dup_rate))))
+
+    well_idx = rng.integers(0, wells, n_unique)
+    well_names = np.array([f"W-{101 + i}" for i in range(wells)], dtype=object)
+    # per-well running step -> monotonically increasing depth and time
+    order = np.argsort(well_idx, kind="stable")
+    step = np.empty(n_unique, dtype=np.int64)
+    sorted_wells = well_idx[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_wells)) + 1]
+    counts = np.diff(np.r_[starts, n_unique])
+    step[order] = np.arange(n_unique) - np.repeat(starts, counts)
+
+    depth = 1000.0 + step * 0.5 + rng.normal(0, 2.0, n_unique)
+    data = {
+        "well_id": well_names[well_idx],
+        "depth_m": np.round(depth, 1),
+        "pressure_psi": np.round(2500.0 + depth * 0.6 + rng.normal(0, 150.0, n_unique), 0),
+        "rpm": rng.integers(80, 160, n_unique),
+        "mud_weight_ppg": np.round(rng.normal(10.2, 0.6, n_unique), 2),
+    }
+    for i in range(extra_columns):
+        data[f"sensor_{i}"] = rng.normal(0.0, 1.0, n_unique)
+    ts = pd.Timestamp("2024-01-01") + pd.to_timedelta(step, unit="h")
+    data["timestamp"] = ts
+
+    df = pd.DataFrame(data)
+
+    numeric = [c for c in df.columns if c not in ("well_id", "timestamp")]
+    if outlier_rate > 0:
+        for c in numeric:
+            hit = rng.random(n_unique) < outlier_rate
+            if hit.any():
+                col = df[c].astype(float)
+                spread = float(col.std() or 1.0)
+                col[hit] = col[hit] + rng.choice([-1.0, 1.0], int(hit.sum())) * spread * rng.uniform(6, 12, int(hit.sum()))
+                df[c] = col
+    if null_rate > 0:
+        for c in numeric:
+            hit = rng.random(n_unique) < null_rate
+            if hit.any():
+                df[c] = df[c].astype(float).mask(hit)
+
+    n_dups = rows - n_unique
+    if n_dups > 0:
+        picks = rng.integers(0, n_unique, n_dups)
+        df = pd.concat([df, df.iloc[picks]], ignore_index=True)
+        df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+    if string_timestamps:
+        df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    return df
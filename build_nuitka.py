@@ -42,12 +42,27 @@ def check_project_structure():
         print(f"ERROR: Error checking project structure: {e}")
         return False
 
+ASSET_BUNDLE = "build/frontend_assets.zip"
+
+def build_asset_bundle():
+    """Precompress frontend/ (gzip + brotli) so the exe serves it without compressing at runtime."""
+    project_root = Path(__file__).parent
+    try:
+        sys.path.insert(0, str(project_root))
+        from backend.services.assets import build_bundle
+        info = build_bundle(project_root / "frontend", project_root / ASSET_BUNDLE)
+        print(f"SUCCESS: Asset bundle {ASSET_BUNDLE} ({info['files']} files, {info['bytes']:,} bytes)")
+        return True
+    except Exception as e:
+        print(f"ERROR: Could not build the asset bundle: {e}")
+        return False
+
 def build_nuitka_standalone():
     """Build with Nuitka standalone mode (recommended)."""
     project_root = Path(__file__).parent
 
     # First check project structure
-    if not check_project_structure():
+    if not check_project_structure() or not build_asset_bundle():
         return False
 
     cmd = [
@@ -57,6 +72,7 @@ def build_nuitka_standalone():
         "--output-dir=build",
         "--output-filename=drilling_dq.exe",
         "--include-data-dir=frontend=frontend",
+        f"--include-data-files={ASSET_BUNDLE}=frontend_assets.zip",
         "--include-data-dir=backend=backend",
         "--assume-yes-for-downloads",
         "--show-progress",
@@ -75,6 +91,7 @@ def build_nuitka_standalone():
         "--include-module=webbrowser",
         "--include-module=threading",
         "--include-module=pathlib",
+        "--include-module=backend.main",  # imported by name from backend.asgi
         "--include-package=encodings",
         "--include-package=fastapi",
         "--include-package=uvicorn",
@@ -107,7 +124,7 @@ def build_nuitka_minimal():
     project_root = Path(__file__).parent
 
     # First check project structure
-    if not check_project_structure():
+    if not check_project_structure() or not build_asset_bundle():
         return False
 
     cmd = [
@@ -117,6 +134,7 @@ def build_nuitka_minimal():
         "--output-dir=build",
         "--output-filename=drilling_dq.exe",
         "--include-data-dir=frontend=frontend",
+        f"--include-data-files={ASSET_BUNDLE}=frontend_assets.zip",
         "--include-data-dir=backend=backend",
         "--assume-yes-for-downloads",
         "--show-progress",
@@ -132,6 +150,7 @@ def build_nuitka_minimal():
         "--include-module=webbrowser",
         "--include-module=threading",
         "--include-module=pathlib",
+        "--include-module=backend.main",  # imported by name from backend.asgi
         "--include-package=encodings",
         "--include-package=fastapi",
         "--include-package=pandas",
@@ -162,7 +181,7 @@ def build_nuitka_debug():
     project_root = Path(__file__).parent
 
     # First check project structure
-    if not check_project_structure():
+    if not check_project_structure() or not build_asset_bundle():
         return False
 
     cmd = [
@@ -172,6 +191,7 @@ def build_nuitka_debug():
         "--output-dir=build",
         "--output-filename=drilling_dq.exe",
         "--include-data-dir=frontend=frontend",
+        f"--include-data-files={ASSET_BUNDLE}=frontend_assets.zip",
         "--include-data-dir=backend=backend",
         "--debug",
         "--show-progress",
@@ -187,6 +207,7 @@ def build_nuitka_debug():
         "--include-module=webbrowser",
         "--include-module=threading",
         "--include-module=pathlib",
+        "--include-module=backend.main",  # imported by name from backend.asgi
         "--include-package=encodings",
         "--include-package=fastapi",
         "--include-package=pandas",
@@ -217,7 +238,7 @@ def build_nuitka_onefile_tempdir():
     project_root = Path(__file__).parent
 
     # First check project structure
-    if not check_project_structure():
+    if not check_project_structure() or not build_asset_bundle():
         return False
 
     cmd = [
@@ -228,6 +249,7 @@ def build_nuitka_onefile_tempdir():
         "--output-dir=build",
         "--output-filename=drilling_dq.exe",
         "--include-data-dir=frontend=frontend",
+        f"--include-data-files={ASSET_BUNDLE}=frontend_assets.zip",
         "--include-data-dir=backend=backend",
         "--assume-yes-for-downloads",
         "--show-progress",
@@ -243,6 +265,7 @@ def build_nuitka_onefile_tempdir():
         "--include-module=webbrowser",
         "--include-module=threading",
         "--include-module=pathlib",
+        "--include-module=backend.main",  # imported by name from backend.asgi
         "--include-package=encodings",
         "--include-package=fastapi",
         "--include-package=pandas",
@@ -273,7 +296,7 @@ def build_nuitka_standalone_only():
     project_root = Path(__file__).parent
 
     # First check project structure
-    if not check_project_structure():
+    if not check_project_structure() or not build_asset_bundle():
         return False
 
     cmd = [
@@ -282,6 +305,7 @@ def build_nuitka_standalone_only():
         "--output-dir=build",
         "--output-filename=drilling_dq_standalone",
         "--include-data-dir=frontend=frontend",
+        f"--include-data-files={ASSET_BUNDLE}=frontend_assets.zip",
         "--include-data-dir=backend=backend",
         "--assume-yes-for-downloads",
         "--show-progress",
@@ -297,6 +321,7 @@ def build_nuitka_standalone_only():
         "--include-module=webbrowser",
         "--include-module=threading",
         "--include-module=pathlib",
+        "--include-module=backend.main",  # imported by name from backend.asgi
         "--include-package=encodings",
         "--include-package=fastapi",
         "--include-package=pandas",
@@ -399,7 +424,7 @@ def build_pyinstaller_onefile():
     project_root = Path(__file__).parent
 
     # First check project structure
-    if not check_project_structure():
+    if not check_project_structure() or not build_asset_bundle():
         return False
 
     cmd = [
@@ -410,6 +435,7 @@ def build_pyinstaller_onefile():
         "--distpath=build",
         "--workpath=build/pyinstaller_temp",
         "--add-data=frontend;frontend",
+        f"--add-data={ASSET_BUNDLE};.",
         "--add-data=backend;backend",
         "--hidden-import=uvicorn",
         "--hidden-import=fastapi",
@@ -444,7 +470,7 @@ def build_pyinstaller_standalone():
     project_root = Path(__file__).parent
 
     # First check project structure
-    if not check_project_structure():
+    if not check_project_structure() or not build_asset_bundle():
         return False
 
     cmd = [
@@ -455,6 +481,7 @@ def build_pyinstaller_standalone():
         "--distpath=build",
         "--workpath=build/pyinstaller_temp",
         "--add-data=frontend;frontend",
+        f"--add-data={ASSET_BUNDLE};.",
         "--add-data=backend;backend",
         "--hidden-import=uvicorn",
         "--hidden-import=fastapi",
@@ -5,7 +5,13 @@ block_cipher = None
 
 
 from pathlib import Path
+import sys
 ROOT = Path(SPECPATH).resolve().parent
+sys.path.insert(0, SPECPATH)
+from backend.services.assets import build_bundle
+
+# Precompressed frontend (gzip + brotli), served by backend.services.assets
+build_bundle(Path(SPECPATH) / 'frontend', Path(SPECPATH) / 'build' / 'frontend_assets.zip')
 
 a = Analysis(
     ['backend/main.py'],
@@ -13,7 +19,9 @@ a = Analysis(
     binaries=[],
     datas=[
         ('frontend', 'frontend'),
+        ('build/frontend_assets.zip', '.'),
         ('data', 'data'),
+        ('backend/rules', 'backend/rules'),
     ],
     hiddenimports=[
         'fastapi',
@@ -1,12 +1,18 @@
 # -*- mode: python ; coding: utf-8 -*-
+import sys
+sys.path.insert(0, SPECPATH)
+from pathlib import Path
+from backend.services.assets import build_bundle
 
+# Precompressed frontend (gzip + brotli), served by backend.services.assets
+build_bundle(Path(SPECPATH) / 'frontend', Path(SPECPATH) / 'build' / 'frontend_assets.zip')
 
 a = Analysis(
     ['launcher.py'],
     pathex=[],
     binaries=[],
-    datas=[('frontend', 'frontend'), ('backend', 'backend')],
-    hiddenimports=['uvicorn', 'fastapi', 'starlette', 'pydantic', 'pandas', 'numpy', 'sklearn', 'backend.main', 'backend.auth', 'backend.cleaning', 'backend.cleaning_api', 'backend.anomalies_api', 'backend.profiling', 'backend.services.storage'],
+    datas=[('frontend', 'frontend'), ('backend', 'backend'), ('build/frontend_assets.zip', '.')],
+    hiddenimports=['uvicorn', 'fastapi', 'starlette', 'pydantic', 'pandas', 'numpy', 'sklearn', 'backend.main', 'backend.asgi', 'backend.paths', 'backend.services.assets', 'backend.auth', 'backend.cleaning', 'backend.cleaning_api', 'backend.anomalies_api', 'backend.profiling', 'backend.services.storage'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
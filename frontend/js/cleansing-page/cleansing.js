@@ -129,7 +129,7 @@
       const data = await res.json();
 
       const nextId = data.new_dataset_id || dataset_id;
-      window.location.href = `/anomalies?dataset_id=${encodeURIComponent(dataset_id)}`;
+      window.location.href = `/anomalies?dataset_id=${encodeURIComponent(nextId)}`;
     } catch(err){
       console.error('Apply error', err);
       alert('Apply failed. Check console.');
@@ -255,20 +255,20 @@ function removeDragAnimation() {
 
 function addFiles(fileList) {
     const arr = Array.from(fileList || []);
-    const csvFiles = arr.filter(f => /\.csv$/i.test(f.name));
-    const rejected = arr.length - csvFiles.length;
+    const dataFiles = arr.filter(f => /\.(csv|xlsx|xlsm|parquet|pq|las)$/i.test(f.name));
+    const rejected = arr.length - dataFiles.length;
 
     if (rejected > 0) {
-        showToast(`${rejected} file(s) skipped (CSV only).`, 'warning');
+        showToast(`${rejected} file(s) skipped (CSV, XLSX, Parquet or LAS only).`, 'warning');
     }
 
-    if (csvFiles.length > 0) {
+    if (dataFiles.length > 0) {
         // Success animation
         uploadZone.classList.add('pop');
         setTimeout(() => uploadZone.classList.remove('pop'), 600);
 
         // Add files to queue
-        csvFiles.forEach(file => {
+        dataFiles.forEach(file => {
             files.push(file);
             const itemElement = createUploadItem(file);
             uploadQueue.appendChild(itemElement);
@@ -4,14 +4,24 @@ Drilling Data Quality Desktop Application Launcher
 
 This script starts the FastAPI backend server and opens the login page
 in the default web browser.
+
+The server binds immediately with a lightweight shell (``backend.asgi``)
+that serves the login page while ``backend.main`` and the scientific stack
+load in the background. ``--measure-startup`` (or ``DQ_STARTUP_TIMING=1``)
+starts the server without a browser, prints how long each startup phase
+took and exits.
 """
+import time
+
+T0 = time.perf_counter()
 
 import sys
 import os
-import time
+import argparse
 import webbrowser
 import logging
 import threading
+import urllib.request
 import uvicorn
 from pathlib import Path
 from datetime import datetime
@@ -62,8 +72,48 @@ def find_available_port(start_port=8000, max_attempts=10):
 
     raise RuntimeError(f"No available ports found between {start_port} and {start_port + max_attempts - 1}")
 
-def main():
+def _since_start() -> float:
+    return round(time.perf_counter() - T0, 4)
+
+def _wait_started(server, timeout: float = 30.0) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not server.started:
+        if time.perf_counter() > deadline or server.should_exit:
+            return False
+        time.sleep(0.005)
+    return True
+
+def measure_startup(server, app, base_url, log):
+    """Time the startup phases, log them and stop the server."""
+    timings = {"launcher_imported": app.timings.get("launcher_imported")}
+    try:
+        if not _wait_started(server):
+            log.error("Server did not start")
+            return
+        timings["server_listening"] = _since_start()
+        urllib.request.urlopen(f"{base_url}/login", timeout=30).read()
+        timings["login_page_served"] = _since_start()
+        app.ready.wait(timeout=120)
+        timings["app_imported"] = _since_start()
+        urllib.request.urlopen(f"{base_url}/metrics", timeout=120).read()
+        timings["first_api_response"] = _since_start()
+        app.warm.wait(timeout=120)
+        timings["heavy_modules_preloaded"] = _since_start()
+        log.info("Startup timings (seconds since launcher start):")
+        for name, value in timings.items():
+            log.info(f"  {name:26} {value}")
+    finally:
+        server.should_exit = True
+
+def main(argv=None):
     """Launch the FastAPI application server and open browser."""
+    parser = argparse.ArgumentParser(description="Drilling Data Quality desktop launcher")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Print startup phase timings and exit (also DQ_STARTUP_TIMING=1)")
+    parser.add_argument("--no-browser", action="store_true", help="Do not open the login page")
+    args = parser.parse_args(argv)
+    measure = args.measure_startup or os.environ.get("DQ_STARTUP_TIMING") == "1"
+
     logger = ApplicationLogger()
     log = logger.logger
 
@@ -90,46 +140,51 @@ def main():
             log.info(f"Using port: {port}")
         except RuntimeError as e:
             log.error(f"ERROR: {e}")
-            input("Press Enter to exit...")
+            if not measure:
+                input("Press Enter to exit...")
             return
 
-        # Import the FastAPI app after setting up paths
-        try:
-            from backend.main import app
-            log.info("SUCCESS: FastAPI app imported successfully")
-        except ImportError as e:
-            log.error(f"ERROR: Failed to import FastAPI app: {e}")
-            log.error("Make sure backend/main.py exists and is properly configured")
-            input("Press Enter to exit...")
-            return
+        # The shell serves the login page while the app imports in the background
+        from backend.asgi import LazyApp
+        app = LazyApp("backend.main:app", preload=("backend.anomaly_engine:preload", "backend.memory:has_pyarrow"))
+        app.timings["launcher_imported"] = _since_start()
+        app.start_loading()
 
-        server_url = f"http://127.0.0.1:{port}/login"
-        log.info(f"Server will start at: http://127.0.0.1:{port}")
-        log.info("Opening login page in browser...")
+        base_url = f"http://127.0.0.1:{port}"
+        server_url = f"{base_url}/login"
+        log.info(f"Server will start at: {base_url}")
         log.info("Press Ctrl+C to stop the server")
 
-        # Open browser after a short delay
+        config = uvicorn.Config(
+            app,
+            host="127.0.0.1",
+            port=port,
+            log_level="warning" if measure else "info",
+            access_log=False  # Disable access logs for cleaner output
+        )
+        server = uvicorn.Server(config)
+
+        # Open the browser as soon as the socket accepts connections
         def open_browser():
             try:
-                time.sleep(2)  # Give server time to start
-                log.info("Launching browser...")
-                webbrowser.open(server_url)
+                if _wait_started(server):
+                    log.info("Launching browser...")
+                    webbrowser.open(server_url)
             except Exception as e:
                 log.error(f"ERROR: Failed to open browser: {e}")
 
-        browser_thread = threading.Thread(target=open_browser, daemon=True)
-        browser_thread.start()
+        if measure:
+            threading.Thread(target=measure_startup, args=(server, app, base_url, log), daemon=True).start()
+        elif not args.no_browser:
+            threading.Thread(target=open_browser, daemon=True).start()
 
         # Start the FastAPI server with uvicorn
         try:
             log.info("Starting FastAPI server...")
-            uvicorn.run(
-                app,
-                host="127.0.0.1",
-                port=port,
-                log_level="info",
-                access_log=False  # Disable access logs for cleaner output
-            )
+            server.run()
+            if app.error is not None:
+                log.error(f"ERROR: Failed to import FastAPI app: {app.error}")
+                log.error("Make sure backend/main.py exists and is properly configured")
         except KeyboardInterrupt:
             log.info("Server stopped by user")
         except Exception as e: